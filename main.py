@@ -0,0 +1,144 @@
+import argparse
+
+from utils import instrumentation
+from utils.aggregates import load_rollups
+from utils.features import add_derived_features
+from utils.paths import PLOT_DIR
+from utils.pipeline import Pipeline
+from utils.render import render_all
+from utils.storage import read_dataset, dataset_paths, RUI_HACHIMURA_ID
+from scripts import (
+    fg_rank_analysis,
+    general_scatter,
+    player_clustering,
+    role_segmentation,
+    shot_chart,
+    standard_stats_analysis,
+    standard_stats_minutes_dependency,
+    standard_stats_scoring_dependency,
+    standard_stats_vif_analysis,
+    stepwise_selection_minutes_model,
+    stepwise_selection_scoring_model,
+)
+
+# renderステージが生成する図（ショットチャートは取得に失敗した期間があれば次回も描画し直す）
+PLOT_FILES = [
+    "scoring_coef_heatmap.png",
+    "minutes_coef_heatmap.png",
+    "rui_hachimura_vif_analysis.png",
+    "rui_hachimura_correlation_heatmap.png",
+    "rui_hachimura_scoring_dependency_2022_2025.png",
+    "rui_hachimura_scoring_residual_plot.png",
+    "rui_hachimura_scoring_qq_plot.png",
+    "rui_hachimura_minutes_dependency_2022_2025.png",
+    "rui_hachimura_minutes_residual_plot.png",
+    "rui_hachimura_minutes_qq_plot.png",
+    "nba_3pt_scatter.png",
+    "nba_fg_scatter.png",
+    "nba_role_segmentation.png",
+    "nba_player_clusters.png",
+] + shot_chart.plot_files()
+
+
+def load_player_logs():
+    # 八村塁の全シーズンの試合ログ（各分析はこの中から対象シーズンを絞り込む）
+    return read_dataset("standard_stats", filters={"PLAYER_ID": RUI_HACHIMURA_ID})
+
+
+def load_league_traditional():
+    return read_dataset("league_traditional")
+
+
+def load_league_advanced():
+    return read_dataset("league_advanced")
+
+
+def segment_roles(league_advanced, league_rollups):
+    return role_segmentation.analyze(league_advanced, rollups=league_rollups)
+
+
+def render_figures(regression, vif, scoring_dependency, minutes_dependency,
+                   league_traditional, role_segments, player_clusters, shot_data):
+    # 各分析の図の仕様を集め、入力が変わった図だけを並列に描画する
+    specs = (
+        standard_stats_analysis.figure_specs(regression)
+        + standard_stats_vif_analysis.figure_specs(vif)
+        + standard_stats_scoring_dependency.figure_specs(scoring_dependency)
+        + standard_stats_minutes_dependency.figure_specs(minutes_dependency)
+        + general_scatter.figure_specs(league_traditional)
+        + role_segmentation.figure_specs(role_segments)
+        + player_clustering.figure_specs(player_clusters)
+        + shot_chart.figure_specs(shot_data)
+    )
+    return render_all(specs)
+
+
+def build_pipeline():
+    """
+    ingest → features → models → plots の依存グラフを組み立てる
+    データの読み込みと派生列の計算は1回だけ行い、各分析ステージで共有する
+    """
+    pipeline = Pipeline()
+
+    # ingest
+    pipeline.add("player_logs", load_player_logs, inputs=dataset_paths("standard_stats"))
+    pipeline.add("league_traditional", load_league_traditional, inputs=dataset_paths("league_traditional"))
+    pipeline.add("league_advanced", load_league_advanced, inputs=dataset_paths("league_advanced"))
+
+    # features（リーグの表は保存済みのロールアップを使い、無ければここで集計する）
+    pipeline.add("player_features", add_derived_features, deps=["player_logs"])
+    pipeline.add("league_rollups", load_rollups, deps=["league_traditional", "league_advanced"],
+                 inputs=dataset_paths("league_rollups") + dataset_paths("player_rollups"))
+
+    # models
+    pipeline.add("regression", standard_stats_analysis.analyze, deps=["player_features"])
+    pipeline.add("vif", standard_stats_vif_analysis.analyze, deps=["player_features"])
+    pipeline.add("scoring_dependency", standard_stats_scoring_dependency.analyze, deps=["player_features"])
+    pipeline.add("minutes_dependency", standard_stats_minutes_dependency.analyze, deps=["player_features"])
+    pipeline.add("stepwise_scoring", stepwise_selection_scoring_model.analyze, deps=["player_features"])
+    pipeline.add("stepwise_minutes", stepwise_selection_minutes_model.analyze, deps=["player_features"])
+    pipeline.add("fg_rank", fg_rank_analysis.analyze, deps=["league_traditional", "league_rollups"])
+    pipeline.add("role_segmentation", segment_roles, deps=["league_advanced", "league_rollups"])
+    pipeline.add("player_clusters", player_clustering.analyze, deps=["league_traditional", "league_advanced"])
+
+    # plots（全ての図をまとめてプロセスプールで描画する）
+    # 入力はAPIのキャッシュファイル。取得に失敗して空だった場合は記録せず、次回も取得し直す
+    pipeline.add("shot_data", shot_chart.load_data, inputs=shot_chart.cache_paths(), save_empty=False)
+    pipeline.add(
+        "render", render_figures,
+        deps=["regression", "vif", "scoring_dependency", "minutes_dependency",
+              "league_traditional", "role_segmentation", "player_clusters", "shot_data"],
+        outputs=[PLOT_DIR / name for name in PLOT_FILES],
+    )
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全分析をパイプラインとして1プロセスで実行する")
+    parser.add_argument("--stages", nargs="+", help="実行するステージ名（上流ステージも必要に応じて実行）")
+    parser.add_argument("--force", action="store_true", help="入力が変わっていなくても全ステージを再実行する")
+    parser.add_argument("--list", action="store_true", help="ステージ一覧を表示して終了する")
+    parser.add_argument("--profile", nargs="+", default=[], metavar="STAGE",
+                        help="cProfile（pyinstrumentがあればそちら）の結果を保存するステージ")
+    args = parser.parse_args()
+
+    pipeline = build_pipeline()
+    if args.list:
+        for name, stage in pipeline.stages.items():
+            deps = ", ".join(stage.deps) or "-"
+            print(f"{name:<26s} deps: {deps}")
+        return
+
+    unknown = set(args.stages or []) - set(pipeline.stages)
+    if unknown:
+        parser.error(f"未定義のステージです: {', '.join(sorted(unknown))}")
+    instrument = instrumentation.configure(profile_stages=args.profile)
+    try:
+        pipeline.run(targets=args.stages, force=args.force)
+    finally:
+        instrument.summary()
+        print(f"[timing] report: {instrument.write_report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import CSV_DIR
+from utils.instrumentation import instrument, stage
+from utils.storage import read_dataset
+from utils.features import add_derived_features
+from utils.regression import grouped_ols
+from scripts.standard_stats_scoring_dependency import features as scoring_features
+from scripts.standard_stats_minutes_dependency import features as minutes_features
+
+# 得点・出場時間の依存モデルをローテーション選手全員分まとめて推定する
+# 例: python batch_dependency_models.py --seasons 2023-24 2024-25 --by-season
+
+
+def load_data(seasons):
+    columns = ["PLAYER_ID", "SEASON", "PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FG3_PCT",
+               "FTA", "FT_PCT", "OREB", "DREB", "AST"]
+    df = read_dataset("standard_stats", columns=columns, filters={"SEASON": seasons})
+    return add_derived_features(df)
+
+
+def rotation_players(df, group, min_games, min_minutes):
+    # 出場試合数・平均出場時間が基準以上のグループだけを残す
+    summary = df.groupby(group, observed=True)["MIN"].agg(["size", "mean"])
+    keep = summary[(summary["size"] >= min_games) & (summary["mean"] >= min_minutes)].index
+    return df.set_index(group).loc[keep].reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", nargs="+", default=["2022-23", "2023-24", "2024-25"])
+    parser.add_argument("--by-season", action="store_true", help="選手×シーズンごとにモデルを推定する")
+    parser.add_argument("--min-games", type=int, default=20, help="対象にする最小出場試合数")
+    parser.add_argument("--min-minutes", type=float, default=15.0, help="対象にする最小平均出場時間")
+    args = parser.parse_args()
+
+    group = ["PLAYER_ID", "SEASON"] if args.by_season else ["PLAYER_ID"]
+    with stage("load"):
+        df = rotation_players(load_data(args.seasons), group, args.min_games, args.min_minutes)
+    print(f"対象グループ数: {df.groupby(group, observed=True).ngroups}, 試合数: {len(df)}")
+
+    os.makedirs(CSV_DIR, exist_ok=True)
+    for name, target, features in [
+        ("scoring", "PTS", scoring_features),
+        ("minutes", "MIN", minutes_features),
+    ]:
+        with stage(f"fit_{name}"):
+            result = grouped_ols(df.fillna({col: 0 for col in features}), target, features, by=group)
+        path = CSV_DIR / f"player_{name}_dependency_models.csv"
+        result.to_csv(path, index=False)
+        print(f"{name}モデル: {len(result)} 行を保存しました → {path}")
+    instrument.summary()
+    instrument.write_report()
+
+
+if __name__ == "__main__":
+    main()
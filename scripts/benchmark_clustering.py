@@ -0,0 +1,38 @@
+import time
+import numpy as np
+from sklearn.datasets import make_blobs
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.clustering import FEATURES, fit_clusters, select_k
+
+# 合成データで行数ごとのクラスタリングの学習時間を計測する（キャッシュは使わない）
+ROW_COUNTS = [1_000, 10_000, 100_000, 300_000]
+N_CLUSTERS = 6        # 合成データの真のクラスタ数（= 当てはめるk）
+K_VALUES = range(2, 9)  # kの自動選択の候補
+SELECT_K_MAX_ROWS = 100_000  # kの自動選択はこの行数まで計測する
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+rng = np.random.default_rng(0)
+X_all, _ = make_blobs(n_samples=max(ROW_COUNTS), n_features=len(FEATURES), centers=N_CLUSTERS,
+                      cluster_std=2.0, random_state=0)
+
+print(f"特徴量数: {len(FEATURES)}, k={N_CLUSTERS}")
+print(f"{'rows':>8s} {'kmeans':>9s} {'minibatch':>10s} {'gmm':>9s} {'select_k(minibatch)':>20s}")
+for n_rows in ROW_COUNTS:
+    X = np.ascontiguousarray(X_all[rng.choice(len(X_all), n_rows, replace=False)])
+    times = [timed(fit_clusters, X, method, N_CLUSTERS, cache_dir=None)[0]
+             for method in ("kmeans", "minibatch", "gmm")]
+    if n_rows <= SELECT_K_MAX_ROWS:
+        select_time, (best, _) = timed(select_k, X, "minibatch", K_VALUES, cache_dir=None)
+        select_text = f"{select_time:8.2f}s (k={best['k']})"
+    else:
+        select_text = "-"
+    kmeans_time, minibatch_time, gmm_time = times
+    print(f"{n_rows:8d} {kmeans_time:8.2f}s {minibatch_time:9.2f}s {gmm_time:8.2f}s {select_text:>20s}")
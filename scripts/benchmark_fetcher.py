@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.fetcher import fetch_all, REQUEST_INTERVAL
+
+# ローカルのスタブAPIでfetch_allのスループットをオフライン計測する
+N_GAMES = 40          # 取得する試合数
+LATENCY = 0.8         # スタブの応答時間（秒）
+RATE = 2.0            # 許可するリクエストレート（件/秒）
+FAIL_EVERY = 10       # N件に1件はHTTP 429を返す
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    counter = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.counter += 1
+            count = StubHandler.counter
+        time.sleep(LATENCY)
+        if count % FAIL_EVERY == 0:
+            self.send_response(429)
+            self.end_headers()
+            return
+        game_id = self.path.rsplit("=", 1)[-1]
+        body = json.dumps({"GAME_ID": game_id, "PLAYER_ID": 1629060, "PIE": 0.1}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_port}/boxscore?game_id="
+game_ids = [f"00224{i:05d}" for i in range(N_GAMES)]
+
+
+def fetch_stub(game_id):
+    with urllib.request.urlopen(base_url + game_id) as res:
+        return json.loads(res.read())
+
+
+# 旧実装相当: 逐次取得 + 固定ウェイト
+start = time.perf_counter()
+for game_id in game_ids:
+    try:
+        fetch_stub(game_id)
+    except Exception:
+        time.sleep(3)
+        continue
+    time.sleep(REQUEST_INTERVAL)
+sequential_time = time.perf_counter() - start
+
+# fetch_all: ワーカープール + トークンバケット + 指数バックオフ
+start = time.perf_counter()
+results, errors = fetch_all(game_ids, fetch_stub, max_workers=8, rate=RATE, base_delay=0.5, verbose=False)
+pooled_time = time.perf_counter() - start
+
+server.shutdown()
+
+print(f"試合数: {N_GAMES}, 応答時間: {LATENCY}s, 許可レート: {RATE}件/秒")
+print(f"逐次 + 固定ウェイト: {sequential_time:.1f}s ({N_GAMES / sequential_time:.2f}件/秒)")
+print(f"fetch_all:           {pooled_time:.1f}s ({len(results) / pooled_time:.2f}件/秒, 失敗 {len(errors)}件)")
@@ -0,0 +1,24 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.aggregates import refresh_rollups
+from utils.storage import read_dataset
+
+# 保存済みのリーグ全選手の表からロールアップ（シーズン・チーム・リーグ単位の統計量と選手のパーセンタイル）を作り直す
+# 取り込みスクリプトは書き込み時に自動で作り直すので、通常は集計の定義を変えたときだけ実行する
+# 例: python build_league_rollups.py --seasons 2023-24 2024-25
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", nargs="+", help="対象シーズン（省略時は保存済みの全シーズン）")
+    args = parser.parse_args()
+
+    seasons = args.seasons or sorted(read_dataset("league_traditional", columns=["SEASON"])["SEASON"].unique())
+    groups, players = refresh_rollups(seasons)
+    print(f"league_rollups: {len(groups)} 行, player_rollups: {len(players)} 行を保存しました（{', '.join(seasons)}）")
+
+
+if __name__ == "__main__":
+    main()
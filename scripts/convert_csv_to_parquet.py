@@ -0,0 +1,13 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.storage import DATASETS, migrate_legacy_csv
+
+# outputs/csv の旧CSVを outputs/parquet のパーティション分割データセットに移行する
+for name, spec in DATASETS.items():
+    # 旧CSVが無いデータセット（API取得で初めて作るもの）は対象外
+    if spec["legacy_csv"] is None:
+        continue
+    filename, _ = spec["legacy_csv"]
+    rows = migrate_legacy_csv(name)
+    print(f"{filename} → {name}: {rows} 行")
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import CSV_DIR
+from utils.storage import read_dataset, RUI_HACHIMURA_ID
+from utils.features import add_derived_features
+from utils.resampling import resampling_summary
+from scripts import standard_stats_minutes_dependency as minutes_model
+from scripts import standard_stats_scoring_dependency as scoring_model
+
+# 得点・出場時間の依存モデルの係数について、ブートストラップ信頼区間と置換検定のp値を求める
+# 残差の正規性を仮定しないので、Q-Qプロットで正規性が疑わしい場合のOLSのp値の代わりに使う
+# 例: python dependency_inference.py --model scoring --n-resamples 10000
+#     python dependency_inference.py --model minutes --league --workers 8
+
+MODELS = {
+    "scoring": ("PTS", scoring_model.features),
+    "minutes": ("MIN", minutes_model.features),
+}
+COLUMNS = ["PLAYER_ID", "SEASON", "PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FG3_PCT",
+           "FTA", "FT_PCT", "OREB", "DREB", "AST"]
+
+
+def load_data(seasons, league=False):
+    # league=Trueなら保存済みの全選手の試合ログを1つのモデルとしてまとめて扱う
+    filters = {"SEASON": seasons}
+    if not league:
+        filters["PLAYER_ID"] = RUI_HACHIMURA_ID
+    return add_derived_features(read_dataset("standard_stats", columns=COLUMNS, filters=filters))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=list(MODELS), default="scoring")
+    parser.add_argument("--seasons", nargs="+", default=scoring_model.target_seasons)
+    parser.add_argument("--league", action="store_true", help="全選手の試合ログを対象にする")
+    parser.add_argument("--n-resamples", type=int, default=10000, help="ブートストラップ・置換の回数")
+    parser.add_argument("--ci", type=float, default=0.95, help="信頼区間の水準")
+    parser.add_argument("--workers", type=int, help="プロセス数（省略時はCPU数）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    target, features = MODELS[args.model]
+    df = load_data(args.seasons, args.league)
+    df = df.fillna({col: 0 for col in features})
+    print(f"モデル: {args.model}, 試合数: {len(df)}, リサンプル数: {args.n_resamples}")
+
+    start = time.perf_counter()
+    result = resampling_summary(df, target, features, args.n_resamples, args.ci, seed=args.seed,
+                                max_workers=args.workers)
+    print(f"計算時間: {time.perf_counter() - start:.1f}s\n")
+    print(result.round(4).to_string(index=False))
+
+    os.makedirs(CSV_DIR, exist_ok=True)
+    scope = "league" if args.league else "rui_hachimura"
+    path = CSV_DIR / f"{scope}_{args.model}_dependency_inference.csv"
+    result.to_csv(path, index=False)
+    print(f"\n保存しました → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,60 @@
-import pandas as pd
-
-# データ読み込み
-df = pd.read_csv("../outputs/csv/nba_players_2024_2025_30games_clustering.csv")
-# 八村塁を抽出
-rui = df[df["PLAYER_NAME"].str.contains("Hachimura", case=False, na=False)]
-if rui.empty:
-    raise ValueError("八村塁のデータが見つかりません。")
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.storage import read_dataset
+from utils.percentile import PercentileIndex
+from utils.aggregates import Rollups
+
+# 対象シーズン
+target_season = "2024-25"
 # 対象列
 metrics = ["FG_PCT", "FG3_PCT"]
 
-for metric in metrics:
-    if metric not in df.columns:
-        print(f"{metric} がデータに含まれていません。")
-        continue
-    # 八村の値
-    rui_value = rui.iloc[0][metric]
-    # パーセンタイル計算
-    percentile = (df[metric] < rui_value).mean() * 100
-    rank = df[metric].rank(pct=True).loc[rui.index[0]] * 100
-
-    print(f"{metric}: 八村塁 = {rui_value:.3f}")
-    print(f"  → 全選手中 上位 {100 - percentile:.2f}%（下位 {percentile:.2f}%)")
+
+def load_data():
+    return read_dataset("league_traditional", filters={"SEASON": target_season})
+
+
+def percentile_lookup(df, rollups, player_id):
+    # 集計済みのパーセンタイルがあればそれを引き、無ければ列ごとにソート済みのインデックスを作って二分探索で求める
+    available = [metric for metric in metrics if metric in df.columns]
+    if rollups is not None:
+        try:
+            cached = {metric: float(rollups.player(target_season, player_id, metric)) for metric in available}
+            return lambda metric, value: cached[metric]
+        except KeyError:
+            pass
+    index = PercentileIndex(df, available)
+    return lambda metric, value: float(index.percentile(metric, value))
+
+
+def analyze(df, rollups=None):
+    df = df[df["SEASON"] == target_season]
+    # 八村塁を抽出
+    rui = df[df["PLAYER_NAME"].str.contains("Hachimura", case=False, na=False)]
+    if rui.empty:
+        raise ValueError("八村塁のデータが見つかりません。")
+
+    percentile_of = percentile_lookup(df, rollups, rui.iloc[0]["PLAYER_ID"])
+    results = {}
+    for metric in metrics:
+        if metric not in df.columns:
+            print(f"{metric} がデータに含まれていません。")
+            continue
+        # 八村の値
+        rui_value = rui.iloc[0][metric]
+        # パーセンタイル計算
+        percentile = percentile_of(metric, rui_value)
+
+        print(f"{metric}: 八村塁 = {rui_value:.3f}")
+        print(f"  → 全選手中 上位 {100 - percentile:.2f}%（下位 {percentile:.2f}%)")
+        results[metric] = {"value": rui_value, "percentile": percentile}
+    return results
+
+
+def main():
+    analyze(load_data(), Rollups.load(target_season))
+
+
+if __name__ == "__main__":
+    main()
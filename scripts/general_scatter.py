@@ -1,83 +1,114 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import PLOT_DIR
+from utils.storage import read_dataset
+from utils.render import FigureSpec, render_all
+from utils.aggregates import Rollups
 
-# データ読み込み
-df = pd.read_csv("../outputs/csv/nba_players_2024_2025_30games_clustering.csv")
-plot_dir = "../outputs/plots"
-os.makedirs(plot_dir, exist_ok=True)
-# 3ポイント関連の特徴量のみを使用
-features_3pt = ["FG3A", "FG3_PCT"]
-# 欠損値を0で埋める
-df_clean_3pt = df[features_3pt].fillna(0)
-# 散布図の可視化（3ポイント）
-plt.figure(figsize=(12, 8))
-# 全選手をプロット
-plt.scatter(
-    df_clean_3pt["FG3A"], df_clean_3pt["FG3_PCT"],
-    c="green", s=50, alpha=0.6, edgecolor="gray", linewidth=0.5
-)
-# 八村塁ハイライト
-rui = df[df["PLAYER_NAME"].str.contains("Hachimura", case=False, na=False)]
-if not rui.empty:
-    plt.scatter(
-        rui["FG3A"], rui["FG3_PCT"],
-        s=250, color="blue", edgecolor="black", zorder=5, label="Rui Hachimura"
+# 対象シーズン
+target_season = "2024-25"
+
+
+def load_data():
+    return read_dataset(
+        "league_traditional",
+        columns=["SEASON", "PLAYER_NAME", "FGA", "FG_PCT", "FG3A", "FG3_PCT"],
+        filters={"SEASON": target_season},
     )
 
-plt.title("NBA Player 3-Point Shooting", fontsize=15)
-plt.xlabel("3-Point Attempts(FG3A)")
-plt.ylabel("3-Point Percentage (FG3_PCT)")
-plt.legend()
-plt.grid(alpha=0.3)
-
-path_3pt = f"{plot_dir}/nba_3pt_scatter.png"
-plt.savefig(path_3pt, bbox_inches="tight", dpi=300)
-plt.close()
-
-# フィールドゴール関連の特徴量を使用
-features_fg = ["FGA", "FG_PCT"]
-# 欠損値を0で埋める
-df_clean_fg = df[features_fg].fillna(0)
-# 散布図の可視化（フィールドゴール
-plt.figure(figsize=(12, 8))
-# 全選手をプロット
-plt.scatter(
-    df_clean_fg["FGA"], df_clean_fg["FG_PCT"],
-    c="green", s=50, alpha=0.6, edgecolor="gray", linewidth=0.5
-)
-# 八村塁ハイライト
-if not rui.empty:
+
+def plot_scatter(data, path, x, y, title, xlabel, ylabel):
+    plt.figure(figsize=(12, 8))
+    # 全選手をプロット
     plt.scatter(
-        rui["FGA"], rui["FG_PCT"],
-        s=250, color="blue", edgecolor="black", zorder=5, label="Rui Hachimura"
+        data["all"][x], data["all"][y],
+        c="green", s=50, alpha=0.6, edgecolor="gray", linewidth=0.5
     )
+    # 八村塁ハイライト
+    if not data["rui"].empty:
+        plt.scatter(
+            data["rui"][x], data["rui"][y],
+            s=250, color="blue", edgecolor="black", zorder=5, label="Rui Hachimura"
+        )
+
+    plt.title(title, fontsize=15)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.legend()
+    plt.grid(alpha=0.3)
+    plt.savefig(path, bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+def figure_specs(df, plot_dir=PLOT_DIR):
+    df = df[df["SEASON"] == target_season]
+    # 3ポイント関連の特徴量のみを使用
+    features_3pt = ["FG3A", "FG3_PCT"]
+    # フィールドゴール関連の特徴量を使用
+    features_fg = ["FGA", "FG_PCT"]
+    # 八村塁ハイライト
+    rui = df[df["PLAYER_NAME"].str.contains("Hachimura", case=False, na=False)]
+    return [
+        # 散布図の可視化（3ポイント）
+        FigureSpec(
+            plot_scatter, {"all": df[features_3pt].fillna(0), "rui": rui[features_3pt]},
+            f"{plot_dir}/nba_3pt_scatter.png",
+            x="FG3A", y="FG3_PCT", title="NBA Player 3-Point Shooting",
+            xlabel="3-Point Attempts(FG3A)", ylabel="3-Point Percentage (FG3_PCT)",
+        ),
+        # 散布図の可視化（フィールドゴール）
+        FigureSpec(
+            plot_scatter, {"all": df[features_fg].fillna(0), "rui": rui[features_fg]},
+            f"{plot_dir}/nba_fg_scatter.png",
+            x="FGA", y="FG_PCT", title="NBA Player Field Goal Shooting",
+            xlabel="Field Goal Attempts (FGA)", ylabel="Field Goal Percentage (FG_PCT)",
+        ),
+    ]
+
+
+def league_means(df, rollups=None):
+    # 集計済みのリーグ平均があればそれを使い、無ければ表から求める（保存済みの表は欠損を0で埋めてある）
+    stats = ["FG3A", "FG3_PCT", "FGA", "FG_PCT"]
+    if rollups is not None and all(rollups.has(target_season, stat) for stat in stats):
+        return {stat: rollups.value(target_season, stat) for stat in stats}
+    return {stat: df[stat].fillna(0).mean() for stat in stats}
+
+
+def plot(df, plot_dir=PLOT_DIR, rollups=None):
+    spec_3pt, spec_fg = figure_specs(df, plot_dir)
+    render_all([spec_3pt, spec_fg])
+    df = df[df["SEASON"] == target_season]
+    means = league_means(df, rollups)
+    rui = df[df["PLAYER_NAME"].str.contains("Hachimura", case=False, na=False)]
+    path_3pt = spec_3pt.path
+    path_fg = spec_fg.path
+
+    # 結果出力
+    print("3ポイントシュート散布図分析結果")
+    print(f"総選手数: {len(df)}人")
+    print(f"平均3P試行数: {means['FG3A']:.3f}")
+    print(f"平均3P成功率: {means['FG3_PCT']:.3f}")
+
+    print("\nフィールドゴール散布図分析結果")
+    print(f"平均FG試行数: {means['FGA']:.3f}")
+    print(f"平均FG成功率: {means['FG_PCT']:.3f}")
+
+    if not rui.empty:
+        print(f"\n八村塁の3P試行数: {rui['FG3A'].values[0]:.1f}")
+        print(f"八村塁の3P成功率: {rui['FG3_PCT'].values[0]:.3f}")
+        print(f"八村塁のFG試行数: {rui['FGA'].values[0]:.1f}")
+        print(f"八村塁のFG成功率: {rui['FG_PCT'].values[0]:.3f}")
+
+    print(f"\n出力完了:")
+    print(f"  3ポイント散布図: {path_3pt}")
+    print(f"  フィールドゴール散布図: {path_fg}")
+
+
+def main():
+    plot(load_data(), rollups=Rollups.load(target_season))
+
 
-plt.title("NBA Player Field Goal Shooting", fontsize=15)
-plt.xlabel("Field Goal Attempts (FGA)")
-plt.ylabel("Field Goal Percentage (FG_PCT)")
-plt.legend()
-plt.grid(alpha=0.3)
-
-path_fg = f"{plot_dir}/nba_fg_scatter.png"
-plt.savefig(path_fg, bbox_inches="tight", dpi=300)
-plt.close()
-# 結果出力
-print("3ポイントシュート散布図分析結果")
-print(f"総選手数: {len(df)}人")
-print(f"平均3P試行数: {df_clean_3pt['FG3A'].mean():.3f}")
-print(f"平均3P成功率: {df_clean_3pt['FG3_PCT'].mean():.3f}")
-
-print("\nフィールドゴール散布図分析結果")
-print(f"平均FG試行数: {df_clean_fg['FGA'].mean():.3f}")
-print(f"平均FG成功率: {df_clean_fg['FG_PCT'].mean():.3f}")
-
-if not rui.empty:
-    print(f"\n八村塁の3P試行数: {rui['FG3A'].values[0]:.1f}")
-    print(f"八村塁の3P成功率: {rui['FG3_PCT'].values[0]:.3f}")
-    print(f"八村塁のFG試行数: {rui['FGA'].values[0]:.1f}")
-    print(f"八村塁のFG成功率: {rui['FG_PCT'].values[0]:.3f}")
-
-print(f"\n出力完了:")
-print(f"  3ポイント散布図: {path_3pt}")
-print(f"  フィールドゴール散布図: {path_fg}")
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
-from nba_api.stats.endpoints import playergamelog, boxscoreadvancedv2
 from nba_api.stats.static import players
 import pandas as pd
-import time
-import os
+import argparse
+import sys
+sys.path.append('../')
+from utils.ingest import fetch_game_logs, fetch_advanced_box_scores, build_advanced_stats
+from utils.sync import read_existing, seasons_to_sync, new_games, append_atomic
+from utils.storage import write_dataset
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--incremental", action="store_true", help="保存済みデータに無い試合だけを取得して追記する")
+args = parser.parse_args()
 
 # 八村塁のplayer_idを取得
 player_dict = players.find_players_by_full_name("Rui Hachimura")
@@ -11,72 +18,27 @@ print(f"Rui Hachimura PLAYER_ID: {rui_id}")
 
 # 対象シーズン
 seasons = ["2019-20", "2020-21", "2021-22", "2022-23", "2023-24", "2024-25"]
-
-all_games = []
-
-for season in seasons:
-    print(f"Fetching GAME LOG for {season}...")
-    gamelog = playergamelog.PlayerGameLog(player_id=rui_id, season=season)
-    df_log = gamelog.get_data_frames()[0]
-    df_log["SEASON"] = season
-    all_games.append(df_log)
-
-# 全シーズン結合
-games_df = pd.concat(all_games, ignore_index=True)
-# アドバンスドスタッツ格納用
-advanced_stats_list = []
-# 各試合のGAME_IDを使って詳細データ取得
-for i, row in games_df.iterrows():
-    game_id = row["Game_ID"]
-    try:
-        box = boxscoreadvancedv2.BoxScoreAdvancedV2(game_id=game_id)
-        df_adv = box.get_data_frames()[0]
-
-        # 八村の行だけ抽出
-        player_row = df_adv[df_adv["PLAYER_ID"] == rui_id]
-
-        if not player_row.empty:
-            advanced_stats_list.append({
-                "SEASON": row["SEASON"],                  # シーズン（例: 2024-25）
-                "GAME_ID": game_id,                       # 試合ID（ユニークな識別子）
-                "GAME_DATE": row["GAME_DATE"],            # 試合日
-                "MATCHUP": row["MATCHUP"],                # 対戦カード（例: LAL vs BOS）
-                "WL": row["WL"],                          # 勝敗（W or L）
-                "MIN": player_row["MIN"].values[0],       # 出場時間（分）
-
-                "OFF_RATING": player_row["OFF_RATING"].values[0],  # チームオフェンス効率（100ポゼッションあたり得点）
-                "DEF_RATING": player_row["DEF_RATING"].values[0],  # チームディフェンス効率（100ポゼッションあたり失点）
-                "NET_RATING": player_row["NET_RATING"].values[0],  # OFF_RATING - DEF_RATING（チームの総合効率）
-
-                "AST_PCT": player_row["AST_PCT"].values[0],        # 味方の得点に対してアシストした割合
-                "AST_RATIO": player_row["AST_RATIO"].values[0],    # 100ポゼッションあたりのアシスト数
-                "OREB_PCT": player_row["OREB_PCT"].values[0],      # オフェンスリバウンド率
-                "DREB_PCT": player_row["DREB_PCT"].values[0],      # ディフェンスリバウンド率
-                "REB_PCT": player_row["REB_PCT"].values[0],        # トータルリバウンド率
-
-                "TO_RATIO": player_row["TM_TOV_PCT"].values[0],    # チームターンオーバー率（低いほど良い）
-                "EFG_PCT": player_row["EFG_PCT"].values[0],        # 有効FG％（3Pを1.5倍で評価したシュート効率）
-                "TS_PCT": player_row["TS_PCT"].values[0],          # True Shooting％（FG・3P・FTを総合した得点効率）
-                "USG_PCT": player_row["USG_PCT"].values[0],        # 使用率（どれだけ攻撃に関与したか）
-                "PACE": player_row["PACE"].values[0],              # 試合テンポ（ポゼッションの速さ）
-                "PIE": player_row["PIE"].values[0],                # Player Impact Estimate（試合全体への影響度）
-            })
-        else:
-            print(f"No data for GAME_ID {game_id}")
-    except Exception as e:
-        print(f"Error fetching GAME_ID {game_id}: {e}")
-        time.sleep(3)
-        continue
-
-    # API制限対策で少しウェイト
-    time.sleep(1.2)
-# DataFrame化
-adv_df = pd.DataFrame(advanced_stats_list)
-# 出力ディレクトリ作成
-output_dir = "../outputs/csv"
-os.makedirs(output_dir, exist_ok=True)
-# CSV出力
-adv_df.to_csv(f"{output_dir}/rui_hachimura_advanced_stats_2019_2025.csv", index=False)
+# 差分モードでは保存済みの終了シーズンを取得しない
+existing_df = read_existing("advanced_stats", [rui_id]) if args.incremental else pd.DataFrame()
+if args.incremental:
+    seasons = seasons_to_sync(existing_df, seasons)
+    print(f"差分取得対象シーズン: {seasons}")
+
+# ゲームログを取得
+games_df = fetch_game_logs([rui_id], seasons)
+# 差分モードでは保存済みのGAME_IDを除外し、新しい試合のボックススコアだけ取得する
+games_df = new_games(games_df, existing_df)
+print(f"取得対象: {len(games_df)} 試合")
+
+# 各試合のGAME_IDを使って詳細データを並列取得（レート制限・リトライはfetch_allが担当）
+box_df = fetch_advanced_box_scores(games_df["GAME_ID"])
+# 八村の行だけ結合
+adv_df = build_advanced_stats(games_df, box_df)
+# シーズン×選手でパーティション分割したParquetに保存（差分モードは変更のあったパーティションだけ置き換え）
+if args.incremental:
+    append_atomic(adv_df, existing_df, "advanced_stats")
+else:
+    write_dataset(adv_df, "advanced_stats")
 
 print(f"\n 取得完了: {len(adv_df)} 試合分のアドバンスドスタッツを保存しました。")
 print(adv_df.head())
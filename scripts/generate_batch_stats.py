@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.ingest import (
+    STANDARD_COLUMNS,
+    resolve_player_ids,
+    players_with_min_gp,
+    fetch_game_logs,
+    fetch_advanced_box_scores,
+    build_advanced_stats,
+)
+from utils.storage import write_dataset
+
+# 複数選手のゲームログ・アドバンスドスタッツをまとめて取得する
+# 例: python generate_batch_stats.py --players "Rui Hachimura" "LeBron James"
+#     python generate_batch_stats.py --min-gp 30 --gp-season 2024-25 --advanced
+parser = argparse.ArgumentParser()
+parser.add_argument("--players", nargs="*", default=[], help="選手名のリスト")
+parser.add_argument("--player-ids", nargs="*", type=int, default=[], help="PLAYER_IDのリスト")
+parser.add_argument("--min-gp", type=int, help="LeagueDashPlayerStatsで出場試合数がこの値以上の全選手を対象にする")
+parser.add_argument("--gp-season", default="2024-25", help="--min-gpの判定に使うシーズン")
+parser.add_argument("--seasons", nargs="+",
+                    default=["2019-20", "2020-21", "2021-22", "2022-23", "2023-24", "2024-25"])
+parser.add_argument("--advanced", action="store_true", help="アドバンスドスタッツも取得する")
+args = parser.parse_args()
+
+# 対象選手
+player_ids = list(args.player_ids) + resolve_player_ids(args.players)
+if args.min_gp is not None:
+    player_ids += players_with_min_gp(args.gp_season, args.min_gp)
+player_ids = list(dict.fromkeys(player_ids))
+if not player_ids:
+    parser.error("--players / --player-ids / --min-gp のいずれかで対象選手を指定してください")
+print(f"対象選手数: {len(player_ids)}, 対象シーズン: {args.seasons}")
+
+# ゲームログ（選手×シーズン）
+games_df = fetch_game_logs(player_ids, args.seasons)
+standard_df = games_df[["PLAYER_ID", "GAME_ID"] + STANDARD_COLUMNS]
+write_dataset(standard_df, "standard_stats")
+print(f"スタンダードスタッツ: {len(standard_df)} 試合分を保存しました")
+
+if args.advanced:
+    # 同じ試合に出た選手同士でボックススコアを共有するため、取得回数はユニークな試合数だけ
+    game_ids = games_df["GAME_ID"].unique()
+    print(f"ボックススコア取得: {len(game_ids)} 試合（選手×試合 {len(games_df)} 行）")
+    box_df = fetch_advanced_box_scores(game_ids)
+    adv_df = build_advanced_stats(games_df, box_df)
+    write_dataset(adv_df, "advanced_stats")
+    print(f"アドバンスドスタッツ: {len(adv_df)} 試合分を保存しました")
@@ -1,20 +1,29 @@
 from nba_api.stats.endpoints import leaguedashplayerstats
 import pandas as pd
-import time
+import sys
+sys.path.append('../')
+from utils.policy import RequestPolicy
+from utils.storage import write_dataset
+from utils.aggregates import refresh_rollups
 
 # 2024-25シーズンのみ
 season = "2024-25"
 
 print(f"Fetching season {season} ...")
 
-data = leaguedashplayerstats.LeagueDashPlayerStats(
-    season=season,
-    season_type_all_star="Regular Season",
-    measure_type_detailed_defense="Advanced",
-    per_mode_detailed="PerGame"
-)
-
-df = data.get_data_frames()[0]
+policy = RequestPolicy(max_attempts=3, retry_budget=5, timeout=30)
+try:
+    df = policy.frames(
+        leaguedashplayerstats.LeagueDashPlayerStats,
+        season=season,
+        season_type_all_star="Regular Season",
+        measure_type_detailed_defense="Advanced",
+        per_mode_detailed="PerGame"
+    )[0]
+except Exception as e:
+    sys.exit(f"Error fetching data: {e}")
+finally:
+    policy.report()
 df["SEASON"] = season
 # GPが30超えのプレイヤーにフィルタリング
 df_filtered = df[df["GP"] >= 30].reset_index(drop=True)
@@ -46,6 +55,9 @@ available_columns = [col for col in columns if col in df_filtered.columns]
 df_selected = df_filtered[available_columns].copy()
 
 print(f"Total players (GP >= 30): {len(df_selected)}")
-# CSV出力
-df_selected.to_csv("../outputs/csv/nba_players_advanced_2024_2025_30games_clustering.csv", index=False)
-print("Saved to nba_players_advanced_2024_2025_30games_clustering.csv")
+# シーズンでパーティション分割したParquetに保存
+write_dataset(df_selected, "league_advanced")
+print(f"Saved to league_advanced (SEASON={season})")
+# 分析・描画で使うシーズン・チーム・リーグ単位のロールアップを取り込み時に作り直す
+refresh_rollups(season)
+print(f"Saved to league_rollups / player_rollups (SEASON={season})")
@@ -1,45 +1,38 @@
 from nba_api.stats.endpoints import leaguedashplayerstats
-import pandas as pd
-import time
+import sys
+sys.path.append('../')
+from utils.ingest import LEAGUE_MEASURE_TYPES
+from utils.policy import RequestPolicy
+from utils.storage import write_dataset
+from utils.aggregates import refresh_rollups
 
-# データ取得
-print(f"Fetching player stats for 2024-25...")
+season = "2024-25"
+# リトライは一時的なエラー（タイムアウト・429・5xx）だけ。パラメータを弱めて取り直すことはしない
+policy = RequestPolicy(max_attempts=3, retry_budget=5, timeout=30)
 
+# データ取得（1試合平均のTraditionalスタッツ。APIのmeasure typeでは "Base"）
+print(f"Fetching player stats for {season}...")
 try:
-    data = leaguedashplayerstats.LeagueDashPlayerStats(
-        season="2024-25",
+    df = policy.frames(
+        leaguedashplayerstats.LeagueDashPlayerStats,
+        season=season,
         season_type_all_star="Regular Season",
-        measure_type_detailed_defense="Traditional",
+        measure_type_detailed_defense=LEAGUE_MEASURE_TYPES["Traditional"],
         per_mode_detailed="PerGame"
-    )
-    df = data.get_data_frames()[0]
+    )[0]
 except Exception as e:
-    print(f"Error fetching data: {e}")
-    print("Retrying with different parameters...")
-    time.sleep(2)
-    
-    try:
-        data = leaguedashplayerstats.LeagueDashPlayerStats(
-            season="2024-25",
-            season_type_all_star="Regular Season"
-        )
-        df = data.get_data_frames()[0]
-    except Exception as e2:
-        print(f"Second attempt failed: {e2}")
-        print("Trying with minimal parameters...")
-        time.sleep(2)
-        
-        data = leaguedashplayerstats.LeagueDashPlayerStats(
-            season="2024-25"
-        )
-        df = data.get_data_frames()[0]
+    sys.exit(f"Error fetching data: {e}")
+finally:
+    policy.report()
 
+df["SEASON"] = season
 # フィルタ: 出場試合数30試合以上
 df_filtered = df[df["GP"] >= 30].reset_index(drop=True)
 # 利用可能なカラムを確認
 print("Available columns:", df_filtered.columns.tolist())
 # 必要なカラムを抽出
 columns = [
+    "SEASON",           # シーズン
     "PLAYER_ID",        # プレイヤーID
     "PLAYER_NAME",      # プレイヤー名
     "TEAM_ABBREVIATION", # チーム略称
@@ -77,5 +70,8 @@ df_selected = df_selected.fillna(0)
 # 統計情報を確認
 print(f"Total players (>=30 games): {len(df_selected)}")
 # 保存
-df_selected.to_csv("../outputs/csv/nba_players_2024_2025_30games_clustering.csv", index=False)
-print(f"Saved to nba_players_2024_2025_30games_clustering.csv")
+write_dataset(df_selected, "league_traditional")
+print(f"Saved to league_traditional (SEASON={season})")
+# 分析・描画で使うシーズン・チーム・リーグ単位のロールアップを取り込み時に作り直す
+refresh_rollups(season)
+print(f"Saved to league_rollups / player_rollups (SEASON={season})")
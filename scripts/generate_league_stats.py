@@ -0,0 +1,68 @@
+import argparse
+import os
+import time
+import pandas as pd
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.fetcher import REQUEST_INTERVAL
+from utils.ingest import LEAGUE_MEASURE_TYPES, season_range, fetch_league_stats, build_league_wide
+from utils.aggregates import refresh_rollups
+from utils.policy import RequestPolicy
+from utils.storage import write_dataset
+
+# 複数シーズン × measure type × per modeのリーグ全選手スタッツをまとめて取得する
+# 例: python generate_league_stats.py --start 2015-16 --end 2024-25
+#     python generate_league_stats.py --seasons 2024-25 --measure-types Traditional Advanced --per-modes PerGame Totals
+parser = argparse.ArgumentParser()
+parser.add_argument("--start", default="2024-25", help="対象期間の最初のシーズン")
+parser.add_argument("--end", default="2024-25", help="対象期間の最後のシーズン")
+parser.add_argument("--seasons", nargs="+", help="対象シーズンのリスト（指定時は--start/--endより優先）")
+parser.add_argument("--measure-types", nargs="+", choices=list(LEAGUE_MEASURE_TYPES),
+                    default=list(LEAGUE_MEASURE_TYPES))
+parser.add_argument("--per-modes", nargs="+", default=["PerGame"],
+                    help="先頭のper modeは接尾辞なし、以降は_TOTALなどの接尾辞付きの列になる")
+parser.add_argument("--min-gp", type=int, default=30,
+                    help="league_traditional / league_advancedに保存する選手の最小出場試合数")
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--rate", type=float, default=1 / REQUEST_INTERVAL, help="許可するリクエストレート（件/秒）")
+parser.add_argument("--timeout", type=float, default=30, help="1リクエストのタイムアウト（秒）")
+parser.add_argument("--retry-budget", type=int, default=20, help="全リクエストで許すリトライの合計回数")
+args = parser.parse_args()
+
+seasons = args.seasons or season_range(args.start, args.end)
+n_requests = len(seasons) * len(args.measure_types) * len(args.per_modes)
+print(f"対象シーズン: {seasons[0]}〜{seasons[-1]} ({len(seasons)}), "
+      f"measure type: {args.measure_types}, per mode: {args.per_modes}, リクエスト数: {n_requests}")
+
+policy = RequestPolicy(retry_budget=args.retry_budget, timeout=args.timeout)
+start = time.perf_counter()
+frames, errors = fetch_league_stats(seasons, args.measure_types, args.per_modes, policy=policy,
+                                    max_workers=args.workers, rate=args.rate, verbose=False)
+print(f"取得完了: {len(frames)}件, 失敗 {len(errors)}件 ({time.perf_counter() - start:.1f}s)")
+for key, error in errors.items():
+    print(f"  失敗: {key}: {error}")
+policy.report()
+
+# 横持ちの表（全選手）
+wide = build_league_wide(frames, args.measure_types, args.per_modes)
+if wide.empty:
+    sys.exit("データが取得できませんでした")
+write_dataset(wide, "league_wide")
+print(f"league_wide: {len(wide)} 行 × {wide.shape[1]} 列を保存しました")
+
+# 既存の分析が読むTraditional / Advanced（1試合平均、出場試合数min_gp以上）も更新する
+written = set()
+for measure_type, name in [("Traditional", "league_traditional"), ("Advanced", "league_advanced")]:
+    parts = [df for (season, m, p), df in frames.items() if m == measure_type and p == "PerGame"]
+    if not parts:
+        continue
+    df = pd.concat(parts, ignore_index=True)
+    df = df[df["GP"] >= args.min_gp]
+    write_dataset(df, name)
+    print(f"{name}: {len(df)} 行を保存しました (GP >= {args.min_gp})")
+    written.update(df["SEASON"])
+
+# 書き込んだシーズンのロールアップを作り直す（分析・描画はこれを読む）
+if written:
+    refresh_rollups(sorted(written))
+    print(f"ロールアップを更新しました: {sorted(written)}")
@@ -1,38 +1,37 @@
-from nba_api.stats.endpoints import playergamelog
 from nba_api.stats.static import players
 import pandas as pd
-import os
+import argparse
+import sys
+sys.path.append('../')
+from utils.ingest import fetch_game_logs, STANDARD_COLUMNS
+from utils.sync import read_existing, seasons_to_sync, new_games, append_atomic
+from utils.storage import write_dataset
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--incremental", action="store_true", help="保存済みデータに無い試合だけを取得して追記する")
+args = parser.parse_args()
 
 # 八村塁のplayer_idを取得
 player_dict = players.find_players_by_full_name("Rui Hachimura")
 rui_id = player_dict[0]['id']   # 八村のIDを取得
 # 2019-20から2024-25シーズンのログをまとめて取得
 seasons = ["2019-20", "2020-21", "2021-22", "2022-23", "2023-24","2024-25"]
+# 差分モードでは保存済みの終了シーズンを取得しない
+existing_df = read_existing("standard_stats", [rui_id]) if args.incremental else pd.DataFrame()
+if args.incremental:
+    seasons = seasons_to_sync(existing_df, seasons)
+    print(f"差分取得対象シーズン: {seasons}")
 
-all_games = []
-for season in seasons:
-    gamelog = playergamelog.PlayerGameLog(player_id=rui_id, season=season)
-    df = gamelog.get_data_frames()[0]
-    df["SEASON"] = season
-    all_games.append(df)
-
-# 結合
-games_df = pd.concat(all_games, ignore_index=True)
+games_df = fetch_game_logs([rui_id], seasons)
+# 差分モードでは保存済みの最新試合より後の試合だけ残す
+games_df = new_games(games_df, existing_df)
 # 必要な列だけ抽出（例：日付、対戦チーム、得点、リバウンド、アシスト、出場時間など）
-games_df = games_df[[
-    "SEASON", "GAME_DATE", "MATCHUP", "WL", "MIN", "PTS",  # シーズン、試合日、対戦カード、勝敗、出場時間、得点
-    "FGM", "FGA", "FG_PCT",  # フィールドゴール成功数、試投数、成功率
-    "FG3M", "FG3A", "FG3_PCT",  # 3ポイント成功数、試投数、成功率
-    "FTM", "FTA", "FT_PCT",  # フリースロー成功数、試投数、成功率
-    "OREB", "DREB", "REB",  # オフェンスリバウンド、ディフェンスリバウンド、総リバウンド
-    "AST", "STL", "BLK", "TOV", "PF",  # アシスト、スティール、ブロック、ターンオーバー、ファウル
-    "PLUS_MINUS"  # プラスマイナス
-]]
-# 出力ディレクトリ作成
-output_dir = "../outputs/csv"
-os.makedirs(output_dir, exist_ok=True)
-# CSVに保存
-games_df.to_csv(f"{output_dir}/rui_hachimura_standard_stats_2019_2025.csv", index=False)
-
-print("取得データ件数:", len(games_df))
-print(games_df.head())
\ No newline at end of file
+games_df = games_df[["PLAYER_ID", "GAME_ID"] + STANDARD_COLUMNS]
+# シーズン×選手でパーティション分割したParquetに保存（差分モードは変更のあったパーティションだけ置き換え）
+if args.incremental:
+    append_atomic(games_df, existing_df, "standard_stats")
+    print("追加試合数:", len(games_df))
+else:
+    write_dataset(games_df, "standard_stats")
+    print("取得データ件数:", len(games_df))
+print(games_df.head())
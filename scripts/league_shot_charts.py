@@ -0,0 +1,140 @@
+import argparse
+import os
+import re
+import sys
+import pandas as pd
+from nba_api.stats.endpoints import shotchartdetail
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import CSV_DIR, PLOT_DIR
+from utils.instrumentation import instrument, stage
+from utils.cache import cached_frames
+from utils.fetcher import fetch_all
+from utils.render import FigureSpec, render_all
+from utils.shot_zones import HEX_SIZE, shot_cube, rollup
+from scripts.shot_chart import periods, plot_shot_chart
+
+# リーグ全選手のショットチャートと2P/3P成功率を期間ごとにまとめて作る
+# APIはシーズンごとに1回（player_id=0でリーグ全体）だけ呼び、選手ごとの分割はメモリ上で行う
+# 例: python league_shot_charts.py --min-attempts 200 --players 1629060 2544
+
+# 集約に使う列だけを残してメモリを抑える
+SHOT_COLUMNS = ["PLAYER_ID", "PLAYER_NAME", "LOC_X", "LOC_Y", "SHOT_TYPE", "SHOT_MADE_FLAG"]
+SHOT_TYPES = {"2PT Field Goal": "2P", "3PT Field Goal": "3P"}
+
+
+def fetch_league_season(season):
+    # 1シーズン分のリーグ全体のショット（team_id=0, player_id=0）
+    shots = cached_frames(
+        shotchartdetail.ShotChartDetail,
+        team_id=0,
+        player_id=0,
+        season_nullable=season,
+        season_type_all_star='Regular Season',
+        context_measure_simple='FGA'
+    )[0]
+    shots = shots[SHOT_COLUMNS].copy()
+    shots['SEASON'] = season
+    return shots
+
+
+def load_data(seasons=None):
+    """
+    全シーズンのショットを取得し、選手×シーズン×六角形セル×ゾーン×SHOT_TYPEのキューブに1回で集約する
+    戻り値: (キューブ, PLAYER_ID → 選手名)
+    """
+    seasons = seasons or sorted({season for period in periods.values() for season in period})
+    print(f"取得中: {len(seasons)}シーズン（リーグ全体）")
+    frames, _ = fetch_all(seasons, fetch_league_season)
+    frames = [frames[season] for season in seasons if season in frames and not frames[season].empty]
+    if not frames:
+        return None, {}
+    shots = pd.concat(frames, ignore_index=True)
+    names = shots.drop_duplicates("PLAYER_ID", keep="last").set_index("PLAYER_ID")["PLAYER_NAME"].to_dict()
+    cube = shot_cube(shots, by=["PLAYER_ID", "SEASON"])
+    print(f"ショット数: {len(shots)}, 選手数: {len(names)}, キューブの行数: {len(cube)}")
+    return cube, names
+
+
+def shooting_stats(cube, names):
+    """
+    選手×期間ごとの2P/3P成功率（期間合計とシーズン別）
+    SEASONが "ALL" の行が期間合計
+    """
+    tables = []
+    for period_name, seasons in periods.items():
+        period_cube = cube[cube["SEASON"].isin(seasons)]
+        by_season = rollup(period_cube, ["PLAYER_ID", "SEASON", "SHOT_TYPE"])
+        total = rollup(period_cube, ["PLAYER_ID", "SHOT_TYPE"]).assign(SEASON="ALL")
+        tables.append(pd.concat([total, by_season], ignore_index=True).assign(PERIOD=period_name))
+    stats = pd.concat(tables, ignore_index=True)
+    stats["SHOT_TYPE"] = stats["SHOT_TYPE"].map(SHOT_TYPES)
+    # SHOT_TYPEを列に展開して 2P_FGA, 2P_FGM, 2P_FG_PCT, 3P_... の形にする
+    wide = stats.pivot_table(index=["PLAYER_ID", "PERIOD", "SEASON"], columns="SHOT_TYPE",
+                             values=["FGA", "FGM", "FG_PCT"])
+    wide.columns = [f"{shot_type}_{value}" for value, shot_type in wide.columns]
+    columns = [f"{shot_type}_{value}" for shot_type in SHOT_TYPES.values() for value in ["FGA", "FGM", "FG_PCT"]]
+    wide = wide.reindex(columns=columns).reset_index()
+    wide.insert(1, "PLAYER_NAME", wide["PLAYER_ID"].map(names))
+    return wide
+
+
+def _slug(name):
+    return re.sub(r"[^0-9a-z]+", "_", str(name).lower()).strip("_")
+
+
+def figure_specs(cube, names, plot_dir=PLOT_DIR / "league_shot_charts", min_attempts=100, players=None, dpi=150):
+    """
+    期間内の試投数がmin_attempts以上の選手について、選手×期間ごとのショットチャートを作る
+    キューブは選手ごとに1回だけ分割し、各図には該当選手・期間の行だけを渡す
+    """
+    if players is not None:
+        cube = cube[cube["PLAYER_ID"].isin(players)]
+    specs = []
+    for player, player_cube in cube.groupby("PLAYER_ID", sort=True):
+        for period_name, seasons in periods.items():
+            period_cube = player_cube[player_cube["SEASON"].isin(seasons)].reset_index(drop=True)
+            if period_cube["FGA"].sum() < min_attempts:
+                continue
+            period_cube.attrs["hex_size"] = cube.attrs.get("hex_size", HEX_SIZE)
+            name = names.get(player, str(player))
+            filename = f"{player}_{_slug(name)}_{seasons[0].replace('-', '_')}_{seasons[-1].replace('-', '_')}.png"
+            specs.append(FigureSpec(plot_shot_chart, period_cube, plot_dir / filename,
+                                    seasons=seasons, player_name=name, raster=True, dpi=dpi))
+    return specs
+
+
+def plot(cube, names, plot_dir=PLOT_DIR / "league_shot_charts", **kwargs):
+    os.makedirs(plot_dir, exist_ok=True)
+    specs = figure_specs(cube, names, plot_dir, **kwargs)
+    render_all(specs, verbose=False)
+    print(f"ショットチャート: {len(specs)} 枚 → {plot_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", nargs="+", type=int, help="描画する選手のPLAYER_ID（省略時は全選手）")
+    parser.add_argument("--min-attempts", type=int, default=100, help="期間内の最小試投数")
+    parser.add_argument("--dpi", type=int, default=150)
+    args = parser.parse_args()
+
+    with stage("fetch_and_aggregate"):
+        cube, names = load_data()
+    if cube is None:
+        print("ショットデータが取得できませんでした。")
+        return
+
+    os.makedirs(CSV_DIR, exist_ok=True)
+    with stage("stats"):
+        stats = shooting_stats(cube, names)
+    path = CSV_DIR / "league_shooting_stats.csv"
+    stats.to_csv(path, index=False)
+    print(f"2P/3P成功率: {len(stats)} 行を保存しました → {path}")
+
+    with stage("render"):
+        plot(cube, names, min_attempts=args.min_attempts, players=args.players, dpi=args.dpi)
+    instrument.summary()
+    instrument.write_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import matplotlib.pyplot as plt
+from sklearn.decomposition import PCA
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import CSV_DIR, PLOT_DIR
+from utils.storage import RUI_HACHIMURA_ID
+from utils.render import FigureSpec, render_all
+from utils.clustering import FEATURES, METHODS, cluster_players, load_league_features, merge_league_tables, standardize
+
+# TraditionalとAdvancedのリーグ全選手スタッツを結合し、選手をクラスタリングする
+# 例: python player_clustering.py --seasons 2023-24 2024-25 --method gmm --k-max 12
+
+
+def load_data(seasons=None):
+    return load_league_features(seasons)
+
+
+def analyze(traditional, advanced=None, method="auto", k=None, k_values=range(2, 11)):
+    # パイプラインからはTraditional・Advancedの2表を、スクリプトからは結合済みの表を受け取る
+    df = traditional if advanced is None else merge_league_tables(traditional, advanced)
+    labeled, scores, profile = cluster_players(df, FEATURES, method, k, k_values)
+    print("\nkごとのスコア:")
+    print(scores.to_string(index=False))
+    print("\nクラスタごとの平均:")
+    print(profile.round(3).to_string())
+    # 描画用に主成分の2次元座標を付けておく
+    coords = PCA(n_components=2, random_state=0).fit_transform(standardize(labeled))
+    labeled = labeled.assign(PC1=coords[:, 0], PC2=coords[:, 1])
+    return {"players": labeled, "scores": scores, "profile": profile}
+
+
+def plot_clusters(result, path):
+    players, scores = result["players"], result["scores"]
+    fig, (ax_scatter, ax_score) = plt.subplots(1, 2, figsize=(18, 8), gridspec_kw={"width_ratios": [2, 1]})
+    scatter = ax_scatter.scatter(players["PC1"], players["PC2"], c=players["Cluster"], cmap="tab10",
+                                 alpha=0.75, s=40, edgecolor="white", linewidth=0.5)
+    ax_scatter.legend(*scatter.legend_elements(), title="Cluster", bbox_to_anchor=(1.02, 1), loc="upper left")
+    # 八村を強調
+    rui = players[players["PLAYER_ID"] == RUI_HACHIMURA_ID]
+    if not rui.empty:
+        ax_scatter.scatter(rui["PC1"], rui["PC2"], s=250, color="gold", edgecolor="black", zorder=5)
+        for _, row in rui.iterrows():
+            ax_scatter.annotate(f"Rui Hachimura ({row['SEASON']})", (row["PC1"], row["PC2"]),
+                                xytext=(8, 8), textcoords="offset points", fontsize=10)
+    ax_scatter.set_xlabel("PC1")
+    ax_scatter.set_ylabel("PC2")
+    ax_scatter.set_title("NBA Player Clusters (PCA projection)", fontsize=14, weight="bold")
+    ax_scatter.grid(alpha=0.3)
+
+    # kごとのモデル選択の指標（GMMはBIC、k-means系はシルエット係数）
+    metric = "bic" if scores["bic"].notna().all() else "silhouette"
+    ax_score.plot(scores["k"], scores[metric], marker="o")
+    ax_score.set_xlabel("k")
+    ax_score.set_ylabel(metric)
+    ax_score.set_title(f"Model selection ({metric})", fontsize=14, weight="bold")
+    ax_score.grid(alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path, bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+def figure_specs(result, plot_dir=PLOT_DIR):
+    return [FigureSpec(plot_clusters, result, f"{plot_dir}/nba_player_clusters.png")]
+
+
+def save(result, csv_dir=CSV_DIR):
+    os.makedirs(csv_dir, exist_ok=True)
+    path = csv_dir / "player_clusters.csv"
+    result["players"].to_csv(path, index=False)
+    print(f"\nクラスタ: {len(result['players'])} 行を保存しました → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", nargs="+", help="対象シーズン（省略時は全シーズン）")
+    parser.add_argument("--method", choices=METHODS + ("auto",), default="auto")
+    parser.add_argument("--k", type=int, help="クラスタ数（省略時はk-minからk-maxの中で自動選択）")
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=10)
+    args = parser.parse_args()
+
+    result = analyze(load_data(args.seasons), method=args.method, k=args.k,
+                     k_values=range(args.k_min, args.k_max + 1))
+    save(result)
+    render_all(figure_specs(result))
+    print(f"\n出力完了: {PLOT_DIR}/nba_player_clusters.png")
+
+
+if __name__ == "__main__":
+    main()
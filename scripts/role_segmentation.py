@@ -1,34 +1,19 @@
+import argparse
 import os
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import PLOT_DIR
+from utils.storage import read_dataset, RUI_HACHIMURA_ID
+from utils.render import FigureSpec, render_all
+from utils.roles import assign_roles
+from utils.aggregates import Rollups, subset_name
 
-# データ読み込み
-df = pd.read_csv("../outputs/csv/nba_players_advanced_2024_2025_30games_clustering.csv")
-df_subset = df[["PLAYER_ID", "PLAYER_NAME", "TS_PCT", "USG_PCT"]].dropna().copy()
-# USGを%に変換
-if df_subset["USG_PCT"].max() <= 1:
-    df_subset["USG_PCT"] = df_subset["USG_PCT"] * 100
-# TSを%に変換
-if df_subset["TS_PCT"].max() <= 1:
-    df_subset["TS_PCT"] = df_subset["TS_PCT"] * 100
-# 分割
-low_usg = df_subset[df_subset["USG_PCT"] < 20].copy()
-high_usg = df_subset[df_subset["USG_PCT"] >= 20].copy()
-# 低USGクラスタ分割
-if len(low_usg) > 0:
-    q1 = low_usg["TS_PCT"].quantile(0.33)
-    q2 = low_usg["TS_PCT"].quantile(0.66)
-    low_usg.loc[low_usg["TS_PCT"] < q1, "Cluster"] = 0
-    low_usg.loc[(low_usg["TS_PCT"] >= q1) & (low_usg["TS_PCT"] < q2), "Cluster"] = 1
-    low_usg.loc[low_usg["TS_PCT"] >= q2, "Cluster"] = 2
-
-# 高USGは一律Cluster=3
-if len(high_usg) > 0:
-    high_usg["Cluster"] = 3
-# 明示的に型を揃えて結合
-low_usg["Cluster"] = low_usg["Cluster"].astype(int)
-high_usg["Cluster"] = high_usg["Cluster"].astype(int)
-df_subset = pd.concat([low_usg, high_usg], ignore_index=True)
+# 対象シーズン
+target_season = "2024-25"
+# 高USGとみなす使用率（%）
+USG_THRESHOLD = 20
 # ラベル定義
 cluster_labels = {
     0: "Low USG / Low Efficiency",
@@ -44,35 +29,104 @@ cluster_colors = {
     3: "red",
 }
 
-# ラベル追加
-df_subset["Player_Role"] = df_subset["Cluster"].map(cluster_labels)
-# プロット
-plt.figure(figsize=(12, 8))
-for i in range(4):
-    cluster_data = df_subset[df_subset["Cluster"] == i]
-    plt.scatter(
-        cluster_data["USG_PCT"], cluster_data["TS_PCT"],
-        c=cluster_colors[i], label=cluster_labels[i],
-        alpha=0.75, s=70, edgecolor="white", linewidth=0.5
+
+def load_data(seasons=(target_season,)):
+    return read_dataset(
+        "league_advanced",
+        columns=["SEASON", "PLAYER_ID", "PLAYER_NAME", "TEAM_ABBREVIATION", "TS_PCT", "USG_PCT"],
+        filters={"SEASON": list(seasons)},
+    )
+
+
+def quantile_edges(rollups, seasons, usg_threshold, scale):
+    # 集計済みの低USG選手のTS分位点（対象シーズンが揃っていなければNoneを返し、その場で計算する）
+    if rollups is None or not all(rollups.has(season, "TS_PCT", subset=subset_name(usg_threshold))
+                                  for season in seasons):
+        return None
+    edges = rollups.quantiles("TS_PCT", (0.33, 0.66), subset=subset_name(usg_threshold))
+    return edges.loc[list(seasons)] * scale
+
+
+def analyze(df, seasons=(target_season,), usg_threshold=USG_THRESHOLD, rollups=None):
+    # 複数シーズンをまとめて受け取り、TSの分位点はシーズンごとに計算する（ロールアップがあればそれを使う）
+    df = df[df["SEASON"].isin(seasons)]
+    columns = ["SEASON", "PLAYER_ID", "PLAYER_NAME", "TEAM_ABBREVIATION", "TS_PCT", "USG_PCT"]
+    df_subset = df[[col for col in columns if col in df.columns]].dropna(
+        subset=["PLAYER_ID", "PLAYER_NAME", "TS_PCT", "USG_PCT"]
     )
+    # USGを%に変換
+    if df_subset["USG_PCT"].max() <= 1:
+        df_subset["USG_PCT"] = df_subset["USG_PCT"] * 100
+    # TSを%に変換
+    ts_scale = 100 if df_subset["TS_PCT"].max() <= 1 else 1
+    df_subset["TS_PCT"] = df_subset["TS_PCT"] * ts_scale
+    # 低USGはTSの33%・66%分位点で3分割、高USGは一律Cluster=3
+    edges = quantile_edges(rollups, sorted(df_subset["SEASON"].unique()), usg_threshold, ts_scale)
+    df_subset["Cluster"] = assign_roles(df_subset, by="SEASON", usg_threshold=usg_threshold, edges=edges)
+    # ラベル追加
+    df_subset["Player_Role"] = df_subset["Cluster"].map(cluster_labels)
+    return df_subset
 
-# USG 20%の境界線
-plt.axvline(x=20, color='gray', linestyle='--', alpha=0.6, label="Usage Rate 20%")
-# 八村を強調
-rui = df_subset[df_subset["PLAYER_ID"] == 1629060]
-if not rui.empty:
+
+def plot_roles(df_subset, path, season=target_season, usg_threshold=USG_THRESHOLD):
+    df_subset = df_subset[df_subset["SEASON"] == season]
+    # プロット（クラスタ順に並べて1回で描画する。凡例は各クラスタの空の散布図から作る）
+    plt.figure(figsize=(12, 8))
+    order = np.argsort(df_subset["Cluster"].to_numpy(), kind="stable")
+    clusters = df_subset["Cluster"].to_numpy()[order]
     plt.scatter(
-        rui["USG_PCT"], rui["TS_PCT"],
-        s=250, color="gold", edgecolor="black", zorder=5, label="Rui Hachimura"
+        df_subset["USG_PCT"].to_numpy()[order], df_subset["TS_PCT"].to_numpy()[order],
+        c=[cluster_colors[i] for i in clusters],
+        alpha=0.75, s=70, edgecolor="white", linewidth=0.5
     )
+    for i in range(4):
+        plt.scatter([], [], c=cluster_colors[i], label=cluster_labels[i],
+                    alpha=0.75, s=70, edgecolor="white", linewidth=0.5)
+
+    # USGの境界線
+    plt.axvline(x=usg_threshold, color='gray', linestyle='--', alpha=0.6, label=f"Usage Rate {usg_threshold:g}%")
+    # 八村を強調
+    rui = df_subset[df_subset["PLAYER_ID"] == RUI_HACHIMURA_ID]
+    if not rui.empty:
+        plt.scatter(
+            rui["USG_PCT"], rui["TS_PCT"],
+            s=250, color="gold", edgecolor="black", zorder=5, label="Rui Hachimura"
+        )
+
+    plt.xlabel("Usage Rate (%)", fontsize=12)
+    plt.ylabel("True Shooting (%)", fontsize=12)
+    plt.title("NBA Players Role Segmentation", fontsize=14, weight="bold")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(alpha=0.3)
+
+    plt.savefig(path, bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+def figure_specs(df_subset, plot_dir=PLOT_DIR, usg_threshold=USG_THRESHOLD):
+    # シーズンごとに1枚（対象シーズンは従来のファイル名、それ以外はシーズン付きのファイル名）
+    specs = []
+    for season in sorted(df_subset["SEASON"].unique()):
+        suffix = "" if season == target_season else f"_{season.replace('-', '_')}"
+        specs.append(FigureSpec(plot_roles, df_subset, f"{plot_dir}/nba_role_segmentation{suffix}.png",
+                                season=season, usg_threshold=usg_threshold))
+    return specs
+
+
+def plot(df_subset, plot_dir=PLOT_DIR, usg_threshold=USG_THRESHOLD):
+    # 描画した図だけ表示する（前回と同じでスキップした図は除く）
+    for path in render_all(figure_specs(df_subset, plot_dir, usg_threshold)):
+        print(f"\n出力完了: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", nargs="+", default=[target_season])
+    parser.add_argument("--usg-threshold", type=float, default=USG_THRESHOLD, help="高USGとみなすUSG%%")
+    args = parser.parse_args()
+    df_subset = analyze(load_data(args.seasons), args.seasons, args.usg_threshold, Rollups.load(args.seasons))
+    plot(df_subset, usg_threshold=args.usg_threshold)
 
-plt.xlabel("Usage Rate (%)", fontsize=12)
-plt.ylabel("True Shooting (%)", fontsize=12)
-plt.title("NBA Players Role Segmentation", fontsize=14, weight="bold")
-plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.grid(alpha=0.3)
 
-plot_dir = "../outputs/plots"
-os.makedirs(plot_dir, exist_ok=True)
-plt.savefig(f"{plot_dir}/nba_role_segmentation.png", bbox_inches="tight", dpi=300)
-print(f"\n出力完了: {plot_dir}/nba_role_segmentation.png")
+if __name__ == "__main__":
+    main()
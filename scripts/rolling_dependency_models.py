@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import time
+import matplotlib.pyplot as plt
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import CSV_DIR, PLOT_DIR
+from utils.storage import read_dataset, RUI_HACHIMURA_ID
+from utils.features import add_derived_features
+from utils.render import FigureSpec, render_all
+from utils.rolling import coefficient_drift, rolling_ols
+from scripts import standard_stats_minutes_dependency as minutes_model
+from scripts import standard_stats_scoring_dependency as scoring_model
+
+# 得点・出場時間の依存モデルを試合日順の直近N試合（または初戦からの累積）で当てはめ直し、係数の推移を追う
+# 例: python rolling_dependency_models.py --model scoring --window 20
+#     python rolling_dependency_models.py --model minutes --expanding --league
+
+MODELS = {
+    "scoring": ("PTS", scoring_model.features),
+    "minutes": ("MIN", minutes_model.features),
+}
+COLUMNS = ["PLAYER_ID", "SEASON", "GAME_DATE", "PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FG3_PCT",
+           "FTA", "FT_PCT", "OREB", "DREB", "AST"]
+
+
+def load_data(seasons, league=False):
+    filters = {"SEASON": seasons}
+    if not league:
+        filters["PLAYER_ID"] = RUI_HACHIMURA_ID
+    return add_derived_features(read_dataset("standard_stats", columns=COLUMNS, filters=filters))
+
+
+def plot_drift(df, path, features, title):
+    # 1選手の係数の推移（変数ごとに1本の線）
+    fig, ax = plt.subplots(figsize=(14, 7))
+    for feature in features:
+        ax.plot(df["GAME_DATE"], df[feature], label=feature, linewidth=1.5)
+    ax.axhline(0, color="gray", linewidth=0.8)
+    ax.set_xlabel("GAME_DATE")
+    ax.set_ylabel("Standardized coefficient")
+    ax.set_title(title, fontsize=14, weight="bold")
+    ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left")
+    ax.grid(alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, bbox_inches="tight", dpi=300)
+    plt.close()
+
+
+def figure_specs(rolled, model, label, plot_dir=PLOT_DIR):
+    rui = rolled[rolled["PLAYER_ID"] == RUI_HACHIMURA_ID].dropna(subset=["const"])
+    if rui.empty:
+        return []
+    features = list(MODELS[model][1])
+    title = f"Rui Hachimura {model} model coefficients ({label})"
+    return [FigureSpec(plot_drift, rui, f"{plot_dir}/rui_hachimura_{model}_rolling_{label}.png",
+                       features=features, title=title)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=list(MODELS), default="scoring")
+    parser.add_argument("--seasons", nargs="+", default=scoring_model.target_seasons)
+    parser.add_argument("--league", action="store_true", help="保存済みの全選手を対象にする")
+    parser.add_argument("--window", type=int, default=20, help="窓の試合数")
+    parser.add_argument("--expanding", action="store_true", help="初戦からの全試合で当てはめる")
+    parser.add_argument("--min-periods", type=int, help="係数を出す最小試合数")
+    args = parser.parse_args()
+
+    target, features = MODELS[args.model]
+    df = load_data(args.seasons, args.league)
+    df = df.fillna({col: 0 for col in features})
+    label = "expanding" if args.expanding else f"{args.window}g"
+    print(f"モデル: {args.model}, 窓: {label}, 選手数: {df['PLAYER_ID'].nunique()}, 試合数: {len(df)}")
+
+    start = time.perf_counter()
+    rolled = rolling_ols(df, target, features, window=args.window, expanding=args.expanding,
+                         min_periods=args.min_periods)
+    drift = coefficient_drift(rolled, features)
+    print(f"計算時間: {time.perf_counter() - start:.2f}s（{rolled['const'].notna().sum()} 窓）\n")
+    print(drift[drift["PLAYER_ID"] == RUI_HACHIMURA_ID].round(3).to_string(index=False))
+
+    os.makedirs(CSV_DIR, exist_ok=True)
+    scope = "league" if args.league else "rui_hachimura"
+    for name, frame in [("rolling", rolled), ("drift", drift)]:
+        path = CSV_DIR / f"{scope}_{args.model}_{name}_{label}.csv"
+        frame.to_csv(path, index=False)
+        print(f"保存しました → {path}")
+    render_all(figure_specs(rolled, args.model, label))
+
+
+if __name__ == "__main__":
+    main()
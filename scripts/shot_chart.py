@@ -1,12 +1,15 @@
 import matplotlib.pyplot as plt
 import pandas as pd
-import json
 from nba_api.stats.endpoints import shotchartdetail
 import numpy as np
 import os
 import sys
-sys.path.append('../')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import PLOT_DIR
 from utils.drawcount import draw_court
+from utils.cache import cached_frames, cache_path
+from utils.render import FigureSpec, render_all
+from utils.shot_zones import shot_cube, rollup, hex_summary
 
 # 八村塁のプレイヤーID
 player_id = '1629060'  # Rui Hachimura
@@ -16,85 +19,123 @@ periods = {
     'recent': ['2022-23', '2023-24', '2024-25']
 }
 
-for period_name, seasons in periods.items():
-    print(f"\n=== {period_name.upper()} PERIOD ({seasons[0]} to {seasons[-1]}) ===")
+
+def shot_params(season):
+    # ShotChartDetailのパラメータ（取得とキャッシュファイルの特定で共有する）
+    return dict(team_id=0, player_id=player_id, season_nullable=season,
+                season_type_all_star='Regular Season', context_measure_simple='FGA')
+
+
+def cache_paths():
+    # load_dataが読むキャッシュファイル（パイプラインの入力。取得できたシーズンが増えると再実行される）
+    return [cache_path(shotchartdetail.ShotChartDetail, **shot_params(season))
+            for seasons in periods.values() for season in seasons]
+
+
+def plot_filename(seasons):
+    # ファイル名を期間に応じて設定
+    return f"rui_hachimura_shot_chart_{seasons[0].replace('-', '_')}_{seasons[-1].replace('-', '_')}.png"
+
+
+def plot_files():
+    return [plot_filename(seasons) for seasons in periods.values()]
+
+
+def fetch_period(seasons):
     # 全シーズンのデータを格納するリスト
     all_shot_data = []
     # 各シーズンのショットチャートデータを取得
     for season in seasons:
         print(f"取得中: {season}シーズン")
         try:
-            shot_chart = shotchartdetail.ShotChartDetail(
-                team_id=0,
-                player_id=player_id,
-                season_nullable=season,
-                season_type_all_star='Regular Season',
-                context_measure_simple='FGA'
-            )
-            
-            shot_chart_df = shot_chart.get_data_frames()[0]
+            shot_chart_df = cached_frames(shotchartdetail.ShotChartDetail, **shot_params(season))[0]
             shot_chart_df['SEASON'] = season  # シーズン情報を追加
             all_shot_data.append(shot_chart_df)
         except Exception as e:
             print(f"エラー: {season}シーズンのデータ取得に失敗 - {e}")
             continue
-    # データが取得できた場合のみ処理を続行
     if not all_shot_data:
-        print(f"{period_name}期間のデータが取得できませんでした。")
-        continue
+        return None
     # 全データを結合
-    combined_shot_df = pd.concat(all_shot_data, ignore_index=True)
-    # ショット成功/失敗を分ける
-    made = combined_shot_df[combined_shot_df.SHOT_MADE_FLAG == 1]
-    miss = combined_shot_df[combined_shot_df.SHOT_MADE_FLAG == 0]
-    # 2P/3P成功率を計算（全シーズン合計）
-    df_2pfg = combined_shot_df[combined_shot_df.SHOT_TYPE == "2PT Field Goal"]
-    df_2pfg_made = df_2pfg[df_2pfg.SHOT_MADE_FLAG == 1]
-    df_3pfg = combined_shot_df[combined_shot_df.SHOT_TYPE == "3PT Field Goal"]
-    df_3pfg_made = df_3pfg[df_3pfg.SHOT_MADE_FLAG == 1]
+    return pd.concat(all_shot_data, ignore_index=True)
+
+
+def print_shooting_stats(cube, seasons):
+    # 2P/3P成功率（全シーズン合計とシーズン別）は集約済みのキューブから求める
+    by_type = rollup(cube, ["SHOT_TYPE"]).set_index("SHOT_TYPE")
+    by_season = rollup(cube, ["SEASON", "SHOT_TYPE"]).set_index(["SEASON", "SHOT_TYPE"])
+
+    def print_fg_pct(stats):
+        for label, shot_type in [("2PFG%", "2PT Field Goal"), ("3PFG%", "3PT Field Goal")]:
+            if shot_type in stats.index and stats.loc[shot_type, "FGA"] > 0:
+                print(f"{label}     " + str(round(stats.loc[shot_type, "FG_PCT"] * 100, 3)) + "%")
 
     print(f"\n全シーズン合計統計:")
-    if len(df_2pfg) > 0:
-        print("2PFG%     " + str(round(len(df_2pfg_made)/len(df_2pfg)*100, 3)) + "%")
-    if len(df_3pfg) > 0:
-        print("3PFG%     " + str(round(len(df_3pfg_made)/len(df_3pfg)*100, 3)) + "%")
+    print_fg_pct(by_type)
 
     # シーズン別統計も表示
     for season in seasons:
-        season_data = combined_shot_df[combined_shot_df.SEASON == season]
-        if len(season_data) > 0:
-            season_2pfg = season_data[season_data.SHOT_TYPE == "2PT Field Goal"]
-            season_2pfg_made = season_2pfg[season_2pfg.SHOT_MADE_FLAG == 1]
-            season_3pfg = season_data[season_data.SHOT_TYPE == "3PT Field Goal"]
-            season_3pfg_made = season_3pfg[season_3pfg.SHOT_MADE_FLAG == 1]
-            
+        if season in by_season.index.get_level_values("SEASON"):
             print(f"\n{season}シーズン:")
-            if len(season_2pfg) > 0:
-                print("2PFG%     " + str(round(len(season_2pfg_made)/len(season_2pfg)*100, 3)) + "%")
-            if len(season_3pfg) > 0:
-                print("3PFG%     " + str(round(len(season_3pfg_made)/len(season_3pfg)*100, 3)) + "%")
+            print_fg_pct(by_season.loc[season])
 
-    # プロット作成
+
+def plot_shot_chart(cube, path, seasons, player_name="Rui Hachimura", raster=False, dpi=300):
+    # 六角形セルごとに集約した試投数（マーカーの大きさ）とFG%（色）で描画する
+    # 大量に描画するときは raster=True でキャッシュ済みのコート画像を使う
+    hexes = hex_summary(cube, by=[])
     plt.figure(figsize=(12, 11))
-    plt.scatter(made.LOC_X, made.LOC_Y, c="green", alpha=0.7, s=50, label='Made')
-    plt.scatter(miss.LOC_X, miss.LOC_Y, c="red", alpha=0.7, s=50, label='Miss')
+    sizes = 400 * hexes["FGA"] / hexes["FGA"].max()
+    plt.scatter(hexes["X"], hexes["Y"], s=sizes, c=hexes["FG_PCT"], cmap="RdYlGn",
+                vmin=0, vmax=1, marker="h", edgecolor="gray", linewidth=0.3)
+    plt.colorbar(label="FG%", shrink=0.7)
     # コートを描画
-    draw_court(outer_lines=True)
+    draw_court(outer_lines=True, raster=raster, dpi=dpi)
     # 軸の設定
     plt.xlim(-250, 250)
     plt.ylim(422.5, -47.5)
     # タイトルを期間に応じて設定
-    title_text = f'Rui Hachimura Shot Chart - {seasons[0]} to {seasons[-1]}'
+    title_text = f'{player_name} Shot Chart - {seasons[0]} to {seasons[-1]}'
     plt.title(title_text, fontsize=16, weight='bold')
-    plt.legend()
-    # 出力ディレクトリ作成
-    plot_dir = "../outputs/plots"
-    os.makedirs(plot_dir, exist_ok=True)
-    # ファイル名を期間に応じて設定
-    filename = f"rui_hachimura_shot_chart_{seasons[0].replace('-', '_')}_{seasons[-1].replace('-', '_')}.png"
     # 保存
-    plt.savefig(f"{plot_dir}/{filename}", 
-                bbox_inches="tight", dpi=300)
-    print(f"\n出力完了: {plot_dir}/{filename}")
-    
+    plt.savefig(path, bbox_inches="tight", dpi=dpi)
     plt.close()  # メモリ節約のためプロットを閉じる
+
+
+def load_data():
+    # 期間ごとのショットの集約結果（取得できなかった期間は含めない）
+    data = {}
+    for period_name, seasons in periods.items():
+        print(f"\n=== {period_name.upper()} PERIOD ({seasons[0]} to {seasons[-1]}) ===")
+        combined_shot_df = fetch_period(seasons)
+        # データが取得できた場合のみ処理を続行
+        if combined_shot_df is None:
+            print(f"{period_name}期間のデータが取得できませんでした。")
+            continue
+        # ショット単位のデータは1回だけ走査し、以降は集約結果を使う
+        cube = shot_cube(combined_shot_df)
+        print_shooting_stats(cube, seasons)
+        data[period_name] = cube
+    return data
+
+
+def figure_specs(data, plot_dir=PLOT_DIR):
+    specs = []
+    for period_name, cube in data.items():
+        seasons = periods[period_name]
+        specs.append(FigureSpec(plot_shot_chart, cube, f"{plot_dir}/{plot_filename(seasons)}", seasons=seasons))
+    return specs
+
+
+def plot(data, plot_dir=PLOT_DIR):
+    # 描画した図だけ表示する（前回と同じでスキップした図は除く）
+    for path in render_all(figure_specs(data, plot_dir)):
+        print(f"\n出力完了: {path}")
+
+
+def main():
+    plot(load_data())
+
+
+if __name__ == "__main__":
+    main()
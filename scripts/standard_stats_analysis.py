@@ -5,19 +5,29 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import PLOT_DIR
+from utils.storage import read_dataset, RUI_HACHIMURA_ID
+from utils.features import add_derived_features
+from utils.render import FigureSpec, render_all
 
-# 出力先ディレクトリ
-output_dir = "../outputs/plots"
-os.makedirs(output_dir, exist_ok=True)
-
-input_path = "../outputs/csv/rui_hachimura_standard_stats_2019_2025.csv"
-df = pd.read_csv(input_path)
 target_seasons = ["2022-23", "2023-24", "2024-25"]
-df = df[df["SEASON"].isin(target_seasons)].copy()
+scoring_features = ["MIN", "FG2A", "FG2_PCT", "FG3A", "FG3_PCT", "FTA", "FT_PCT", "OREB", "TOV"]
+minutes_features = ["FG2M", "FG3M", "FTM", "OREB", "DREB", "AST", "STL", "BLK", "TOV"]
+
+
+def load_data():
+    # 対象シーズン・選手のパーティションと必要な列だけ読み込む
+    df = read_dataset(
+        "standard_stats",
+        columns=["SEASON", "PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT",
+                 "OREB", "DREB", "AST", "STL", "BLK", "TOV"],
+        filters={"SEASON": target_seasons, "PLAYER_ID": RUI_HACHIMURA_ID},
+    )
+    # 2P・効率・per36などの派生列を生成
+    return add_derived_features(df)
 
-df["FG2A"] = df["FGA"] - df["FG3A"]
-df["FG2M"] = df["FGM"] - df["FG3M"]
-df["FG2_PCT"] = df.apply(lambda x: x["FG2M"] / x["FG2A"] if x["FG2A"] > 0 else 0, axis=1)
 
 def run_regression(X, y, label):
     scaler = StandardScaler()
@@ -61,7 +71,8 @@ def run_regression(X, y, label):
 
     return model, summary_df
 
-def plot_coef_heatmap(summary_df, title, save_path):
+
+def plot_coef_heatmap(summary_df, save_path, title):
     plt.figure(figsize=(8, len(summary_df)*0.5 + 1))
     # p値に基づいて色分けのためのマスクを作成
     data_for_heatmap = summary_df.set_index("Feature")[["Coefficient", "P_value"]]
@@ -112,18 +123,38 @@ def plot_coef_heatmap(summary_df, title, save_path):
     plt.savefig(save_path, dpi=250, bbox_inches='tight')
     plt.close()
 
-# 得点モデル
-scoring_features = ["MIN", "FG2A", "FG2_PCT", "FG3A", "FG3_PCT", "FTA", "FT_PCT", "OREB", "TOV"]
-X_scoring = df[scoring_features].fillna(0)
-y_scoring = df["PTS"]
-model_scoring, summary_scoring_df = run_regression(X_scoring, y_scoring, "scoring model")
 
-plot_coef_heatmap(summary_scoring_df, "scoring model", os.path.join(output_dir, "scoring_coef_heatmap.png"))
+def analyze(df):
+    # 得点モデル・出場時間モデルを推定する（dfは派生列生成済みのゲームログ）
+    df = df[df["SEASON"].isin(target_seasons)]
+
+    # 得点モデル
+    X_scoring = df[scoring_features].fillna(0)
+    y_scoring = df["PTS"]
+    model_scoring, summary_scoring_df = run_regression(X_scoring, y_scoring, "scoring model")
+
+    # 出場時間モデル
+    X_minutes = df[minutes_features].fillna(0)
+    y_minutes = df["MIN"]
+    model_minutes, summary_minutes_df = run_regression(X_minutes, y_minutes, "minutes model")
+
+    return {"scoring": summary_scoring_df, "minutes": summary_minutes_df}
+
+
+def figure_specs(results, output_dir=PLOT_DIR):
+    return [
+        FigureSpec(plot_coef_heatmap, results["scoring"], os.path.join(output_dir, "scoring_coef_heatmap.png"), title="scoring model"),
+        FigureSpec(plot_coef_heatmap, results["minutes"], os.path.join(output_dir, "minutes_coef_heatmap.png"), title="minutes model"),
+    ]
+
+
+def plot(results, output_dir=PLOT_DIR):
+    render_all(figure_specs(results, output_dir))
+
+
+def main():
+    plot(analyze(load_data()))
 
-# 出場時間モデル
-minutes_features = ["FG2M", "FG3M", "FTM", "OREB", "DREB", "AST", "STL", "BLK", "TOV"]
-X_minutes = df[minutes_features].fillna(0)
-y_minutes = df["MIN"]
-model_minutes, summary_minutes_df = run_regression(X_minutes, y_minutes, "minutes model")
 
-plot_coef_heatmap(summary_minutes_df, "minutes model", os.path.join(output_dir, "minutes_coef_heatmap.png"))
+if __name__ == "__main__":
+    main()
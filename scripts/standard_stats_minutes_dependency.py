@@ -5,129 +5,180 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 import scipy.stats as stats
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.paths import PLOT_DIR
+from utils.storage import read_dataset, RUI_HACHIMURA_ID
+from utils.features import add_derived_features
+from utils.render import FigureSpec, render_all
 
-# データ読み込み
-standard_df = pd.read_csv("../outputs/csv/rui_hachimura_standard_stats_2019_2025.csv")
-output_dir = "../outputs/plots"
-os.makedirs(output_dir, exist_ok=True)
 # 対象シーズン
 target_seasons = ["2022-23", "2023-24", "2024-25"]
-df = standard_df[standard_df["SEASON"].isin(target_seasons)].copy()
-# データが試合単位になっているか確認
-print("=== データ確認 ===")
-print(df["SEASON"].value_counts())
-print(df.shape)
-print(df.head())
-print("=" * 20)
-# 2P関連列を生成
-df["FG2A"] = df["FGA"] - df["FG3A"]
-df["FG2M"] = df["FGM"] - df["FG3M"]
-df["FG2_PCT"] = df.apply(lambda x: x["FG2M"] / x["FG2A"] if x["FG2A"] > 0 else 0, axis=1)
-# 特徴量と目的変数
+# 特徴量
 features = ["FG2M", "FG3M", "OREB", "DREB", "AST"]
-X = df[features].fillna(0)
-y = df["MIN"]
-# 標準化
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-# 線形回帰モデル
-model = LinearRegression()
-model.fit(X_scaled, y)
-# モデル式の出力
-intercept = model.intercept_
-coefs = model.coef_
-
-print("=== Multiple Linear Regression Equation ===")
-equation = f"MIN = {intercept:.3f}"
-for feature, coef in zip(features, coefs):
-    sign = " + " if coef >= 0 else " - "
-    equation += f"{sign}{abs(coef):.3f}×{feature}"
-print(equation)
-print("=" * 45)
-# 係数データフレーム
-coef_df = pd.DataFrame({
-    "Feature": features,
-    "Coefficient": coefs
-})
-coef_df["Abs"] = np.abs(coef_df["Coefficient"])
-coef_df = coef_df.sort_values("Abs", ascending=True)  # 可視化は下→上のため昇順
-# モデルスコア
-r2 = model.score(X_scaled, y)
-# 自由度調整済み決定係数の計算
-n = len(y)  # サンプル数
-p = len(features)  # 特徴量数
-adjusted_r2 = 1 - (1 - r2) * (n - 1) / (n - p - 1)
-
-print(coef_df)
-print(f"R²: {r2:.3f}")
-print(f"Adjusted R²: {adjusted_r2:.3f}")
-
-# モデルの妥当性確認
-y_pred = model.predict(X_scaled)
-residuals = y - y_pred
-
-plt.figure(figsize=(7,5))
-plt.scatter(y_pred, residuals, alpha=0.6)
-plt.axhline(0, color="red", linestyle="--")
-plt.xlabel("Predicted MIN")
-plt.ylabel("Residuals")
-plt.title("Residual Plot - Rui Hachimura Minutes Model")
-plt.tight_layout()
-residual_plot_path = f"{output_dir}/rui_hachimura_minutes_residual_plot.png"
-plt.savefig(residual_plot_path, dpi=300, bbox_inches="tight")
-plt.close()
-
-# QQプロット（残差の正規性確認）
-plt.figure(figsize=(7,5))
-stats.probplot(residuals, dist="norm", plot=plt)
-plt.title("Q-Q Plot - Rui Hachimura Minutes Model Residuals")
-plt.xlabel("Theoretical Quantiles")
-plt.ylabel("Sample Quantiles")
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-qq_plot_path = f"{output_dir}/rui_hachimura_minutes_qq_plot.png"
-plt.savefig(qq_plot_path, dpi=300, bbox_inches="tight")
-plt.close()
-
-# 可視化設定
-plt.figure(figsize=(9, 6))
-# 色分け（正: 赤 / 負: 青）
-colors = ["red" if c > 0 else "blue" for c in coef_df["Coefficient"]]
-
-bars = plt.barh(coef_df["Feature"], coef_df["Coefficient"], color=colors, edgecolor="black")
-# 値ラベルを右横に描画
-for bar, value in zip(bars, coef_df["Coefficient"]):
+
+
+def load_data():
+    # データ読み込み（対象シーズン・選手のパーティションと必要な列だけ）
+    df = read_dataset(
+        "standard_stats",
+        columns=["SEASON", "GAME_DATE", "MATCHUP", "MIN", "FGM", "FGA", "FG3M", "FG3A", "OREB", "DREB", "AST"],
+        filters={"SEASON": target_seasons, "PLAYER_ID": RUI_HACHIMURA_ID},
+    )
+    # 2P・効率・per36などの派生列を生成
+    return add_derived_features(df)
+
+
+def analyze(df):
+    df = df[df["SEASON"].isin(target_seasons)]
+    # データが試合単位になっているか確認
+    print("=== データ確認 ===")
+    print(df["SEASON"].value_counts()[lambda counts: counts > 0])
+    print(df.shape)
+    print(df.head())
+    print("=" * 20)
+    # 目的変数
+    X = df[features].fillna(0)
+    y = df["MIN"]
+    # 標準化
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    # 線形回帰モデル
+    model = LinearRegression()
+    model.fit(X_scaled, y)
+    # モデル式の出力
+    intercept = model.intercept_
+    coefs = model.coef_
+
+    print("=== Multiple Linear Regression Equation ===")
+    equation = f"MIN = {intercept:.3f}"
+    for feature, coef in zip(features, coefs):
+        sign = " + " if coef >= 0 else " - "
+        equation += f"{sign}{abs(coef):.3f}×{feature}"
+    print(equation)
+    print("=" * 45)
+    # 係数データフレーム
+    coef_df = pd.DataFrame({
+        "Feature": features,
+        "Coefficient": coefs
+    })
+    coef_df["Abs"] = np.abs(coef_df["Coefficient"])
+    coef_df = coef_df.sort_values("Abs", ascending=True)  # 可視化は下→上のため昇順
+    # モデルスコア
+    r2 = model.score(X_scaled, y)
+    # 自由度調整済み決定係数の計算
+    n = len(y)  # サンプル数
+    p = len(features)  # 特徴量数
+    adjusted_r2 = 1 - (1 - r2) * (n - 1) / (n - p - 1)
+
+    print(coef_df)
+    print(f"R²: {r2:.3f}")
+    print(f"Adjusted R²: {adjusted_r2:.3f}")
+
+    # モデルの妥当性確認
+    y_pred = model.predict(X_scaled)
+    residuals = y - y_pred
+
+    return {
+        "coef_df": coef_df,
+        "r2": r2,
+        "adjusted_r2": adjusted_r2,
+        "y_pred": y_pred,
+        "residuals": residuals,
+    }
+
+
+def plot_residuals(results, path):
+    # 残差プロット
+    plt.figure(figsize=(7,5))
+    plt.scatter(results["y_pred"], results["residuals"], alpha=0.6)
+    plt.axhline(0, color="red", linestyle="--")
+    plt.xlabel("Predicted MIN")
+    plt.ylabel("Residuals")
+    plt.title("Residual Plot - Rui Hachimura Minutes Model")
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close()
+
+
+def plot_qq(residuals, path):
+    # QQプロット（残差の正規性確認）
+    plt.figure(figsize=(7,5))
+    stats.probplot(residuals, dist="norm", plot=plt)
+    plt.title("Q-Q Plot - Rui Hachimura Minutes Model Residuals")
+    plt.xlabel("Theoretical Quantiles")
+    plt.ylabel("Sample Quantiles")
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close()
+
+
+def plot_coefficients(results, path):
+    coef_df = results["coef_df"]
+    r2 = results["r2"]
+    adjusted_r2 = results["adjusted_r2"]
+    # 可視化設定
+    plt.figure(figsize=(9, 6))
+    # 色分け（正: 赤 / 負: 青）
+    colors = ["red" if c > 0 else "blue" for c in coef_df["Coefficient"]]
+
+    bars = plt.barh(coef_df["Feature"], coef_df["Coefficient"], color=colors, edgecolor="black")
+    # 値ラベルを右横に描画
+    for bar, value in zip(bars, coef_df["Coefficient"]):
+        plt.text(
+            bar.get_width() + (0.05 if value > 0 else -0.05),
+            bar.get_y() + bar.get_height()/2,
+            f"{value:.2f}",
+            va="center",
+            ha="left" if value > 0 else "right",
+            fontsize=10,
+            color="black"
+        )
+
+    # 軸・タイトル整備
+    plt.axvline(0, color="black", linewidth=1)
+    plt.xlim(0, 2.5)
+    plt.title("Rui Hachimura - Minutes Dependency Model (2022–2025)", fontsize=13, fontweight="bold")
+    plt.xlabel("Coefficient", fontsize=11)
+    plt.ylabel("Feature", fontsize=11)
+    plt.grid(axis="x", linestyle="--", alpha=0.6)
     plt.text(
-        bar.get_width() + (0.05 if value > 0 else -0.05),
-        bar.get_y() + bar.get_height()/2,
-        f"{value:.2f}",
-        va="center",
-        ha="left" if value > 0 else "right",
-        fontsize=10,
+        0.95, 0.05,
+        f"$R^2$ = {r2:.3f}\nAdjusted $R^2$ = {adjusted_r2:.3f}",
+        ha="right", va="bottom",
+        transform=plt.gca().transAxes,
+        fontsize=11,
         color="black"
     )
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close()
+
+
+def figure_specs(results, output_dir=PLOT_DIR):
+    residual_data = {"y_pred": results["y_pred"], "residuals": results["residuals"]}
+    coef_data = {"coef_df": results["coef_df"], "r2": results["r2"], "adjusted_r2": results["adjusted_r2"]}
+    return [
+        FigureSpec(plot_coefficients, coef_data, f"{output_dir}/rui_hachimura_minutes_dependency_2022_2025.png"),
+        FigureSpec(plot_residuals, residual_data, f"{output_dir}/rui_hachimura_minutes_residual_plot.png"),
+        FigureSpec(plot_qq, results["residuals"], f"{output_dir}/rui_hachimura_minutes_qq_plot.png"),
+    ]
+
+
+def plot(results, output_dir=PLOT_DIR):
+    specs = figure_specs(results, output_dir)
+    render_all(specs)
+    output_path, residual_plot_path, qq_plot_path = (spec.path for spec in specs)
+
+    print(f"Saved enhanced plot to {output_path}")
+    print(f"Saved residual plot to {residual_plot_path}")
+    print(f"Saved Q-Q plot to {qq_plot_path}")
+
+
+def main():
+    plot(analyze(load_data()))
+
 
-# 軸・タイトル整備
-plt.axvline(0, color="black", linewidth=1)
-plt.xlim(0, 2.5)
-plt.title("Rui Hachimura - Minutes Dependency Model (2022–2025)", fontsize=13, fontweight="bold")
-plt.xlabel("Coefficient", fontsize=11)
-plt.ylabel("Feature", fontsize=11)
-plt.grid(axis="x", linestyle="--", alpha=0.6)
-plt.text(
-    0.95, 0.05,
-    f"$R^2$ = {r2:.3f}\nAdjusted $R^2$ = {adjusted_r2:.3f}",
-    ha="right", va="bottom",
-    transform=plt.gca().transAxes,
-    fontsize=11,
-    color="black"
-)
-plt.tight_layout()
-# 保存
-output_path = f"{output_dir}/rui_hachimura_minutes_dependency_2022_2025.png"
-plt.savefig(output_path, dpi=300, bbox_inches="tight")
-plt.close()
-
-print(f"Saved enhanced plot to {output_path}")
-print(f"Saved residual plot to {residual_plot_path}")
-print(f"Saved Q-Q plot to {qq_plot_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.instrumentation import instrument, stage
+from utils.storage import read_dataset, dataset_exists, migrate_legacy_csv
+from utils.streaming import (INBOX_DIR, STREAM_OUTPUT_DIR, DropFolderSource, StreamingState, emit, load_state,
+                             process, save_state)
+from utils.sync import append_atomic, new_games, read_existing
+from scripts import standard_stats_minutes_dependency as minutes_model
+from scripts import standard_stats_scoring_dependency as scoring_model
+
+# 受け口（outputs/inbox）に置かれた新しい試合ログを取り込み、影響を受けた選手の集計・パーセンタイル・モデルだけを更新する
+# 例: python stream_updates.py --init --seasons 2024-25   # 保存済みの試合ログから状態を作る（初回のみ）
+#     python stream_updates.py --persist                  # 新しい試合を取り込み、データセットにも追記する
+#     python stream_updates.py --watch 60                 # 60秒ごとに受け口を確認し続ける
+
+MODELS = {
+    "scoring": ("PTS", scoring_model.features),
+    "minutes": ("MIN", minutes_model.features),
+}
+
+
+def initialize(state, seasons):
+    # 保存済みの試合ログをまとめて1バッチとして取り込む
+    df = read_dataset("standard_stats", filters={"SEASON": seasons})
+    affected = state.update(df)
+    emit(state, affected)
+    print(f"初期化: {len(df)} 試合, {len(affected)} 選手×シーズン")
+
+
+def persist(rows, affected):
+    # 新しい試合を、その選手のパーティションだけ読み書きしてデータセットに追記する
+    if not dataset_exists("standard_stats"):
+        migrate_legacy_csv("standard_stats")
+    # 追記後・状態の保存前に失敗して再実行した場合も、同じ試合を二重に追記しない
+    existing = read_existing("standard_stats", {player_id for player_id, _ in affected})
+    rows = new_games(rows, existing)
+    if not rows.empty:
+        append_atomic(rows, existing, "standard_stats")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--init", action="store_true", help="保存済みの試合ログから状態を作り直す")
+    parser.add_argument("--seasons", nargs="+", default=scoring_model.target_seasons, help="--initで読むシーズン")
+    parser.add_argument("--inbox", default=INBOX_DIR, help="新しい試合ログ（CSV・Parquet）を置くディレクトリ")
+    parser.add_argument("--persist", action="store_true", help="取り込んだ試合をstandard_statsに追記する")
+    parser.add_argument("--watch", type=float, help="指定した秒数ごとに受け口を確認し続ける")
+    args = parser.parse_args()
+
+    state = load_state(MODELS)
+    if args.init:
+        state = StreamingState(MODELS)
+        with stage("initialize"):
+            initialize(state, args.seasons)
+        save_state(state)
+
+    source = DropFolderSource(args.inbox)
+    while True:
+        with stage("stream"):
+            updated = process(state, source, on_batch=persist if args.persist else None)
+        if updated:
+            print(f"{len(updated)} 選手×シーズンの出力を更新しました → {STREAM_OUTPUT_DIR}")
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
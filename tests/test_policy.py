@@ -0,0 +1,154 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+from nba_api.stats.endpoints import leaguedashplayerstats
+from nba_api.stats.library.http import NBAStatsHTTP
+
+from utils import cache
+from utils.policy import CircuitOpenError, RequestPolicy
+
+# LeagueDashPlayerStatsの正常な応答（1選手分）
+OK_BODY = json.dumps({"resultSets": [{
+    "name": "LeagueDashPlayerStats",
+    "headers": ["PLAYER_ID", "PLAYER_NAME", "GP"],
+    "rowSet": [[1629060, "Rui Hachimura", 59]],
+}]})
+
+
+def response(status_code, text):
+    # nba_apiが読むのはstatus_code・text・urlだけ
+    return mock.Mock(status_code=status_code, text=text, url="https://stats.nba.com/stats/leaguedashplayerstats")
+
+
+class FakeSession:
+    """送ったリクエストの数を数え、用意した応答を順に返すセッション"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class RequestPolicyHTTPTest(unittest.TestCase):
+    """nba_apiの応答がレート制限・サーバーエラーのときにポリシーがリトライするか"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(cache, "_default_cache", cache.ResponseCache(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(NBAStatsHTTP.set_session, NBAStatsHTTP._session)
+        self.policy = RequestPolicy(max_attempts=3, base_delay=0, max_delay=0, verbose=False)
+
+    def fetch(self, responses):
+        self.session = FakeSession(responses)
+        NBAStatsHTTP.set_session(self.session)
+        return self.policy.frames(leaguedashplayerstats.LeagueDashPlayerStats, season="2024-25")
+
+    def test_retries_429_then_succeeds(self):
+        frames = self.fetch([response(429, ""), response(429, "<html>Too Many Requests</html>"),
+                             response(200, OK_BODY)])
+        self.assertEqual(self.session.calls, 3)
+        self.assertEqual(frames[0]["PLAYER_ID"].tolist(), [1629060])
+        self.assertEqual(self.policy.metrics.summary().loc["LeagueDashPlayerStats", "retries"], 2)
+
+    def test_503_raises_http_error_after_max_attempts(self):
+        with self.assertRaises(requests.exceptions.HTTPError) as ctx:
+            self.fetch([response(503, "Service Unavailable")] * 3)
+        self.assertEqual(ctx.exception.response.status_code, 503)
+        self.assertEqual(self.session.calls, 3)
+
+    def test_client_error_is_not_retried(self):
+        with self.assertRaises(requests.exceptions.HTTPError) as ctx:
+            self.fetch([response(400, "Bad Request")])
+        self.assertEqual(ctx.exception.response.status_code, 400)
+        self.assertEqual(self.session.calls, 1)
+
+    def test_non_json_body_without_error_status_is_retried(self):
+        frames = self.fetch([response(200, ""), response(200, OK_BODY)])
+        self.assertEqual(self.session.calls, 2)
+        self.assertEqual(len(frames[0]), 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    """サーキットブレーカーが一時的な障害だけを数え、半開では1件だけ試すか"""
+
+    def open_circuit(self, policy, endpoint):
+        # 一時的な障害（タイムアウト）でサーキットを開く
+        def timeout():
+            raise requests.exceptions.Timeout("timeout")
+
+        for _ in range(policy.failure_threshold):
+            with self.assertRaises(requests.exceptions.Timeout):
+                policy.call(endpoint, timeout)
+        self.assertEqual(policy.breaker(endpoint).state, "open")
+
+    def test_non_retryable_errors_do_not_open_circuit(self):
+        policy = RequestPolicy(max_attempts=1, failure_threshold=2, verbose=False)
+
+        def bad_parameters():
+            raise ValueError("invalid season")
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                policy.call("LeagueDashPlayerStats", bad_parameters)
+        self.assertEqual(policy.breaker("LeagueDashPlayerStats").state, "closed")
+        self.assertEqual(policy.call("LeagueDashPlayerStats", lambda: "ok"), "ok")
+
+    def test_half_open_allows_single_trial(self):
+        policy = RequestPolicy(max_attempts=1, failure_threshold=1, reset_timeout=0.05, verbose=False)
+        self.open_circuit(policy, "LeagueDashPlayerStats")
+        time.sleep(0.06)
+
+        entered = threading.Event()
+        release = threading.Event()
+        calls = []
+        rejected = []
+
+        def trial():
+            calls.append(1)
+            entered.set()
+            release.wait(5)
+            return "ok"
+
+        def worker():
+            try:
+                policy.call("LeagueDashPlayerStats", trial)
+            except CircuitOpenError:
+                rejected.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(entered.wait(5))
+        # 試行中のリクエスト以外は結果を待たずに失敗する
+        deadline = time.monotonic() + 5
+        while len(rejected) < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(rejected), 7)
+        self.assertEqual(policy.breaker("LeagueDashPlayerStats").state, "closed")
+
+    def test_failed_trial_reopens_circuit(self):
+        policy = RequestPolicy(max_attempts=1, failure_threshold=1, reset_timeout=0.05, verbose=False)
+        self.open_circuit(policy, "LeagueDashPlayerStats")
+        time.sleep(0.06)
+        self.open_circuit(policy, "LeagueDashPlayerStats")
+        with self.assertRaises(CircuitOpenError):
+            policy.call("LeagueDashPlayerStats", lambda: "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
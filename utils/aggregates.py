@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+from utils.features import add_derived_features
+from utils.percentile import PercentileIndex
+from utils.storage import read_dataset, write_dataset, dataset_exists, partition_mtimes
+
+# チーム・サブセットの「全体」を表す値
+ALL = "ALL"
+# 保存しておく分位点（列名は Q10, Q25, ...）
+QUANTILES = (0.1, 0.25, 0.33, 0.5, 0.66, 0.75, 0.9)
+# 集計済みのサブセット（役割分類の低USGの選手。USG%はrole_segmentationと同じく%に直して比べる）
+LOW_USG_THRESHOLD = 20
+# リーグ・チーム単位の表のキーと、選手単位の表のキー
+GROUP_KEYS = ["SEASON", "TEAM_ABBREVIATION", "SUBSET", "STAT"]
+PLAYER_KEYS = ["SEASON", "PLAYER_ID", "STAT"]
+# 集計しない数値列
+ID_COLUMNS = ["PLAYER_ID", "TEAM_ID"]
+# ロールアップの元になる表と、ロールアップのデータセット
+SOURCE_DATASETS = ["league_traditional", "league_advanced"]
+ROLLUP_DATASETS = ["league_rollups", "player_rollups"]
+
+
+def quantile_column(q):
+    return f"Q{round(q * 100)}"
+
+
+def as_percent(values):
+    # 0〜1の比率で入っていれば%に直す（role_segmentationと同じ判定）
+    return values * 100 if values.max() <= 1 else values
+
+
+def subset_name(usg_threshold):
+    return f"USG_LT_{usg_threshold:g}"
+
+
+def merge_tables(traditional, advanced=None):
+    # TraditionalにAdvancedの列（同名の列はTraditionalを優先）を選手×シーズンで結合する
+    if advanced is None:
+        return traditional
+    extra = [col for col in advanced.columns if col not in traditional.columns]
+    return traditional.merge(advanced[["SEASON", "PLAYER_ID"] + extra], on=["SEASON", "PLAYER_ID"], how="outer")
+
+
+def _stat_columns(df):
+    return [col for col in df.select_dtypes("number").columns if col not in ID_COLUMNS]
+
+
+def _subsets(df, usg_thresholds):
+    # サブセット名 → 行のマスク
+    subsets = {ALL: np.ones(len(df), dtype=bool)}
+    if "USG_PCT" in df.columns:
+        usg = as_percent(df["USG_PCT"]).to_numpy(dtype=float)
+        for threshold in usg_thresholds:
+            subsets[subset_name(threshold)] = usg < threshold
+    return subsets
+
+
+def _describe(df, stats, by):
+    # グループ×列ごとの件数・合計・平均・標準偏差・最小・分位点・最大と、出場時間で割った36分あたり
+    grouped = df.groupby(by, sort=False, observed=True)[stats]
+    parts = {
+        "N": grouped.count(),
+        "TOTAL": grouped.sum(),
+        "MEAN": grouped.mean(),
+        "STD": grouped.std(),
+        "MIN": grouped.min(),
+        **{quantile_column(q): grouped.quantile(q) for q in QUANTILES},
+        "MAX": grouped.max(),
+    }
+    if "MIN" in df.columns:
+        # 合計 / 出場時間の合計 × 36（合計値の表なら全体の36分あたり。1試合平均の表なら選手を出場時間で重み付けした値）
+        minutes = df.groupby(by, sort=False, observed=True)["MIN"].sum()
+        parts["PER36"] = parts["TOTAL"].div(minutes.where(minutes > 0), axis=0) * 36
+    long = pd.concat({field: frame.stack(future_stack=True) for field, frame in parts.items()}, axis=1)
+    return long.rename_axis(by + ["STAT"]).reset_index()
+
+
+def build_rollups(traditional, advanced=None, usg_thresholds=(LOW_USG_THRESHOLD,)):
+    """
+    リーグ全選手の表から、シーズン・チーム・リーグ単位のロールアップを作る
+    戻り値: (groups, players)
+      groups: SEASON × TEAM_ABBREVIATION（ALL=リーグ全体）× SUBSET（ALL・低USGなど）× STAT ごとの
+              N, TOTAL, MEAN, STD, MIN, Q10〜Q90, MAX, PER36
+      players: SEASON × PLAYER_ID × STAT ごとの VALUE と、シーズン内のパーセンタイル
+               （PERCENTILE: 値より小さい選手の割合。PercentileIndexのstrictと同じ）
+    数値列のほか、2P・効率・36分あたりの派生列（add_derived_features）も集計する
+    """
+    df = add_derived_features(merge_tables(traditional, advanced))
+    stats = _stat_columns(df)
+    groups = []
+    for name, mask in _subsets(df, usg_thresholds).items():
+        subset = df[mask]
+        league = _describe(subset, stats, ["SEASON"]).assign(TEAM_ABBREVIATION=ALL)
+        parts = [league]
+        if "TEAM_ABBREVIATION" in df.columns:
+            parts.append(_describe(subset, stats, ["SEASON", "TEAM_ABBREVIATION"]))
+        groups.append(pd.concat(parts, ignore_index=True).assign(SUBSET=name))
+    groups = pd.concat(groups, ignore_index=True)
+    groups = groups[GROUP_KEYS + [col for col in groups.columns if col not in GROUP_KEYS]]
+
+    players = []
+    for season, part in df.groupby("SEASON", sort=False, observed=True):
+        percentiles = PercentileIndex(part, stats).matrix()
+        values = part.set_index("PLAYER_ID")[stats]
+        long = pd.concat({"VALUE": values.stack(future_stack=True),
+                          "PERCENTILE": percentiles.stack(future_stack=True)}, axis=1)
+        players.append(long.rename_axis(["PLAYER_ID", "STAT"]).reset_index().assign(SEASON=season))
+    players = pd.concat(players, ignore_index=True)[PLAYER_KEYS + ["VALUE", "PERCENTILE"]]
+    return groups, players
+
+
+def write_rollups(groups, players):
+    # リーグの表と同じくシーズン単位のパーティションで保存する（書き込むのは含まれるシーズンだけ）
+    write_dataset(groups, "league_rollups")
+    write_dataset(players, "player_rollups")
+
+
+def refresh_rollups(seasons):
+    """
+    保存済みのTraditional・Advancedから指定シーズンのロールアップを作り直して保存する
+    リーグの表を書き込んだ直後（取り込み時）に呼ぶ
+    """
+    seasons = [seasons] if isinstance(seasons, str) else list(seasons)
+    traditional = read_dataset("league_traditional", filters={"SEASON": seasons})
+    try:
+        advanced = read_dataset("league_advanced", filters={"SEASON": seasons})
+    except FileNotFoundError:
+        advanced = None
+    groups, players = build_rollups(traditional, advanced if advanced is not None and len(advanced) else None)
+    write_rollups(groups, players)
+    return groups, players
+
+
+def rollups_fresh(seasons=None):
+    """
+    保存済みのロールアップが元の表（Traditional・Advanced）より後に作られていればTrue（シーズンごとに比べる）
+    表だけが書き換えられた（refresh_rollupsを呼ばずに保存した）シーズンや、ロールアップの無いシーズンがあればFalse
+    seasons: 比べるシーズン（省略時は元の表の全シーズン）
+    """
+    seasons = [seasons] if isinstance(seasons, str) else seasons
+    built = {}
+    for name in ROLLUP_DATASETS:
+        for season, mtime in partition_mtimes(name).items():
+            built[season] = min(built.get(season, mtime), mtime)
+    for name in SOURCE_DATASETS:
+        for season, mtime in partition_mtimes(name).items():
+            if season is None:
+                # パーティション分割していない旧CSVは全シーズンの元になる
+                targets = list(built) if seasons is None else seasons
+            elif seasons is None or season in seasons:
+                targets = [season]
+            else:
+                continue
+            if any(target not in built or built[target] < mtime for target in targets):
+                return False
+    return bool(built)
+
+
+class Rollups:
+    """
+    ロールアップをキーのindexで引く（分析・描画のたびに全選手の表を集計し直さずに済む）
+    例: rollups.value("2024-25", "FG3A") → リーグ全体のFG3Aの平均
+        rollups.player("2024-25", 1629060, "FG_PCT") → 八村のFG%のパーセンタイル
+    """
+
+    def __init__(self, groups, players):
+        self.groups = groups.set_index(GROUP_KEYS).sort_index()
+        self.players = players.set_index(PLAYER_KEYS).sort_index()
+
+    @classmethod
+    def build(cls, traditional, advanced=None):
+        return cls(*build_rollups(traditional, advanced))
+
+    @classmethod
+    def load(cls, seasons=None):
+        # 保存済みのロールアップを読む（未作成、または元の表より古ければNone。呼び出し側は表から集計し直す）
+        if not all(dataset_exists(name) for name in ROLLUP_DATASETS):
+            return None
+        if not rollups_fresh(seasons):
+            print("ロールアップがリーグの表より古いため、表から集計し直します")
+            return None
+        filters = {"SEASON": [seasons] if isinstance(seasons, str) else list(seasons)} if seasons else None
+        return cls(read_dataset("league_rollups", filters=filters), read_dataset("player_rollups", filters=filters))
+
+    def has(self, season, stat, team=ALL, subset=ALL):
+        return (season, team, subset, stat) in self.groups.index
+
+    def value(self, season, stat, field="MEAN", team=ALL, subset=ALL):
+        return self.groups.at[(season, team, subset, stat), field]
+
+    def player(self, season, player_id, stat, field="PERCENTILE"):
+        return self.players.at[(season, player_id, stat), field]
+
+    def quantiles(self, stat, quantiles, team=ALL, subset=ALL):
+        """
+        シーズンごとの分位点の表（index: SEASON, 列: 分位点）。保存していない分位点を指定するとKeyError
+        """
+        columns = [quantile_column(q) for q in quantiles]
+        missing = [col for col in columns if col not in self.groups.columns]
+        if missing:
+            raise KeyError(f"集計していない分位点です: {missing}")
+        rows = self.groups.xs((team, subset, stat), level=["TEAM_ABBREVIATION", "SUBSET", "STAT"])
+        return rows[columns]
+
+
+def load_rollups(traditional, advanced=None):
+    """
+    パイプライン用: 保存済みのロールアップが最新ならそれを返す
+    無いか元の表より古ければ、渡された表から作り直して保存する（後続の分析は常に渡された表と同じ値を使う）
+    """
+    rollups = Rollups.load()
+    if rollups is not None:
+        return rollups
+    groups, players = build_rollups(traditional, advanced if advanced is not None and len(advanced) else None)
+    write_rollups(groups, players)
+    return Rollups(groups, players)
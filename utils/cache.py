@@ -0,0 +1,176 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from utils import paths
+from utils import instrumentation
+
+# APIレスポンスのキャッシュ先
+CACHE_DIR = paths.CACHE_DIR / "api"
+# 進行中シーズンのデータの有効期限（秒）。終了済みシーズンは無期限
+CURRENT_SEASON_TTL = 6 * 60 * 60
+# キャッシュ全体の上限サイズ（バイト）。超えたら最終アクセスが古い順に削除
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+
+def current_season(today=None):
+    # NBAのシーズンは10月開幕なので、10月以降は翌年にまたがるシーズン
+    today = today or datetime.date.today()
+    start = today.year if today.month >= 10 else today.year - 1
+    return f"{start}-{str(start + 1)[-2:]}"
+
+
+def season_of(params):
+    # パラメータからシーズン（例: 2024-25）を特定する
+    for name in ("season", "season_nullable"):
+        if params.get(name):
+            return params[name]
+    # GAME_IDは "002" + シーズン開始年の下2桁 + 連番（例: 0022401234 → 2024-25）
+    game_id = str(params.get("game_id", ""))
+    if re.fullmatch(r"\d{10}", game_id):
+        start = 2000 + int(game_id[3:5])
+        return f"{start}-{str(start + 1)[-2:]}"
+    return None
+
+
+def ttl_for(params):
+    # 終了済みシーズンは結果が変わらないので無期限（None）
+    season = season_of(params)
+    if season is not None and season < current_season():
+        return None
+    return CURRENT_SEASON_TTL
+
+
+def cache_key(endpoint_name, params):
+    # エンドポイント名とパラメータから内容アドレスのキーを作る
+    payload = json.dumps([endpoint_name, sorted(params.items())], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    nba_apiのレスポンス（DataFrameのリスト）をJSONでディスクに保存するキャッシュ
+    ファイルの更新時刻を最終アクセス時刻として使い、上限サイズを超えたらLRUで削除する
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key, ttl=None):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if ttl is not None and time.time() - entry["created"] > ttl:
+            return None
+        # LRU用にアクセス時刻を更新
+        os.utime(path)
+        return [pd.DataFrame(frame["data"], columns=frame["headers"]) for frame in entry["frames"]]
+
+    def put(self, key, frames, endpoint_name="", params=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "endpoint": endpoint_name,
+            "params": params or {},
+            "created": time.time(),
+            "frames": [{"headers": list(df.columns), "data": df.values.tolist()} for df in frames],
+        }
+        # 書きかけのファイルを読まないよう一時ファイル経由で置き換える
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, default=str)
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._total_size()
+            else:
+                self._size += path.stat().st_size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        return list(self.cache_dir.glob("*/*.json"))
+
+    def _total_size(self):
+        return sum(p.stat().st_size for p in self._files())
+
+    def _evict(self):
+        # 最終アクセスが古い順に、上限の9割を下回るまで削除
+        files = sorted(self._files(), key=lambda p: p.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        for path in files:
+            if self._size <= target:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+
+_default_cache = ResponseCache()
+
+
+def cache_path(endpoint_cls, cache=None, **params):
+    # cached_framesが同じパラメータで読み書きするキャッシュファイルのパス（パイプラインの入力に使う）
+    cache = cache or _default_cache
+    return cache._path(cache_key(endpoint_cls.__name__, params))
+
+
+def cached_frames(endpoint_cls, cache=None, timeout=None, **params):
+    """
+    endpoint_cls(**params).get_data_frames() をキャッシュ経由で取得する
+    timeoutはHTTPリクエストのタイムアウト（秒）で、キャッシュのキーには含めない
+    例: cached_frames(playergamelog.PlayerGameLog, player_id=1629060, season="2024-25")
+    """
+    cache = cache or _default_cache
+    endpoint_name = endpoint_cls.__name__
+    key = cache_key(endpoint_name, params)
+    frames = cache.get(key, ttl_for(params))
+    if frames is not None:
+        instrumentation.count("cache_hits")
+    else:
+        instrumentation.count("api_calls")
+        request_params = params if timeout is None else {**params, "timeout": timeout}
+        frames = request_frames(endpoint_cls, **request_params)
+        cache.put(key, frames, endpoint_name, params)
+    return frames
+
+
+def request_frames(endpoint_cls, **params):
+    """
+    endpoint_cls(**params).get_data_frames() と同じ
+    nba_apiはHTTPステータスを確認せず、429・5xxの応答も本文をJSONとして読もうとして失敗するので、
+    読めなかったときにステータスが4xx・5xxならrequests.HTTPErrorを送出する（リトライの判定に使う）
+    """
+    endpoint = endpoint_cls(**params, get_request=False)
+    try:
+        endpoint.get_request()
+    except Exception as e:
+        response = getattr(endpoint, "nba_response", None)
+        status = getattr(response, "_status_code", None)
+        if status is None or status < 400:
+            raise
+        error_response = requests.Response()
+        error_response.status_code = status
+        error_response.url = response.get_url()
+        raise requests.exceptions.HTTPError(f"{status} Error for url: {error_response.url}",
+                                            response=error_response) from e
+    return endpoint.get_data_frames()
@@ -0,0 +1,155 @@
+import hashlib
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.mixture import GaussianMixture
+from sklearn.preprocessing import StandardScaler
+
+from utils.paths import CACHE_DIR
+from utils.storage import read_dataset
+
+# 学習済みモデルの結果（ラベル・スコア）のキャッシュ先
+MODEL_CACHE_DIR = CACHE_DIR / "clustering"
+METHODS = ("kmeans", "minibatch", "gmm")
+# method="auto" でこの行数を超えたらミニバッチk-meansを使う
+MINIBATCH_THRESHOLD = 20000
+# シルエット係数を計算するときのサンプル数（O(n^2)なので全件では計算しない）
+SILHOUETTE_SAMPLE = 5000
+KEYS = ["SEASON", "PLAYER_ID"]
+
+# 1試合あたりの値を36分あたりに換算して使う列（出場時間の長さでなく役割で分けるため）
+PER36_FEATURES = ["PTS", "REB", "AST", "STL", "BLK", "TOV", "FG3A", "FTA"]
+ADVANCED_FEATURES = ["USG_PCT", "TS_PCT", "AST_PCT", "OREB_PCT", "DREB_PCT", "TM_TOV_PCT", "PIE"]
+FEATURES = [f"{col}_PER36" for col in PER36_FEATURES] + ADVANCED_FEATURES
+
+
+def merge_league_tables(traditional, advanced, min_games=30):
+    """
+    Traditional・Advancedのリーグ全選手スタッツを (SEASON, PLAYER_ID) で結合し、クラスタリング用の特徴量を作る
+    """
+    traditional = traditional[traditional["GP"] >= min_games]
+    df = traditional[KEYS + ["PLAYER_NAME", "MIN"] + PER36_FEATURES].merge(
+        advanced[KEYS + ADVANCED_FEATURES], on=KEYS, how="inner"
+    )
+    minutes = df["MIN"].where(df["MIN"] > 0)
+    for col in PER36_FEATURES:
+        df[f"{col}_PER36"] = df[col] / minutes * 36
+    return df[KEYS + ["PLAYER_NAME"] + FEATURES].dropna().reset_index(drop=True)
+
+
+def load_league_features(seasons=None, min_games=30):
+    # 必要な列だけを読み込んで結合する（seasons=Noneなら全シーズン）
+    filters = {"SEASON": seasons} if seasons else None
+    traditional = read_dataset(
+        "league_traditional", columns=KEYS + ["PLAYER_NAME", "GP", "MIN"] + PER36_FEATURES, filters=filters
+    )
+    advanced = read_dataset("league_advanced", columns=KEYS + ADVANCED_FEATURES, filters=filters)
+    return merge_league_tables(traditional, advanced, min_games)
+
+
+def standardize(df, features=FEATURES):
+    # 特徴量を平均0・分散1に標準化した行列（float64, C連続）
+    return np.ascontiguousarray(StandardScaler().fit_transform(df[features].to_numpy(dtype=float)))
+
+
+def resolve_method(method, n_rows):
+    if method == "auto":
+        return "minibatch" if n_rows > MINIBATCH_THRESHOLD else "kmeans"
+    if method not in METHODS:
+        raise ValueError(f"methodは {', '.join(METHODS)} か 'auto' を指定してください: {method}")
+    return method
+
+
+def _model(method, k, random_state):
+    if method == "kmeans":
+        return KMeans(n_clusters=k, n_init=10, random_state=random_state)
+    if method == "minibatch":
+        return MiniBatchKMeans(n_clusters=k, n_init=3, batch_size=4096, random_state=random_state)
+    return GaussianMixture(n_components=k, covariance_type="full", n_init=3, random_state=random_state)
+
+
+def _cache_path(X, method, k, random_state, cache_dir):
+    # 行列の中身・手法・k・乱数シード・sklearnのバージョンから結果のキーを作る
+    digest = hashlib.sha256()
+    digest.update(repr((X.shape, X.dtype.str, method, k, random_state, sklearn.__version__)).encode())
+    digest.update(X.tobytes())
+    return Path(cache_dir) / f"{method}_k{k}_{digest.hexdigest()[:24]}.joblib"
+
+
+def fit_clusters(X, method="kmeans", k=4, random_state=0, cache_dir=MODEL_CACHE_DIR):
+    """
+    標準化済みの行列Xをk個のクラスタに分ける
+    戻り値: labels・centers（標準化後の空間）とモデル選択用のスコア（silhouette, inertia, bic）のdict
+    同じX・手法・k・シードの結果はcache_dirから読み込む（cache_dir=Noneならキャッシュしない）
+    """
+    method = resolve_method(method, len(X))
+    path = _cache_path(X, method, k, random_state, cache_dir) if cache_dir is not None else None
+    if path is not None and path.exists():
+        return joblib.load(path)
+
+    model = _model(method, k, random_state).fit(X)
+    labels = model.predict(X)
+    result = {
+        "method": method,
+        "k": k,
+        "labels": labels,
+        "centers": model.means_ if method == "gmm" else model.cluster_centers_,
+        "inertia": getattr(model, "inertia_", np.nan),
+        "bic": model.bic(X) if method == "gmm" else np.nan,
+        "silhouette": _silhouette(X, labels, random_state),
+    }
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        joblib.dump(result, tmp_path)
+        tmp_path.replace(path)
+    return result
+
+
+def _silhouette(X, labels, random_state):
+    if len(np.unique(labels)) < 2:
+        return np.nan
+    sample_size = SILHOUETTE_SAMPLE if len(X) > SILHOUETTE_SAMPLE else None
+    return silhouette_score(X, labels, sample_size=sample_size, random_state=random_state)
+
+
+def select_k(X, method="kmeans", k_values=range(2, 11), random_state=0, cache_dir=MODEL_CACHE_DIR):
+    """
+    候補のkをすべて当てはめ、k-means系はシルエット係数が最大、GMMはBICが最小のkを選ぶ
+    戻り値: (選んだkの結果, kごとのスコア表)
+    """
+    method = resolve_method(method, len(X))
+    results = {k: fit_clusters(X, method, k, random_state, cache_dir) for k in k_values if k < len(X)}
+    scores = pd.DataFrame(
+        [{"k": k, "silhouette": r["silhouette"], "inertia": r["inertia"], "bic": r["bic"]}
+         for k, r in results.items()]
+    )
+    if method == "gmm":
+        best = scores.loc[scores["bic"].idxmin(), "k"]
+    else:
+        best = scores.loc[scores["silhouette"].idxmax(), "k"]
+    return results[int(best)], scores
+
+
+def cluster_players(df, features=FEATURES, method="auto", k=None, k_values=range(2, 11),
+                    random_state=0, cache_dir=MODEL_CACHE_DIR):
+    """
+    選手の特徴量を標準化してクラスタリングする（k=Noneならk_valuesから自動で選ぶ）
+    戻り値: (Cluster列を追加したdf, kごとのスコア表, クラスタごとの特徴量の平均)
+    """
+    X = standardize(df, features)
+    if k is None:
+        result, scores = select_k(X, method, k_values, random_state, cache_dir)
+    else:
+        result = fit_clusters(X, method, k, random_state, cache_dir)
+        scores = pd.DataFrame([{"k": k, "silhouette": result["silhouette"],
+                                "inertia": result["inertia"], "bic": result["bic"]}])
+    labeled = df.assign(Cluster=result["labels"])
+    profile = labeled.groupby("Cluster")[features].mean().assign(N=labeled["Cluster"].value_counts().sort_index())
+    print(f"手法: {result['method']}, k={result['k']}, 行数: {len(df)}")
+    return labeled, scores, profile
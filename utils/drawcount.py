@@ -1,11 +1,18 @@
+from functools import lru_cache
+
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Circle, Rectangle, Arc
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle, Rectangle, Arc, PathPatch
+from matplotlib.path import Path
 
-def draw_court(ax=None, color='black', lw=2, outer_lines=False):
-    # If an axes object isn't provided to plot onto, just get current one
-    if ax is None:
-        ax = plt.gca()
+# コート画像の描画範囲（外枠の線が切れないよう少し余白を取る）
+COURT_EXTENT = (-255, 255, -52.5, 427.5)
 
+
+def _court_elements(color='black', lw=2, outer_lines=False):
     # Create the various parts of an NBA basketball court
 
     # Create the basketball hoop
@@ -64,8 +71,80 @@ def draw_court(ax=None, color='black', lw=2, outer_lines=False):
                                 color=color, fill=False)
         court_elements.append(outer_lines)
 
-    # Add the court elements onto the axes
-    for element in court_elements:
-        ax.add_patch(element)
+    return court_elements
+
+
+@lru_cache(maxsize=None)
+def _court_patches(color, lw, outer_lines):
+    """
+    コートの各要素を、コレクションにまとめられるPathPatchに変換してキャッシュする
+    （Arcはそのままだと全周の楕円のパスになるので、theta1〜theta2の弧のパスに置き換える）
+    """
+    patches = []
+    for element in _court_elements(color, lw, outer_lines):
+        if isinstance(element, Arc):
+            path = Path.arc(element.theta1, element.theta2)
+        else:
+            path = element.get_path()
+        path = element.get_patch_transform().transform_path(path)
+        patches.append(PathPatch(
+            path,
+            facecolor=element.get_facecolor() if element.get_fill() else "none",
+            edgecolor=element.get_edgecolor(),
+            linewidth=element.get_linewidth(),
+            linestyle=element.get_linestyle(),
+        ))
+    return tuple(patches)
+
+
+def court_collection(color='black', lw=2, outer_lines=False):
+    """
+    コートの線をまとめた PatchCollection を返す（パスはキャッシュ済みなので生成は軽い）
+    1つのコレクションは1つのAxesにしか追加できないため、呼び出しごとに新しく作る
+    """
+    return PatchCollection(_court_patches(color, lw, outer_lines), match_original=True)
+
+
+@lru_cache(maxsize=8)
+def court_image(color='black', lw=2, outer_lines=False, dpi=300, pixels_per_unit=6):
+    """
+    コートをスタイル・解像度ごとに1回だけラスタライズしたRGBA画像（背景は透明）
+    線幅はポイント単位なので、保存時のdpiと図上の1単位あたりのピクセル数を合わせると
+    ベクター描画と同じ太さになる
+    """
+    left, right, bottom, top = COURT_EXTENT
+    fig = Figure(figsize=((right - left) * pixels_per_unit / dpi, (top - bottom) * pixels_per_unit / dpi), dpi=dpi)
+    fig.patch.set_alpha(0)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.patch.set_alpha(0)
+    ax.add_collection(court_collection(color, lw, outer_lines))
+    ax.set_xlim(left, right)
+    ax.set_ylim(bottom, top)
+    canvas.draw()
+    image = np.asarray(canvas.buffer_rgba()).copy()
+    image.flags.writeable = False
+    return image
+
+
+def draw_court(ax=None, color='black', lw=2, outer_lines=False, raster=False, dpi=300, pixels_per_unit=6):
+    """
+    コートを描画する
+    raster=False: キャッシュ済みのパスから作ったPatchCollectionを1つ追加する（ベクター）
+    raster=True: キャッシュ済みのコート画像をimshowで合成する（大量の図を作るとき向け）
+    """
+    # If an axes object isn't provided to plot onto, just get current one
+    if ax is None:
+        ax = plt.gca()
 
+    if raster:
+        ax.imshow(
+            court_image(color, lw, outer_lines, dpi, pixels_per_unit),
+            extent=COURT_EXTENT, origin="upper", aspect=ax.get_aspect(),
+            interpolation="antialiased", zorder=0,
+        )
+    else:
+        ax.add_collection(court_collection(color, lw, outer_lines))
+        ax.autoscale_view()
     return ax
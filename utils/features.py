@@ -0,0 +1,86 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 1分あたり・1ポゼッションあたりに換算する積み上げスタッツ
+COUNTING_STATS = [
+    "PTS", "FGM", "FGA", "FG2M", "FG2A", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF",
+]
+
+# 派生済みフレームのキャッシュ（入力の内容ハッシュ → 結果）
+_CACHE_SIZE = 16
+_cache = OrderedDict()
+
+
+def safe_divide(numerator, denominator):
+    # 分母が0以下の要素は0にする（行ごとのif分岐をNumPyでまとめて処理）
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def frame_hash(df):
+    # 列名・値・インデックスから内容ハッシュを作る
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+def _derive(df):
+    columns = {}
+    has = set(df.columns)
+
+    # 2P関連
+    if {"FGA", "FG3A"} <= has:
+        columns["FG2A"] = df["FGA"].to_numpy() - df["FG3A"].to_numpy()
+    if {"FGM", "FG3M"} <= has:
+        columns["FG2M"] = df["FGM"].to_numpy() - df["FG3M"].to_numpy()
+    if "FG2A" in columns and "FG2M" in columns:
+        columns["FG2_PCT"] = safe_divide(columns["FG2M"], columns["FG2A"])
+
+    # シュート効率（アドバンスドスタッツ由来の列があればそちらを優先）
+    if {"FGM", "FG3M", "FGA"} <= has and "EFG_PCT" not in has:
+        columns["EFG_PCT"] = safe_divide(df["FGM"] + 0.5 * df["FG3M"], df["FGA"])
+    if {"PTS", "FGA", "FTA"} <= has and "TS_PCT" not in has:
+        columns["TS_PCT"] = safe_divide(df["PTS"], 2 * (df["FGA"] + 0.44 * df["FTA"]))
+
+    df = df.assign(**columns)
+    stats = [col for col in COUNTING_STATS if col in df.columns]
+
+    # 36分あたり
+    if "MIN" in df.columns and pd.api.types.is_numeric_dtype(df["MIN"]):
+        values = df[stats].to_numpy(dtype=float)
+        per36 = safe_divide(values * 36, df["MIN"].to_numpy()[:, None])
+        df = df.assign(**{f"{col}_PER36": per36[:, i] for i, col in enumerate(stats)})
+
+    # 100ポゼッションあたり（PACEがある場合のみ。出場中のポゼッション数 = PACE × MIN / 48）
+    if {"PACE", "MIN"} <= set(df.columns) and pd.api.types.is_numeric_dtype(df["MIN"]):
+        possessions = df["PACE"].to_numpy(dtype=float) * df["MIN"].to_numpy(dtype=float) / 48
+        values = df[stats].to_numpy(dtype=float)
+        per100 = safe_divide(values * 100, possessions[:, None])
+        df = df.assign(**{f"{col}_PER100": per100[:, i] for i, col in enumerate(stats)})
+
+    return df
+
+
+def add_derived_features(df, cache=True):
+    """
+    2P（FG2A・FG2M・FG2_PCT）、効率（EFG_PCT・TS_PCT）、36分あたり・100ポゼッションあたりの列を追加する
+    全てNumPyの列演算で計算し、同じ内容の入力に対しては派生済みのフレームを再利用する
+    """
+    if not cache:
+        return _derive(df)
+    key = frame_hash(df)
+    if key in _cache:
+        _cache.move_to_end(key)
+    else:
+        _cache[key] = _derive(df)
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    # 呼び出し側で列を追加してもキャッシュが変わらないようコピーを返す
+    return _cache[key].copy()
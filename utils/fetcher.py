@@ -0,0 +1,81 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import instrumentation
+
+# nba_apiへのリクエスト間隔の目安（秒）
+REQUEST_INTERVAL = 1.2
+
+
+class TokenBucket:
+    """
+    スレッドセーフなトークンバケット
+    rate件/秒でトークンを補充し、最大capacity件までバーストを許可する
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # トークンが1つ貯まるまで待つ
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    # Full Jitter付きの指数バックオフ（0〜base*2^attempt秒の一様乱数）
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def fetch_all(keys, fetch_fn, max_workers=4, rate=1 / REQUEST_INTERVAL,
+              max_retries=3, base_delay=1.0, verbose=True):
+    """
+    keysの各要素についてfetch_fn(key)を並列実行する
+    全ワーカーで1つのトークンバケットを共有し、合計リクエスト数がrate件/秒を超えないようにする
+    失敗時は指数バックオフで最大max_retries回リトライし、それでも失敗したキーはerrorsに入れて返す
+    """
+    bucket = TokenBucket(rate)
+
+    def worker(key):
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                return fetch_fn(key)
+            except Exception as e:
+                if attempt >= max_retries:
+                    raise
+                delay = backoff_delay(attempt, base_delay)
+                instrumentation.count("retries")
+                if verbose:
+                    print(f"Retry {key} in {delay:.1f}s ({attempt + 1}/{max_retries}): {e}")
+                time.sleep(delay)
+                attempt += 1
+
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {key: executor.submit(worker, key) for key in dict.fromkeys(keys)}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = e
+                if verbose:
+                    print(f"Error fetching {key}: {e}")
+
+    return results, errors
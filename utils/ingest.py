@@ -0,0 +1,203 @@
+import pandas as pd
+from nba_api.stats.endpoints import playergamelog, boxscoreadvancedv2, leaguedashplayerstats
+from nba_api.stats.static import players
+
+from utils.cache import cached_frames
+from utils.fetcher import fetch_all
+
+# スタンダードスタッツとして保存する列
+STANDARD_COLUMNS = [
+    "SEASON", "GAME_DATE", "MATCHUP", "WL", "MIN", "PTS",  # シーズン、試合日、対戦カード、勝敗、出場時間、得点
+    "FGM", "FGA", "FG_PCT",  # フィールドゴール成功数、試投数、成功率
+    "FG3M", "FG3A", "FG3_PCT",  # 3ポイント成功数、試投数、成功率
+    "FTM", "FTA", "FT_PCT",  # フリースロー成功数、試投数、成功率
+    "OREB", "DREB", "REB",  # オフェンスリバウンド、ディフェンスリバウンド、総リバウンド
+    "AST", "STL", "BLK", "TOV", "PF",  # アシスト、スティール、ブロック、ターンオーバー、ファウル
+    "PLUS_MINUS",  # プラスマイナス
+]
+
+# BoxScoreAdvancedV2の列 → 保存する列名
+ADVANCED_COLUMNS = {
+    "MIN": "MIN",                    # 出場時間（分）
+    "OFF_RATING": "OFF_RATING",      # チームオフェンス効率（100ポゼッションあたり得点）
+    "DEF_RATING": "DEF_RATING",      # チームディフェンス効率（100ポゼッションあたり失点）
+    "NET_RATING": "NET_RATING",      # OFF_RATING - DEF_RATING（チームの総合効率）
+    "AST_PCT": "AST_PCT",            # 味方の得点に対してアシストした割合
+    "AST_RATIO": "AST_RATIO",        # 100ポゼッションあたりのアシスト数
+    "OREB_PCT": "OREB_PCT",          # オフェンスリバウンド率
+    "DREB_PCT": "DREB_PCT",          # ディフェンスリバウンド率
+    "REB_PCT": "REB_PCT",            # トータルリバウンド率
+    "TM_TOV_PCT": "TO_RATIO",        # チームターンオーバー率（低いほど良い）
+    "EFG_PCT": "EFG_PCT",            # 有効FG％（3Pを1.5倍で評価したシュート効率）
+    "TS_PCT": "TS_PCT",              # True Shooting％（FG・3P・FTを総合した得点効率）
+    "USG_PCT": "USG_PCT",            # 使用率（どれだけ攻撃に関与したか）
+    "PACE": "PACE",                  # 試合テンポ（ポゼッションの速さ）
+    "PIE": "PIE",                    # Player Impact Estimate（試合全体への影響度）
+}
+
+
+def resolve_player_ids(names):
+    # 選手名からPLAYER_IDを引く（見つからない名前はスキップ）
+    player_ids = []
+    for name in names:
+        found = players.find_players_by_full_name(name)
+        if not found:
+            print(f"選手が見つかりません: {name}")
+            continue
+        player_ids.append(found[0]["id"])
+    return player_ids
+
+
+def players_with_min_gp(season, min_gp):
+    # LeagueDashPlayerStatsで出場試合数がmin_gp以上の選手IDを取得
+    df = cached_frames(
+        leaguedashplayerstats.LeagueDashPlayerStats,
+        season=season,
+        season_type_all_star="Regular Season",
+    )[0]
+    return df.loc[df["GP"] >= min_gp, "PLAYER_ID"].tolist()
+
+
+def fetch_game_logs(player_ids, seasons, **fetch_kwargs):
+    """
+    選手×シーズンのゲームログを並列取得して1つのDataFrameにまとめる
+    PLAYER_ID・GAME_ID・SEASON列を付与する
+    """
+    def fetch_log(key):
+        player_id, season = key
+        df = cached_frames(playergamelog.PlayerGameLog, player_id=player_id, season=season)[0]
+        return df.assign(SEASON=season)
+
+    keys = [(player_id, season) for player_id in player_ids for season in seasons]
+    logs, _ = fetch_all(keys, fetch_log, **fetch_kwargs)
+    frames = [logs[key] for key in keys if key in logs and not logs[key].empty]
+    if not frames:
+        return pd.DataFrame(columns=["PLAYER_ID", "GAME_ID"] + STANDARD_COLUMNS)
+    games_df = pd.concat(frames, ignore_index=True)
+    return games_df.rename(columns={"Player_ID": "PLAYER_ID", "Game_ID": "GAME_ID"})
+
+
+def fetch_advanced_box_scores(game_ids, **fetch_kwargs):
+    """
+    試合ごとのBoxScoreAdvancedV2を取得する
+    1試合のレスポンスには出場した全選手の行が含まれるため、同じ試合は1回だけ取得して全行を残す
+    """
+    def fetch_box_score(game_id):
+        return cached_frames(boxscoreadvancedv2.BoxScoreAdvancedV2, game_id=game_id)[0]
+
+    box_scores, _ = fetch_all(pd.unique(pd.Series(game_ids)), fetch_box_score, **fetch_kwargs)
+    frames = [df for df in box_scores.values() if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=["GAME_ID", "PLAYER_ID"] + list(ADVANCED_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_advanced_stats(games_df, box_df):
+    """
+    ゲームログの各行（選手×試合）に対応するアドバンスドスタッツ行を結合する
+    ボックススコアに行が無い試合（DNPなど）は除外する
+    """
+    box = box_df[["GAME_ID", "PLAYER_ID"] + list(ADVANCED_COLUMNS)].rename(columns=ADVANCED_COLUMNS)
+    games = games_df[["PLAYER_ID", "SEASON", "GAME_ID", "GAME_DATE", "MATCHUP", "WL"]]
+    merged = games.merge(box, on=["GAME_ID", "PLAYER_ID"], how="inner")
+    return merged[["PLAYER_ID", "SEASON", "GAME_ID", "GAME_DATE", "MATCHUP", "WL"] + list(ADVANCED_COLUMNS.values())]
+
+
+# リーグ全選手スタッツの measure type（表示名 → APIのパラメータ値。TraditionalはAPI上は "Base"）
+LEAGUE_MEASURE_TYPES = {
+    "Traditional": "Base",
+    "Advanced": "Advanced",
+    "Misc": "Misc",
+    "Scoring": "Scoring",
+    "Usage": "Usage",
+}
+LEAGUE_KEYS = ["SEASON", "PLAYER_ID"]
+# 全measure typeに含まれる選手の属性列（横持ちにするときは最初の表の値だけ残す）
+LEAGUE_ATTRIBUTE_COLUMNS = ["PLAYER_NAME", "NICKNAME", "TEAM_ID", "TEAM_ABBREVIATION", "AGE", "GP", "W", "L"]
+LEAGUE_STRING_COLUMNS = ["SEASON", "PLAYER_NAME", "NICKNAME", "TEAM_ABBREVIATION"]
+LEAGUE_INT_COLUMNS = ["PLAYER_ID", "TEAM_ID", "GP", "W", "L"]
+# 2つ目以降のper modeの列に付ける接尾辞（先頭のper modeは接尾辞なし）
+PER_MODE_SUFFIXES = {
+    "PerGame": "_PER_GAME",
+    "Totals": "_TOTAL",
+    "Per36": "_PER36",
+    "Per48": "_PER48",
+    "Per100Possessions": "_PER100",
+    "PerMinute": "_PER_MIN",
+}
+
+
+def season_range(start, end):
+    # "2019-20" から "2024-25" までのシーズン表記のリスト
+    first, last = int(start[:4]), int(end[:4])
+    return [f"{year}-{str(year + 1)[-2:]}" for year in range(first, last + 1)]
+
+
+def fetch_league_stats(seasons, measure_types=tuple(LEAGUE_MEASURE_TYPES), per_modes=("PerGame",),
+                       policy=None, **fetch_kwargs):
+    """
+    シーズン × measure type × per mode のLeagueDashPlayerStatsを並列取得する（fetch_allでレート制限）
+    policy（RequestPolicy）を渡すとリトライ・タイムアウト・サーキットブレーカーはポリシーに従う
+    戻り値: ({(season, measure_type, per_mode): DataFrame}, {失敗したキー: 例外})
+    """
+    get_frames = cached_frames if policy is None else policy.frames
+    if policy is not None:
+        # リトライはポリシー側で行う（429・5xx・タイムアウト・JSONでない応答。二重にリトライしないようfetch_allでは行わない）
+        fetch_kwargs.setdefault("max_retries", 0)
+
+    def fetch_stats(key):
+        season, measure_type, per_mode = key
+        df = get_frames(
+            leaguedashplayerstats.LeagueDashPlayerStats,
+            season=season,
+            season_type_all_star="Regular Season",
+            measure_type_detailed_defense=LEAGUE_MEASURE_TYPES[measure_type],
+            per_mode_detailed=per_mode,
+        )[0]
+        return df.assign(SEASON=season)
+
+    keys = [(season, measure_type, per_mode)
+            for season in seasons for measure_type in measure_types for per_mode in per_modes]
+    return fetch_all(keys, fetch_stats, **fetch_kwargs)
+
+
+def build_league_wide(frames, measure_types=tuple(LEAGUE_MEASURE_TYPES), per_modes=("PerGame",)):
+    """
+    fetch_league_statsの結果を (SEASON, PLAYER_ID) をキーにした1つの横持ちの表にする
+    - 順位列（*_RANK）は除き、複数のmeasure typeに同じ列があれば先に結合した方を残す
+    - 2つ目以降のper modeの列にはPER_MODE_SUFFIXESの接尾辞を付ける（属性列・キーは除く）
+    - 文字列・整数以外の列はfloat64に揃える
+    """
+    wide = None
+    for i, per_mode in enumerate(per_modes):
+        suffix = "" if i == 0 else PER_MODE_SUFFIXES.get(per_mode, f"_{per_mode.upper()}")
+        for measure_type in measure_types:
+            parts = [df for (season, m, p), df in frames.items() if m == measure_type and p == per_mode]
+            if not parts:
+                continue
+            df = pd.concat(parts, ignore_index=True)
+            df = df.drop(columns=[col for col in df.columns if col.endswith("_RANK")])
+            if wide is not None:
+                # 属性列は最初の表の値を使い、既にある指標列は結合しない
+                existing = set(wide.columns)
+                df = df[[col for col in df.columns
+                         if col in LEAGUE_KEYS
+                         or (col not in LEAGUE_ATTRIBUTE_COLUMNS and f"{col}{suffix}" not in existing)]]
+            df = df.rename(columns={col: f"{col}{suffix}" for col in df.columns
+                                    if col not in LEAGUE_KEYS and col not in LEAGUE_ATTRIBUTE_COLUMNS})
+            wide = df if wide is None else wide.merge(df, on=LEAGUE_KEYS, how="outer")
+    if wide is None:
+        return pd.DataFrame(columns=LEAGUE_KEYS)
+    return _league_types(wide).sort_values(LEAGUE_KEYS, kind="stable").reset_index(drop=True)
+
+
+def _league_types(df):
+    # 文字列・整数（欠損を許すInt64）・float64に型を揃え、キーを先頭に並べる
+    for col in df.columns:
+        if col in LEAGUE_STRING_COLUMNS:
+            df[col] = df[col].astype("string")
+        elif col in LEAGUE_INT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df[LEAGUE_KEYS + [col for col in df.columns if col not in LEAGUE_KEYS]]
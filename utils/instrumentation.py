@@ -0,0 +1,264 @@
+import cProfile
+import datetime
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.paths import OUTPUT_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 実行ごとのレポート・プロファイルの保存先
+REPORT_DIR = OUTPUT_DIR / "reports"
+# メモリ使用量のサンプリング間隔（秒）
+SAMPLE_INTERVAL = 0.05
+
+
+def current_rss():
+    # 現在の常駐メモリ（バイト）。Linuxは/procから、それ以外はプロセスのピーク値で代用する
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrssはLinuxではKB、macOSではバイト
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return 0
+
+
+def _parent_map():
+    # 全プロセスの 親PID → 子PID のリスト（/proc/<pid>/stat の4番目の値）
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # コマンド名に空白や括弧を含むことがあるので、最後の ")" より後ろを分割する
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # 読んでいる間に終了したプロセス
+        children[ppid].append(int(entry))
+    return children
+
+
+def _child_pids(pid, parent_map):
+    # /proc/<pid>/task/*/children があればそれを読み、無いカーネルでは全プロセスの親PIDから探す
+    paths = glob.glob(f"/proc/{pid}/task/*/children")
+    if not paths:
+        return parent_map()[pid]
+    pids = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def children_rss():
+    """
+    子孫プロセス（ProcessPoolExecutorのワーカーなど）の現在の常駐メモリの合計（バイト）
+    /procが無い環境では0
+    """
+    if not os.path.isdir("/proc"):
+        return 0
+    parent_map = functools.lru_cache(maxsize=1)(_parent_map)
+    total = 0
+    stack = _child_pids(os.getpid(), parent_map)
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            continue  # 読んでいる間に終了したプロセス
+        stack.extend(_child_pids(pid, parent_map))
+    return total
+
+
+class _MemorySampler:
+    """
+    ステージ実行中にバックグラウンドで常駐メモリを定期的に読み、最大値を記録する
+    peak: 自プロセスと子孫プロセス（描画・リサンプリングのワーカー）の合計の最大値
+    children_peak: そのうち子孫プロセスの合計の最大値
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self.children_peak = 0
+        self._sample()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        children = children_rss()
+        self.children_peak = max(self.children_peak, children)
+        self.peak = max(self.peak, current_rss() + children)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class Instrumentation:
+    """
+    ステージごとの処理時間・ピークメモリ（子孫プロセスのワーカーを含む）と、API呼び出し・キャッシュヒット・リトライなどのカウンタを記録する
+    with instrument.stage("fetch"): ... / @instrument.timed("fit") の形で使う
+    profile_stages に含まれるステージは cProfile（pyinstrumentがあればそちら）の結果も保存する
+    """
+
+    def __init__(self, report_dir=REPORT_DIR, profile_stages=(), sample_interval=SAMPLE_INTERVAL):
+        self.report_dir = Path(report_dir)
+        self.profile_stages = set(profile_stages)
+        self.sample_interval = sample_interval
+        self.started = datetime.datetime.now()
+        self.stages = []
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    @contextmanager
+    def stage(self, name):
+        # ネストしたステージは "親/子" の名前で記録する
+        parents = getattr(self._local, "parents", [])
+        full_name = "/".join(parents + [name])
+        self._local.parents = parents + [name]
+        profiler = self._start_profile(name)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        status = "ok"
+        try:
+            with _MemorySampler(self.sample_interval) as sampler:
+                yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            record = {
+                "stage": full_name,
+                "status": status,
+                "wall_seconds": time.perf_counter() - start_wall,
+                "cpu_seconds": time.process_time() - start_cpu,
+                "peak_rss_mb": sampler.peak / 1024 ** 2,
+                "peak_children_rss_mb": sampler.children_peak / 1024 ** 2,
+            }
+            if profiler is not None:
+                record["profile"] = str(self._stop_profile(name, profiler))
+            with self._lock:
+                self.stages.append(record)
+            self._local.parents = parents
+
+    def timed(self, name=None):
+        # 関数全体をステージとして計測するデコレータ
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _start_profile(self, name):
+        if name not in self.profile_stages:
+            return None
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+        except ImportError:
+            profiler = cProfile.Profile()
+        profiler.start() if hasattr(profiler, "start") else profiler.enable()
+        return profiler
+
+    def _stop_profile(self, name, profiler):
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.started:%Y%m%d_%H%M%S}_{name}"
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = self.report_dir / f"{stem}.prof"
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = self.report_dir / f"{stem}.html"
+            path.write_text(profiler.output_html())
+        return path
+
+    def report(self):
+        with self._lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "wall_seconds": (datetime.datetime.now() - self.started).total_seconds(),
+                "peak_rss_mb": max([s["peak_rss_mb"] for s in self.stages], default=current_rss() / 1024 ** 2),
+                "stages": list(self.stages),
+                "counters": dict(self.counters),
+            }
+
+    def write_report(self, path=None):
+        # 実行ごとのJSONレポートを保存し、そのパスを返す
+        path = Path(path) if path else self.report_dir / f"run_{self.started:%Y%m%d_%H%M%S}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False))
+        return path
+
+    def summary(self):
+        # ステージごとの処理時間とカウンタを表示する
+        for record in self.stages:
+            print(f"[timing] {record['stage']:<32s} {record['wall_seconds']:8.2f}s "
+                  f"cpu {record['cpu_seconds']:8.2f}s  peak {record['peak_rss_mb']:8.1f}MB  {record['status']}")
+        for name, value in sorted(self.counters.items()):
+            print(f"[count]  {name:<32s} {value}")
+
+
+# プロセス全体で共有する計測器（スクリプトはこれを使う）
+instrument = Instrumentation()
+
+
+def configure(report_dir=REPORT_DIR, profile_stages=(), sample_interval=SAMPLE_INTERVAL):
+    # 共有の計測器を作り直す（実行の最初に呼ぶ）
+    global instrument
+    instrument = Instrumentation(report_dir, profile_stages, sample_interval)
+    return instrument
+
+
+def count(name, n=1):
+    instrument.count(name, n)
+
+
+def stage(name):
+    return instrument.stage(name)
+
+
+def timed(name=None):
+    # デコレート時点ではなく呼び出し時点の共有計測器で計測する
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with instrument.stage(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,9 @@
+from pathlib import Path
+
+# リポジトリのルートと出力先（実行ディレクトリに依存しないよう絶対パスで持つ）
+ROOT_DIR = Path(__file__).resolve().parents[1]
+OUTPUT_DIR = ROOT_DIR / "outputs"
+CSV_DIR = OUTPUT_DIR / "csv"
+PARQUET_DIR = OUTPUT_DIR / "parquet"
+PLOT_DIR = OUTPUT_DIR / "plots"
+CACHE_DIR = OUTPUT_DIR / "cache"
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+
+class PercentileIndex:
+    """
+    リーグ全体の数値列を一度だけソートしておき、パーセンタイル・順位を二分探索で返すインデックス
+    method="strict": 値より小さい選手の割合（欠損の選手も分母に含む。(df[col] < v).mean() と同じ）
+    method="rank": df[col].rank(pct=True) と同じ平均順位のパーセンタイル（欠損は除く）
+    """
+
+    def __init__(self, df, columns=None, key="PLAYER_ID"):
+        if columns is None:
+            columns = [col for col in df.select_dtypes("number").columns if col != key]
+        self.columns = list(columns)
+        self.key = key
+        self.n_rows = len(df)
+        values = df[self.columns].to_numpy(dtype=float)
+        # 欠損値は末尾に並ぶので、有効な値の件数だけ見ればよい
+        self._sorted = np.sort(values, axis=0)
+        self._n_valid = (~np.isnan(values)).sum(axis=0)
+        self._values = values
+        self._index = pd.Index(df[key].to_numpy() if key in df else df.index)
+
+    def update(self, df):
+        """
+        選手の値を追加・更新する（新しい選手は追加、既存の選手は値を差し替える）
+        並べ替え済みの列から古い値を除いて新しい値を二分探索の位置に挿入するので、全体を並べ直さずに済む
+        """
+        keys = df[self.key].to_numpy() if self.key in df else df.index.to_numpy()
+        rows = df[self.columns].to_numpy(dtype=float)
+        for key, row in zip(keys, rows):
+            position = self._index.get_indexer([key])[0]
+            if position < 0:
+                old = None
+                self._values = np.vstack([self._values, row])
+                self._index = self._index.append(pd.Index([key]))
+                self.n_rows += 1
+            else:
+                old = self._values[position].copy()
+                self._values[position] = row
+            columns = []
+            for j, value in enumerate(row):
+                column, n_valid = self._sorted[:, j], self._n_valid[j]
+                if old is not None:
+                    # 欠損値は末尾に並んでいるので、古い値が欠損なら末尾を1つ除く
+                    drop = len(column) - 1 if np.isnan(old[j]) else np.searchsorted(column[:n_valid], old[j])
+                    column = np.delete(column, drop)
+                    n_valid -= int(not np.isnan(old[j]))
+                at = len(column) if np.isnan(value) else np.searchsorted(column[:n_valid], value)
+                columns.append(np.insert(column, at, value))
+                self._n_valid[j] = n_valid + int(not np.isnan(value))
+            self._sorted = np.column_stack(columns) if columns else self._sorted
+
+    def _column(self, metric):
+        j = self.columns.index(metric)
+        return self._sorted[:self._n_valid[j], j], self._n_valid[j]
+
+    def percentile(self, metric, values, method="strict"):
+        # 値（スカラー・配列）の列metricにおけるパーセンタイル（0〜100）
+        sorted_values, n_valid = self._column(metric)
+        values = np.asarray(values, dtype=float)
+        left = np.searchsorted(sorted_values, values, side="left")
+        if method == "strict":
+            result = left / self.n_rows * 100
+        elif method == "rank":
+            right = np.searchsorted(sorted_values, values, side="right")
+            result = (left + (right - left + 1) / 2) / n_valid * 100
+        else:
+            raise ValueError(f"methodは 'strict' か 'rank' を指定してください: {method}")
+        return np.where(np.isnan(values), np.nan, result)
+
+    def lookup(self, players, metrics=None, method="strict"):
+        """
+        指定した選手（keyの値）×指標のパーセンタイル表を返す
+        """
+        metrics = self.columns if metrics is None else list(metrics)
+        players = list(players)
+        positions = self._index.get_indexer(players)
+        if (positions < 0).any():
+            missing = [p for p, pos in zip(players, positions) if pos < 0]
+            raise KeyError(f"インデックスに存在しない選手です: {missing}")
+        return pd.DataFrame(
+            {metric: self.percentile(metric, self._values[positions, self.columns.index(metric)], method)
+             for metric in metrics},
+            index=pd.Index(players, name=self.key),
+        )
+
+    def matrix(self, metrics=None, method="strict"):
+        """
+        全選手×全指標のパーセンタイル行列
+        """
+        metrics = self.columns if metrics is None else list(metrics)
+        return pd.DataFrame(
+            {metric: self.percentile(metric, self._values[:, self.columns.index(metric)], method)
+             for metric in metrics},
+            index=self._index.rename(self.key),
+        )
@@ -0,0 +1,146 @@
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+from utils import instrumentation
+from utils.paths import OUTPUT_DIR
+
+# 各ステージの前回実行時のキーを保存するファイル
+STATE_PATH = OUTPUT_DIR / ".pipeline_state.json"
+
+
+def content_hash(paths):
+    # ファイル（ディレクトリは配下の全ファイル）の中身からハッシュを作る
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        files = sorted(f for f in path.rglob("*") if f.is_file()) if path.is_dir() else [path]
+        for f in files:
+            digest.update(str(f).encode())
+            if f.exists():
+                digest.update(f.read_bytes())
+    return digest.hexdigest()
+
+
+def _is_empty(result):
+    return result is None or (hasattr(result, "__len__") and len(result) == 0)
+
+
+class Stage:
+    """
+    パイプラインの1ステージ
+    func: 依存ステージの結果を位置引数で受け取る関数
+    deps: 依存ステージ名, inputs: 中身が変わったら再実行するファイル・ディレクトリ
+    outputs: 生成するファイル（無ければ再実行する）
+    save_empty: Falseなら結果が空（None・長さ0）のときは実行済みとして記録せず、次回も実行する
+    （APIの取得に失敗して空になった結果で後続ステージがスキップされ続けないようにする）
+    """
+
+    def __init__(self, name, func, deps=(), inputs=(), outputs=(), save_empty=True):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.save_empty = save_empty
+
+    def fingerprint(self):
+        # 関数と定義元モジュールのソースコードを含めて、ヘルパー関数の変更時にも再実行されるようにする
+        digest = hashlib.sha256()
+        for obj in (self.func, inspect.getmodule(self.func)):
+            try:
+                source = inspect.getsource(obj)
+            except (OSError, TypeError):
+                source = getattr(obj, "__qualname__", repr(obj))
+            digest.update(source.encode())
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    ステージの依存グラフ（例: ingest → features → models → plots）を1プロセスで実行する
+    各ステージの結果はメモリに保持して後続ステージに渡す
+    入力の内容ハッシュ・コード・上流のキーが前回と同じステージはスキップし、
+    スキップしたステージの結果は後続ステージが必要としたときだけ計算する
+    """
+
+    def __init__(self, state_path=STATE_PATH):
+        self.stages = {}
+        self.state_path = Path(state_path)
+        self._results = {}
+        self._keys = {}
+
+    def add(self, name, func, deps=(), inputs=(), outputs=(), save_empty=True):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"未定義の依存ステージです: {name} → {dep}")
+        self.stages[name] = Stage(name, func, deps, inputs, outputs, save_empty)
+        return self
+
+    def _order(self, targets):
+        # 対象ステージとその上流をトポロジカル順に並べる（addは依存先が定義済みなので定義順で良い）
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def _key(self, name):
+        if name not in self._keys:
+            stage = self.stages[name]
+            digest = hashlib.sha256(stage.fingerprint().encode())
+            digest.update(content_hash(stage.inputs).encode())
+            for dep in stage.deps:
+                digest.update(self._key(dep).encode())
+            self._keys[name] = digest.hexdigest()
+        return self._keys[name]
+
+    def result(self, name):
+        # ステージの結果を返す（未計算なら上流から順に計算する）
+        if name not in self._results:
+            stage = self.stages[name]
+            args = [self.result(dep) for dep in stage.deps]
+            print(f"[pipeline] run: {name}")
+            with instrumentation.stage(name):
+                self._results[name] = stage.func(*args)
+        return self._results[name]
+
+    def _load_state(self):
+        if self.state_path.exists():
+            return json.loads(self.state_path.read_text())
+        return {}
+
+    def _save_state(self, state):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def run(self, targets=None, force=False):
+        targets = targets or list(self.stages)
+        state = self._load_state()
+        for name in self._order(targets):
+            stage = self.stages[name]
+            key = self._key(name)
+            outputs_exist = all(Path(p).exists() for p in stage.outputs)
+            if not force and state.get(name) == key and outputs_exist:
+                print(f"[pipeline] skip: {name}")
+                instrumentation.count("stages_skipped")
+                continue
+            result = self.result(name)
+            if not stage.save_empty and _is_empty(result):
+                print(f"[pipeline] 結果が空のため記録しません: {name}")
+                state.pop(name, None)
+                self._save_state(state)
+                continue
+            if stage.inputs:
+                # ステージ自身が入力を書き込む場合（APIのキャッシュなど）に備え、実行後の入力でキーを求め直す
+                self._keys.pop(name)
+                key = self._key(name)
+            state[name] = key
+            self._save_state(state)
+        return self._results
@@ -0,0 +1,229 @@
+import json
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils import instrumentation
+from utils.cache import cached_frames
+from utils.fetcher import backoff_delay
+
+# リトライしてよいHTTPステータス（レート制限・サーバー側の一時的なエラー）
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが開いているためリクエストを送らなかった"""
+
+
+class RetryBudgetExceeded(RuntimeError):
+    """ポリシー全体のリトライ回数の上限に達した"""
+
+
+def is_retryable(exc):
+    # タイムアウト・接続エラー・429/5xxだけをリトライする（パラメータ誤りなどは即座に失敗させる）
+    # ステータスが取れずに本文がJSONでない応答（レート制限時の空の本文・HTMLなど）も一時的な失敗として扱う
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, json.JSONDecodeError)):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+class CircuitBreaker:
+    """
+    エンドポイントごとのサーキットブレーカー
+    連続failure_threshold回失敗すると開き、reset_timeout秒たつまでリクエストを送らずに失敗させる
+    その後の1回（half-open）が成功すれば閉じ、失敗すれば再び開く
+    half-openで試行中のリクエストがある間は、他の呼び出しもCircuitOpenErrorで失敗させる
+    数えるのは一時的な障害（RequestPolicyのretryableに当たる失敗）だけで、パラメータ誤りなどは数えない
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == "open":
+                raise CircuitOpenError(f"サーキットが開いています（残り {self._remaining():.0f}s）")
+            if state == "half-open":
+                if self._trial_in_flight:
+                    raise CircuitOpenError("サーキットが半開で、試行中のリクエストの結果を待っています")
+                self._trial_in_flight = True
+
+    def _remaining(self):
+        return self.reset_timeout - (time.monotonic() - self._opened_at)
+
+    def record_success(self):
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if self._state() == "half-open" or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        # 障害として数えない失敗（パラメータ誤りなど）の後、状態は変えずに半開の試行枠だけ空ける
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class EndpointMetrics:
+    """エンドポイントごとの呼び出し回数・リトライ・エラー・レイテンシ"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(int)
+        self._successes = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._retries = defaultdict(int)
+        self._rejected = defaultdict(int)
+        self._latencies = defaultdict(list)
+
+    def record(self, endpoint, latency=None, success=None, retry=False, rejected=False):
+        with self._lock:
+            if latency is not None:
+                self._calls[endpoint] += 1
+                self._latencies[endpoint].append(latency)
+                (self._successes if success else self._errors)[endpoint] += 1
+            self._retries[endpoint] += int(retry)
+            self._rejected[endpoint] += int(rejected)
+
+    def summary(self):
+        # エンドポイント×指標の表（レイテンシは秒）
+        with self._lock:
+            endpoints = sorted(set(self._calls) | set(self._rejected))
+            rows = []
+            for endpoint in endpoints:
+                latencies = np.asarray(self._latencies[endpoint], dtype=float)
+                has_latency = len(latencies) > 0
+                rows.append({
+                    "endpoint": endpoint,
+                    "calls": self._calls[endpoint],
+                    "successes": self._successes[endpoint],
+                    "errors": self._errors[endpoint],
+                    "retries": self._retries[endpoint],
+                    "rejected": self._rejected[endpoint],
+                    "latency_mean": latencies.mean() if has_latency else np.nan,
+                    "latency_p50": np.percentile(latencies, 50) if has_latency else np.nan,
+                    "latency_p95": np.percentile(latencies, 95) if has_latency else np.nan,
+                    "latency_max": latencies.max() if has_latency else np.nan,
+                })
+        return pd.DataFrame(rows).set_index("endpoint") if rows else pd.DataFrame()
+
+
+class RequestPolicy:
+    """
+    APIリクエストのリトライ・タイムアウト・サーキットブレーカー・メトリクスをまとめたポリシー
+    max_attempts: 1リクエストあたりの最大試行回数
+    retry_budget: ポリシー全体で許すリトライの合計回数（障害時に全リクエストがリトライし続けるのを防ぐ）
+    timeout: 1回のHTTPリクエストのタイムアウト（秒）
+    クエリのパラメータは変更しない。リトライしても失敗した場合は例外をそのまま送出する
+    """
+
+    def __init__(self, max_attempts=3, retry_budget=20, timeout=30, base_delay=1.0, max_delay=30.0,
+                 failure_threshold=5, reset_timeout=60.0, retryable=is_retryable, verbose=True):
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retryable = retryable
+        self.verbose = verbose
+        self.metrics = EndpointMetrics()
+        self._breakers = {}
+        self._retries_used = 0
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[endpoint]
+
+    def _take_retry(self):
+        with self._lock:
+            if self._retries_used >= self.retry_budget:
+                return False
+            self._retries_used += 1
+            return True
+
+    def call(self, endpoint, func, *args, **kwargs):
+        """
+        func(*args, **kwargs) をポリシーに従って実行する
+        サーキットが開いていればCircuitOpenError、リトライ予算が尽きればRetryBudgetExceededを送出する
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                self.metrics.record(endpoint, rejected=True)
+                instrumentation.count("circuit_rejections")
+                raise
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.metrics.record(endpoint, time.perf_counter() - start, success=False)
+                if not self.retryable(e):
+                    # パラメータ誤りなどはエンドポイントの障害ではないので、サーキットの状態を変えずに送出する
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    raise
+                if not self._take_retry():
+                    raise RetryBudgetExceeded(f"リトライ予算（{self.retry_budget}回）を使い切りました: {endpoint}") from e
+                delay = backoff_delay(attempt - 1, self.base_delay, self.max_delay)
+                if self.verbose:
+                    print(f"Retry {endpoint} in {delay:.1f}s ({attempt}/{self.max_attempts - 1}): {e}")
+                self.metrics.record(endpoint, retry=True)
+                instrumentation.count("retries")
+                time.sleep(delay)
+                continue
+            self.metrics.record(endpoint, time.perf_counter() - start, success=True)
+            breaker.record_success()
+            return result
+
+    def frames(self, endpoint_cls, **params):
+        # cached_framesをポリシー経由で呼ぶ（キャッシュにあればリクエストは送らない）
+        return self.call(endpoint_cls.__name__, cached_frames, endpoint_cls, timeout=self.timeout, **params)
+
+    def report(self):
+        summary = self.metrics.summary()
+        if summary.empty:
+            return summary
+        summary["circuit"] = [self.breaker(endpoint).state for endpoint in summary.index]
+        print(summary.round(3).to_string())
+        return summary
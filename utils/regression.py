@@ -0,0 +1,92 @@
+import numpy as np
+from scipy import stats
+
+# X^T X の固有値がこの値×最大固有値以下なら0（共線な方向）とみなす
+EIGEN_TOL = 1e-10
+
+
+def _group_index(df, by):
+    # グループ順に並べ替え、各グループの先頭位置と件数を返す
+    data = df.sort_values(by, kind="stable")
+    keys = data[by].drop_duplicates()
+    codes = data.groupby(by, sort=False, observed=True).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(data)])
+    return data, keys.reset_index(drop=True), starts, counts
+
+
+def _pinv_psd(matrix, tol=EIGEN_TOL):
+    # 半正定値行列のスタックの擬似逆行列と階数（1回の固有値分解でまとめて計算）
+    eigvals, eigvecs = np.linalg.eigh(matrix)
+    cutoff = tol * np.maximum(eigvals.max(axis=-1, keepdims=True), tol)
+    nonzero = eigvals > cutoff
+    weight = np.where(nonzero, 1 / np.where(nonzero, eigvals, 1), 0)
+    inverse = np.einsum("...ij,...j,...kj->...ik", eigvecs, weight, eigvecs)
+    return inverse, nonzero.sum(axis=-1)
+
+
+def grouped_ols(df, target, features, by="PLAYER_ID", standardize=True):
+    """
+    グループ（選手、選手×シーズンなど）ごとに定数項付きOLSを当てはめる
+    グループ内で中心化した積和をreduceatで集計し、全グループの正規方程式をまとめて解く
+    standardize=True の場合はグループごとにStandardScaler（母標準偏差）で標準化した係数を返す
+    （run_regression・LinearRegressionのモデルと同じ係数・p値になる）
+    戻り値: グループ×項（const + features）ごとの係数・標準誤差・t値・p値と、
+            グループごとの N・R2・Adj_R2・F値・Fのp値を持つtidyなDataFrame
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    features = list(features)
+    data = df[by + [target] + features].dropna()
+    data, keys, starts, counts = _group_index(data, by)
+    X = data[features].to_numpy(dtype=float)
+    y = data[target].to_numpy(dtype=float)
+    n = counts.astype(float)
+
+    # グループ内で中心化（定数項の分をここで取り除く）
+    x_mean = np.add.reduceat(X, starts, axis=0) / n[:, None]
+    y_mean = np.add.reduceat(y, starts) / n
+    Xc = X - np.repeat(x_mean, counts, axis=0)
+    yc = y - np.repeat(y_mean, counts)
+
+    xtx = np.add.reduceat(Xc[:, :, None] * Xc[:, None, :], starts, axis=0)
+    xty = np.add.reduceat(Xc * yc[:, None], starts, axis=0)
+    tss = np.add.reduceat(yc ** 2, starts)
+
+    inverse, rank = _pinv_psd(xtx)
+    beta = np.einsum("gij,gj->gi", inverse, xty)
+    rss = np.clip(tss - np.einsum("gi,gi->g", beta, xty), 0, None)
+    df_resid = n - rank - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = df_resid > 0
+        sigma2 = np.where(valid, rss / np.where(valid, df_resid, 1), np.nan)
+        se = np.sqrt(sigma2[:, None] * np.diagonal(inverse, axis1=1, axis2=2))
+        if standardize:
+            # 標準化したXの係数・標準誤差は元の係数 × 標準偏差。定数項はyの平均
+            scale = np.sqrt(np.diagonal(xtx, axis1=1, axis2=2) / n[:, None])
+            beta, se = beta * scale, se * scale
+            intercept = y_mean
+            intercept_se = np.sqrt(sigma2 / n)
+        else:
+            intercept = y_mean - np.einsum("gi,gi->g", x_mean, beta)
+            intercept_se = np.sqrt(sigma2 * (1 / n + np.einsum("gi,gij,gj->g", x_mean, inverse, x_mean)))
+
+        r2 = 1 - rss / tss
+        adj_r2 = 1 - (1 - r2) * (n - 1) / df_resid
+        f_value = (r2 / rank) / ((1 - r2) / df_resid)
+    f_pvalue = stats.f.sf(f_value, rank, df_resid)
+
+    coef = np.column_stack([intercept, beta])
+    std_err = np.column_stack([intercept_se, se])
+    t_value = coef / std_err
+    p_value = 2 * stats.t.sf(np.abs(t_value), df_resid[:, None])
+
+    n_groups, n_terms = coef.shape
+    result = keys.loc[np.repeat(np.arange(n_groups), n_terms)].reset_index(drop=True)
+    result["Feature"] = np.tile(["const"] + features, n_groups)
+    result["Coefficient"] = coef.ravel()
+    result["Std_Error"] = std_err.ravel()
+    result["T_value"] = t_value.ravel()
+    result["P_value"] = p_value.ravel()
+    for name, values in [("N", counts), ("R2", r2), ("Adj_R2", adj_r2), ("F_value", f_value), ("F_pvalue", f_pvalue)]:
+        result[name] = np.repeat(values, n_terms)
+    return result
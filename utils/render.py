@@ -0,0 +1,131 @@
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import instrumentation
+from utils.paths import OUTPUT_DIR
+
+# 各図の前回描画時のハッシュを保存するファイル
+MANIFEST_PATH = OUTPUT_DIR / ".render_manifest.json"
+
+
+class FigureSpec:
+    """
+    描画する1枚の図
+    func: func(data, path, **kwargs) の形でpathに図を保存するモジュールレベルの関数
+    （プロセスプールに渡すためpickle可能である必要がある）
+    """
+
+    def __init__(self, func, data, path, **kwargs):
+        self.func = func
+        self.data = data
+        self.path = Path(path)
+        self.kwargs = kwargs
+
+    def data_hash(self):
+        # 入力データ・描画関数のソース・引数・出力先から図のハッシュを作る
+        digest = hashlib.sha256()
+        _update_hash(digest, self.data)
+        _update_hash(digest, self.kwargs)
+        try:
+            digest.update(inspect.getsource(self.func).encode())
+        except (OSError, TypeError):
+            digest.update(self.func.__qualname__.encode())
+        digest.update(str(self.path).encode())
+        return digest.hexdigest()
+
+
+def _update_hash(digest, obj):
+    # DataFrame・配列・dict・listを再帰的にハッシュへ反映する
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        names = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        digest.update(repr(list(names)).encode())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(repr(key).encode())
+            _update_hash(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update_hash(digest, item)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def _init_worker():
+    # ワーカーは非対話のAggバックエンドで描画する
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render(func, data, path, kwargs):
+    import matplotlib.pyplot as plt
+    path.parent.mkdir(parents=True, exist_ok=True)
+    func(data, path, **kwargs)
+    plt.close("all")
+    return path
+
+
+def _load_manifest(manifest_path):
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text())
+    return {}
+
+
+def _save_manifest(manifest, manifest_path):
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+
+
+def render_all(specs, max_workers=None, force=False, manifest_path=MANIFEST_PATH, verbose=True):
+    """
+    図をプロセスプール（Aggバックエンド）でまとめて描画する
+    入力データのハッシュが前回と同じで、出力ファイルが残っている図はスキップする
+    描画したファイルパスのリストを返す
+    """
+    manifest_path = Path(manifest_path)
+    manifest = _load_manifest(manifest_path)
+
+    pending = []
+    for spec in specs:
+        key = spec.data_hash()
+        if not force and manifest.get(str(spec.path)) == key and spec.path.exists():
+            instrumentation.count("figures_skipped")
+            if verbose:
+                print(f"[render] skip: {spec.path.name}")
+            continue
+        pending.append((spec, key))
+
+    rendered = []
+    if not pending:
+        return rendered
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(_render, spec.func, spec.data, spec.path, spec.kwargs): (spec, key)
+            for spec, key in pending
+        }
+        try:
+            for future in as_completed(futures):
+                spec, key = futures[future]
+                rendered.append(future.result())
+                manifest[str(spec.path)] = key
+                instrumentation.count("figures_rendered")
+                if verbose:
+                    print(f"[render] done: {spec.path.name}")
+        finally:
+            # 途中で失敗しても描画できた図の分は記録しておく
+            _save_manifest(manifest, manifest_path)
+    return rendered
@@ -0,0 +1,175 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 1バッチで作る (リサンプル数 × 行数) の行列の要素数の上限（メモリを抑えるため）
+MAX_BATCH_ELEMENTS = 20_000_000
+
+
+def _design(X):
+    # 定数項付きの計画行列
+    X = np.asarray(X, dtype=float)
+    return np.column_stack([np.ones(len(X)), X])
+
+
+def _batch_sizes(n_resamples, n_rows, batch_size):
+    batch_size = batch_size or max(1, min(n_resamples, MAX_BATCH_ELEMENTS // max(n_rows, 1)))
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        sizes.append(n_resamples % batch_size)
+    return sizes
+
+
+def _solve(gram, rhs):
+    # バッチの正規方程式を解く（特異な場合は擬似逆行列）
+    try:
+        return np.linalg.solve(gram, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum("bij,bj->bi", np.linalg.pinv(gram), rhs)
+
+
+def _bootstrap_batch(X, y, n_resamples, seed, standardize):
+    """
+    n_resamples個のブートストラップ標本の係数をまとめて求める
+    各標本は行の出現回数（重み）で表し、重み×(z zᵀ, z y) の行列積で全標本の正規方程式を一度に作る
+    """
+    rng = np.random.default_rng(seed)
+    Z = _design(X)
+    n, p = Z.shape
+    outer = (Z[:, :, None] * Z[:, None, :]).reshape(n, p * p)
+    zy = Z * y[:, None]
+
+    # 復元抽出した行番号 → 行ごとの出現回数
+    idx = rng.integers(0, n, size=(n_resamples, n))
+    counts = np.bincount((idx + np.arange(n_resamples)[:, None] * n).ravel(), minlength=n_resamples * n)
+    counts = counts.reshape(n_resamples, n).astype(float)
+
+    gram = (counts @ outer).reshape(n_resamples, p, p)
+    rhs = counts @ zy
+    beta = _solve(gram, rhs)
+    if standardize:
+        # 標本ごとに標準化（母標準偏差）した係数。定数項はyの標本平均
+        mean = gram[:, 0, 1:] / n
+        var = np.clip(np.diagonal(gram, axis1=1, axis2=2)[:, 1:] / n - mean ** 2, 0, None)
+        beta = np.column_stack([rhs[:, 0] / n, beta[:, 1:] * np.sqrt(var)])
+    return beta
+
+
+def _permutation_batch(X, y, n_resamples, seed):
+    """
+    Freedman–Lane法の置換検定の統計量（各係数のt値）をまとめて求める
+    変数jを除いたモデルの当てはめ値 ŷ_j = Z c_j と残差 e_j から y* = ŷ_j + P e_j を作ってフルモデルに当てはめる
+    必要な量はすべて Zᵀ P E（Eは全変数の残差を並べた行列）から求まるので、置換ごとの計算はこの積だけ
+    戻り値: (置換数, 変数の数) のt値
+    """
+    rng = np.random.default_rng(seed)
+    Z = _design(X)
+    n, p = Z.shape
+    k = p - 1
+    gram = Z.T @ Z
+    inverse = np.linalg.pinv(gram)
+    df_resid = n - p
+
+    # 変数jを除いたモデルの係数 c_j（jの位置は0）と残差 e_j
+    C = np.zeros((p, k))
+    for j in range(1, p):
+        reduced = np.delete(np.arange(p), j)
+        C[reduced, j - 1] = np.linalg.lstsq(Z[:, reduced], y, rcond=None)[0]
+    fitted = Z @ C
+    E = y[:, None] - fitted
+    zy_fitted = gram @ C                                               # Zᵀŷ_j
+    base_ss = np.einsum("ik,ik->k", fitted, fitted) + np.einsum("ik,ik->k", E, E)
+    terms = np.arange(1, p)
+
+    t_values = np.empty((n_resamples, k))
+    chunk = max(1, MAX_BATCH_ELEMENTS // (n * p))
+    for start in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - start)
+        perms = np.tile(np.arange(n), (size, 1))
+        for row in perms:
+            rng.shuffle(row)
+        # (Pᵀ Z)ᵀ E を並べ替えた計画行列と残差の1回の行列積で求める（Pが一様ならPᵀも一様）
+        permuted = np.take(Z.T, perms, axis=1).reshape(p * size, n)
+        A = (permuted @ E).reshape(p, size, k).transpose(1, 0, 2)    # Zᵀ P E: (置換数, p, k)
+        zy = zy_fitted + A                                             # Zᵀy*
+        beta = np.einsum("pq,bqk->bpk", inverse, zy)
+        # ||y*||² = ||ŷ||² + ||e||² + 2 c_jᵀ Zᵀ P e_j（ŷ_j = Z c_j なので）
+        yy = base_ss + 2 * np.einsum("pk,bpk->bk", C, A)
+        rss = np.clip(yy - np.einsum("bpk,bpk->bk", beta, zy), 0, None)
+        se = np.sqrt(rss / df_resid * inverse[terms, terms])
+        t_values[start:start + size] = beta[:, terms, np.arange(k)] / se
+    return t_values
+
+
+def _run_batches(func, args, n_resamples, n_rows, seed, batch_size, max_workers):
+    # バッチに分けてプロセスプールで実行する（乱数は各バッチに独立なシードを割り当てる）
+    sizes = _batch_sizes(n_resamples, n_rows, batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(sizes))
+    if max_workers <= 1:
+        return np.concatenate([func(*args[:2], size, s, *args[2:]) for size, s in zip(sizes, seeds)])
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, *args[:2], size, s, *args[2:]) for size, s in zip(sizes, seeds)]
+        return np.concatenate([future.result() for future in futures])
+
+
+def _clean(df, target, features):
+    data = df[[target] + list(features)].dropna()
+    return data[features].to_numpy(dtype=float), data[target].to_numpy(dtype=float)
+
+
+def fit_ols(X, y, standardize=True):
+    # 全標本での係数（StandardScaler + LinearRegressionと同じ）
+    beta = _solve((_design(X).T @ _design(X))[None], (_design(X).T @ y)[None])[0]
+    if standardize:
+        beta = np.r_[y.mean(), beta[1:] * X.std(axis=0)]
+    return beta
+
+
+def bootstrap_ols(df, target, features, n_resamples=10000, ci=0.95, standardize=True, seed=0,
+                  batch_size=None, max_workers=None):
+    """
+    ペアブートストラップ（行の復元抽出）でOLS係数の標準誤差とパーセンタイル信頼区間を求める
+    戻り値: 項（const + features）ごとの Coefficient, Boot_SE, CI_low, CI_high
+    """
+    X, y = _clean(df, target, features)
+    draws = _run_batches(_bootstrap_batch, (X, y, standardize), n_resamples, len(y), seed, batch_size, max_workers)
+    alpha = (1 - ci) / 2
+    return pd.DataFrame({
+        "Coefficient": fit_ols(X, y, standardize),
+        "Boot_SE": np.nanstd(draws, axis=0, ddof=1),
+        "CI_low": np.nanquantile(draws, alpha, axis=0),
+        "CI_high": np.nanquantile(draws, 1 - alpha, axis=0),
+    }, index=pd.Index(["const"] + list(features), name="Feature"))
+
+
+def permutation_test(df, target, features, n_resamples=10000, seed=0, batch_size=None, max_workers=None):
+    """
+    Freedman–Lane法の置換検定で各係数（定数項以外）のp値を求める
+    正規性を仮定しないので、残差が正規分布から外れていても使える
+    戻り値: 変数ごとの T_value と P_perm（両側、(1 + 極端な置換の数) / (1 + 置換数)）
+    """
+    X, y = _clean(df, target, features)
+    Z = _design(X)
+    inverse = np.linalg.pinv(Z.T @ Z)
+    beta = inverse @ Z.T @ y
+    resid = y - Z @ beta
+    se = np.sqrt(resid @ resid / (len(y) - Z.shape[1]) * np.diagonal(inverse))
+    t_obs = (beta / se)[1:]
+
+    t_perm = _run_batches(_permutation_batch, (X, y), n_resamples, len(y), seed, batch_size, max_workers)
+    extreme = (np.abs(t_perm) >= np.abs(t_obs) - 1e-12).sum(axis=0)
+    return pd.DataFrame({
+        "T_value": t_obs,
+        "P_perm": (extreme + 1) / (n_resamples + 1),
+    }, index=pd.Index(list(features), name="Feature"))
+
+
+def resampling_summary(df, target, features, n_resamples=10000, ci=0.95, standardize=True, seed=0,
+                       batch_size=None, max_workers=None):
+    # ブートストラップ信頼区間と置換検定のp値を1つの表にまとめる
+    boot = bootstrap_ols(df, target, features, n_resamples, ci, standardize, seed, batch_size, max_workers)
+    perm = permutation_test(df, target, features, n_resamples, seed, batch_size, max_workers)
+    return boot.join(perm).reset_index()
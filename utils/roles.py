@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+def _group_codes(df, by):
+    # 行ごとのグループ番号（by=[]なら全体で1グループ）
+    if not by:
+        return np.zeros(len(df), dtype=int), 1
+    codes = df.groupby(by, sort=False, observed=True).ngroup().to_numpy()
+    return codes, codes.max() + 1 if len(codes) else 0
+
+
+def _row_values(df, value):
+    """
+    スカラー・列名・Series（indexの名前がdfの列名）で指定された値を行ごとの配列に展開する
+    例: pd.Series({"2023-24": 19.5, "2024-25": 20}).rename_axis("SEASON")
+        pd.Series(...) をindex (SEASON, TEAM_ABBREVIATION) で持てばシーズン×チームごとの値
+    """
+    if isinstance(value, str):
+        return df[value].to_numpy(dtype=float)
+    if isinstance(value, pd.Series):
+        names = list(value.index.names)
+        keys = pd.MultiIndex.from_frame(df[names]) if len(names) > 1 else pd.Index(df[names[0]])
+        positions = value.index.get_indexer(keys)
+        if (positions < 0).any():
+            missing = keys[positions < 0].unique().tolist()
+            raise KeyError(f"しきい値が定義されていないグループです: {missing}")
+        return value.to_numpy(dtype=float)[positions]
+    return np.full(len(df), float(value))
+
+
+def group_quantile_edges(values, codes, n_groups, quantiles, mask=None):
+    """
+    グループごとの分位点（pandasのquantileと同じ線形補間）を (グループ数, 分位点数) の配列で返す
+    maskがFalseの行・欠損値は分位点の計算から除く
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values) if mask is None else mask & ~np.isnan(values)
+    edges = pd.Series(values[valid]).groupby(codes[valid]).quantile(list(quantiles)).unstack()
+    return edges.reindex(np.arange(n_groups)).to_numpy()
+
+
+def digitize_by_group(values, edges, codes):
+    """
+    各行を自分のグループの分位点で区切った区間番号（0〜分位点数）にする
+    np.digitize(right=False) をグループごとに別のedgesで行うのと同じ結果を1回の比較で求める
+    """
+    values = np.asarray(values, dtype=float)
+    return (values[:, None] >= edges[codes]).sum(axis=1)
+
+
+def assign_roles(df, usg_col="USG_PCT", ts_col="TS_PCT", by=("SEASON",), usg_threshold=20,
+                 quantiles=(0.33, 0.66), edges=None):
+    """
+    全選手のロールを1回のベクトル演算で割り当てる
+    USGがしきい値未満の選手はグループ（by）内のTS分位点で 0, 1, ..., len(quantiles) に分け、
+    しきい値以上の選手は len(quantiles) + 1 にする
+    usg_threshold: スカラー、列名、またはグループ（シーズン・チームなど）をindexに持つSeries
+    edges: 集計済みの分位点（グループをindexに、分位点を列に持つDataFrame）。渡せば分位点の計算を省く
+    戻り値: dfと同じ行順のロール番号（int）の配列。dfはコピーしない
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    usg = df[usg_col].to_numpy(dtype=float)
+    ts = df[ts_col].to_numpy(dtype=float)
+    high_usg = usg >= _row_values(df, usg_threshold)
+
+    if edges is None:
+        codes, n_groups = _group_codes(df, by)
+        edges = group_quantile_edges(ts, codes, n_groups, quantiles, mask=~high_usg)
+    else:
+        # 行ごとに自分のグループの分位点を並べ、各行を1グループとして区切る
+        edges = np.column_stack([_row_values(df, edges[col]) for col in edges.columns])
+        codes = np.arange(len(df))
+    roles = digitize_by_group(ts, edges, codes)
+    return np.where(high_usg, len(quantiles) + 1, roles)
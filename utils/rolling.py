@@ -0,0 +1,108 @@
+import numpy as np
+
+from utils.schema import parse_dates
+
+
+def sufficient_stats(Z, y):
+    # 1試合ごとの (z zᵀ, z y, y²) を1行に並べる（Zは定数項付きの計画行列）。行の和が正規方程式になる
+    n, p = Z.shape
+    outer = (Z[:, :, None] * Z[:, None, :]).reshape(n, p * p)
+    return np.column_stack([outer, Z * y[:, None], y * y])
+
+
+def solve_sufficient(sums, count, p, standardize=True):
+    """
+    sufficient_statsの行の合計（sums: (件数, p*p + p + 1)）から、それぞれの定数項付きOLSを解く
+    変数が定数（例: 3Pを1本も打っていない）でも解けるよう擬似逆行列で解く
+    standardize: 標準化した係数（StandardScaler + LinearRegressionと同じ）にする
+    戻り値: 係数 (件数, p) と R2 (件数,)
+    """
+    m = np.asarray(count, dtype=float)
+    gram = sums[:, :p * p].reshape(-1, p, p)
+    zy = sums[:, p * p:p * p + p]
+    yy = sums[:, -1]
+    beta = np.einsum("bij,bj->bi", np.linalg.pinv(gram, hermitian=True), zy)
+    y_mean = zy[:, 0] / m
+    tss = yy - m * y_mean ** 2
+    rss = yy - np.einsum("bi,bi->b", beta, zy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = np.where(tss > 0, 1 - rss / tss, np.nan)
+    if standardize:
+        # 母標準偏差を掛ける。定数項はyの平均
+        mean = gram[:, 0, 1:] / m[:, None]
+        var = np.clip(np.diagonal(gram, axis1=1, axis2=2)[:, 1:] / m[:, None] - mean ** 2, 0, None)
+        beta = np.column_stack([y_mean, beta[:, 1:] * np.sqrt(var)])
+    return beta, r2
+
+
+def _window_bounds(groups, window, expanding):
+    # 各試合を末尾とする窓の先頭位置（選手が変わるところで窓を切る）
+    n = len(groups)
+    idx = np.arange(n)
+    is_start = np.r_[True, groups[1:] != groups[:-1]]
+    group_start = np.maximum.accumulate(np.where(is_start, idx, 0))
+    if expanding:
+        return group_start
+    return np.maximum(group_start, idx + 1 - window)
+
+
+def rolling_ols(df, target, features, window=20, expanding=False, by="PLAYER_ID", order="GAME_DATE",
+                min_periods=None, standardize=True):
+    """
+    選手ごとにGAME_DATE順に並べ、各試合までの直近window試合（expanding=Trueなら初戦から）でOLSを当てはめる
+    窓の正規方程式は累積和の差（1試合進むごとに新しい試合の XᵀX・Xᵀy を足し、窓から外れた試合の分を引くのと同じ）で作り、
+    全窓をまとめてsolve_sufficientで解くので、試合ごとに当てはめ直すより大幅に速い
+    min_periods: 係数を出す最小試合数（省略時はrollingならwindow、expandingなら変数の数 + 2）
+    standardize: 窓ごとに標準化した係数（StandardScaler + LinearRegressionと同じ）にする
+    戻り値: 試合ごとの by, order, N（窓の試合数）, const + features の係数, R2
+    """
+    features = list(features)
+    keys = [by] if isinstance(by, str) else list(by)
+    data = df[keys + [order, target] + features].dropna(subset=[target] + features)
+    data = data.assign(**{order: parse_dates(data[order])})
+    data = data.sort_values(keys + [order], kind="mergesort").reset_index(drop=True)
+
+    X = data[features].to_numpy(dtype=float)
+    y = data[target].to_numpy(dtype=float)
+    Z = np.column_stack([np.ones(len(X)), X])
+    n, p = Z.shape
+    min_periods = min_periods or (p + 2 if expanding else window)
+
+    # 先頭に0の行を置いた累積和 → 窓 [lo, i] の合計は cum[i + 1] - cum[lo]
+    cum = np.vstack([np.zeros((1, p * p + p + 1)), np.cumsum(sufficient_stats(Z, y), axis=0)])
+    lo = _window_bounds(data.groupby(keys, sort=False, observed=True).ngroup().to_numpy(), window, expanding)
+    sums = cum[np.arange(1, n + 1)] - cum[lo]
+    count = np.arange(1, n + 1) - lo
+
+    coefficients = np.full((n, p), np.nan)
+    r2 = np.full(n, np.nan)
+    valid = count >= max(min_periods, p + 1)
+    if valid.any():
+        coefficients[valid], r2[valid] = solve_sufficient(sums[valid], count[valid], p, standardize)
+
+    result = data[keys + [order]].assign(N=count)
+    result[["const"] + features] = coefficients
+    result["R2"] = r2
+    return result
+
+
+def coefficient_drift(rolled, features, by="PLAYER_ID"):
+    """
+    rolling_olsの結果から、選手ごとに係数がどれだけ動いたかをまとめる
+    戻り値: 選手×変数ごとの窓の数, 最初と最後の窓の係数, 変化量, 標準偏差, 1試合あたりの変化の平均絶対値
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    long = rolled.melt(id_vars=keys, value_vars=list(features), var_name="Feature", value_name="Coefficient")
+    long = long.dropna(subset=["Coefficient"])
+    # meltは変数ごとに元の行順（試合順）を保つので、グループ内の差分がそのまま試合ごとの変化になる
+    grouped = long.groupby(keys + ["Feature"], sort=False, observed=True)["Coefficient"]
+    long["Step"] = grouped.diff().abs()
+    summary = long.groupby(keys + ["Feature"], sort=False, observed=True).agg(
+        Windows=("Coefficient", "size"),
+        First=("Coefficient", "first"),
+        Last=("Coefficient", "last"),
+        Std=("Coefficient", "std"),
+        Mean_step=("Step", "mean"),
+    )
+    summary.insert(3, "Change", summary["Last"] - summary["First"])
+    return summary.reset_index()
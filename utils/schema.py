@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# PlayerGameLogのGAME_DATE形式（例: "Apr 13, 2025"）
+GAME_DATE_FORMAT = "%b %d, %Y"
+
+# カテゴリ型にする列（種類が少なく、同じ文字列が何度も出てくる列。カテゴリは値の昇順）
+CATEGORY_COLUMNS = ["SEASON", "TEAM_ABBREVIATION", "WL", "MATCHUP", "PLAYER_NAME"]
+# 日付としてパースする列と形式
+DATE_COLUMNS = {"GAME_DATE": GAME_DATE_FORMAT}
+# 型を変えない列（結合キーの型をデータセット・APIの表の間でそろえておくため）
+KEY_COLUMNS = ["PLAYER_ID", "TEAM_ID", "GAME_ID"]
+# 整数列を縮めるときの候補（小さい順）
+INT_TYPES = [np.int16, np.int32]
+
+
+def _compact_int(values):
+    # 値の範囲が収まる最小の整数型
+    if len(values) == 0:
+        return values.astype(INT_TYPES[0])
+    low, high = values.min(), values.max()
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _compact_float(values):
+    # float32に戻しても値が変わらない列だけfloat32にする（試合単位の得点・試投数など）
+    compact = values.astype(np.float32)
+    return compact if np.array_equal(compact.astype(values.dtype), values, equal_nan=True) else values
+
+
+def parse_dates(values, date_format=GAME_DATE_FORMAT):
+    # 文字列の日付をdatetime64にする（パース済みならそのまま。形式が違う表は形式を推定する）
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    try:
+        return pd.to_datetime(values, format=date_format)
+    except ValueError:
+        return pd.to_datetime(values, format="mixed")
+
+
+def apply_schema(df):
+    """
+    読み込んだ表を正規の型にそろえる（全てのローダーの最後に通す）
+    - SEASON・TEAM_ABBREVIATION・WL・MATCHUP・PLAYER_NAME: カテゴリ型
+    - GAME_DATE: datetime64
+    - 整数の列は値が収まればint16（だめならint32）、実数の列はfloat32で値が変わらなければfloat32
+    ID列（PLAYER_ID・TEAM_ID・GAME_ID）は変えない。元のdfは変更しない
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in KEY_COLUMNS:
+            continue
+        if col in DATE_COLUMNS:
+            columns[col] = parse_dates(values, DATE_COLUMNS[col])
+        elif col in CATEGORY_COLUMNS:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                columns[col] = pd.Categorical(values, categories=sorted(values.dropna().unique()))
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_extension_array_dtype(values):
+            columns[col] = _compact_int(values.to_numpy())
+        elif pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            columns[col] = _compact_float(values.to_numpy())
+    return df.assign(**columns) if columns else df
+
+
+def to_storage(df):
+    """
+    保存用に型を戻す（カテゴリ → 文字列、日付 → 元の形式の文字列）
+    数値の幅は保存時のスキーマで元に戻るので、ここでは変えない
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(values):
+            columns[col] = values.dt.strftime(DATE_COLUMNS[col])
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            columns[col] = values.astype(object).where(values.notna(), None)
+    return df.assign(**columns) if columns else df
+
+
+def memory_usage(df):
+    # 文字列の中身も含めたメモリ使用量（バイト）
+    return int(df.memory_usage(deep=True).sum())
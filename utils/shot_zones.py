@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# 六角形セルの大きさ（中心から頂点まで。ShotChartDetailの座標は1単位 = 0.1フィート）
+HEX_SIZE = 15.0
+# ゾーン分けに使うコートの寸法
+RESTRICTED_RADIUS = 40       # リング中心から4フィート
+PAINT_HALF_WIDTH = 80        # ペイントの幅16フィート
+PAINT_TOP = 142.5            # フリースローライン
+THREE_RADIUS = 237.5         # 3Pラインの弧（23フィート9インチ）
+CORNER_THREE_X = 220         # コーナー3の位置（22フィート）
+CORNER_THREE_TOP = 92.5      # コーナー3の直線部分の上端
+
+ZONES = [
+    "Restricted Area",
+    "In The Paint (Non-RA)",
+    "Mid-Range",
+    "Left Corner 3",
+    "Right Corner 3",
+    "Above the Break 3",
+]
+
+
+def hex_cells(x, y, size=HEX_SIZE):
+    """
+    座標を頂点が上向きの六角形グリッドに割り当て、セルの軸座標(q, r)と中心座標を返す
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    # キューブ座標で最も近いセルに丸める
+    cx, cz = q, r
+    cy = -cx - cz
+    rx, ry, rz = np.round(cx), np.round(cy), np.round(cz)
+    dx, dy, dz = np.abs(rx - cx), np.abs(ry - cy), np.abs(rz - cz)
+    fix_x = (dx > dy) & (dx > dz)
+    fix_z = ~fix_x & (dz >= dy)
+    rx = np.where(fix_x, -ry - rz, rx)
+    rz = np.where(fix_z, -rx - ry, rz)
+    q, r = rx.astype(int), rz.astype(int)
+    center_x = size * np.sqrt(3) * (q + r / 2)
+    center_y = size * 1.5 * r
+    return q, r, center_x, center_y
+
+
+def court_zones(x, y):
+    """
+    座標を標準的なコートのゾーン（ZONESのいずれか）に分類する
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    distance = np.hypot(x, y)
+    corner = (np.abs(x) >= CORNER_THREE_X) & (y <= CORNER_THREE_TOP)
+    conditions = [
+        corner & (x < 0),
+        corner & (x > 0),
+        distance >= THREE_RADIUS,
+        distance <= RESTRICTED_RADIUS,
+        (np.abs(x) <= PAINT_HALF_WIDTH) & (y <= PAINT_TOP),
+    ]
+    choices = ["Left Corner 3", "Right Corner 3", "Above the Break 3", "Restricted Area", "In The Paint (Non-RA)"]
+    return pd.Categorical(np.select(conditions, choices, default="Mid-Range"), categories=ZONES)
+
+
+def _with_fg_pct(df):
+    df["FG_PCT"] = np.where(df["FGA"] > 0, df["FGM"] / df["FGA"].where(df["FGA"] > 0, 1), np.nan)
+    return df
+
+
+def shot_cube(shots, by=("SEASON",), size=HEX_SIZE):
+    """
+    ショット単位のデータを1回のgroupbyで (by, 六角形セル, ゾーン, SHOT_TYPE) ごとの試投数・成功数に集約する
+    以降の集計（セル別・ゾーン別・2P/3P別）はこの集約結果から作るので、生データを再走査しない
+    """
+    by = list(by)
+    q, r, _, _ = hex_cells(shots["LOC_X"], shots["LOC_Y"], size)
+    keys = shots[by].copy()
+    keys["HEX_Q"] = q
+    keys["HEX_R"] = r
+    keys["ZONE"] = court_zones(shots["LOC_X"], shots["LOC_Y"])
+    keys["SHOT_TYPE"] = shots["SHOT_TYPE"].to_numpy()
+    made = shots["SHOT_MADE_FLAG"].to_numpy()
+    cube = (
+        keys.assign(FGM=made)
+        .groupby(list(keys.columns), observed=True, sort=False)["FGM"]
+        .agg(FGA="size", FGM="sum")
+        .reset_index()
+    )
+    cube.attrs["hex_size"] = size
+    return cube
+
+
+def rollup(cube, by):
+    """
+    キューブを任意の軸で集約し、試投数・成功数・FG%を返す
+    例: rollup(cube, ["SEASON", "ZONE"]), rollup(cube, ["SHOT_TYPE"])
+    """
+    by = list(by)
+    result = cube.groupby(by, observed=True)[["FGA", "FGM"]].sum().reset_index()
+    return _with_fg_pct(result)
+
+
+def hex_summary(cube, by=("SEASON",)):
+    """
+    六角形セルごとの試投数・成功数・FG%と、描画用のセル中心座標
+    """
+    size = cube.attrs.get("hex_size", HEX_SIZE)
+    result = rollup(cube, list(by) + ["HEX_Q", "HEX_R"])
+    result["X"] = size * np.sqrt(3) * (result["HEX_Q"] + result["HEX_R"] / 2)
+    result["Y"] = size * 1.5 * result["HEX_R"]
+    return result
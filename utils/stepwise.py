@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.linalg import solve_triangular
+
+# 選択基準
+CRITERIA = ("pvalue", "aic", "bic")
+
+
+class IncrementalOLS:
+    """
+    定数項 + 選択中の変数のOLSをQR分解（Z = QR）で保持し、変数の追加・削除をランク1更新で行う
+    全候補の残差（Xから選択中の変数の成分を除いたもの）も同時に更新するので、
+    各ステップの候補評価は再推定なしに行列演算1回で済む
+    """
+
+    def __init__(self, X, y):
+        X = X.astype(float)
+        y = np.asarray(y, dtype=float)
+        if np.isnan(X.to_numpy()).any() or np.isnan(y).any():
+            raise ValueError("欠損値を含むデータは扱えません。事前に除外・補完してください。")
+        self.columns = list(X.columns)
+        self.n = len(y)
+        self.included = []
+
+        # 定数項だけのモデルで初期化
+        q = np.full(self.n, 1 / np.sqrt(self.n))
+        self.Q = q[:, None]
+        self.R = np.array([[np.sqrt(self.n)]])
+        values = X.to_numpy()
+        self.C = q @ values                       # Q^T X（各候補の選択中の成分）
+        self.C = self.C[None, :]
+        self.resid_X = values - np.outer(q, self.C[0])
+        self.c_y = np.array([q @ y])              # Q^T y
+        self.resid_y = y - q * self.c_y[0]
+        self._scale = np.sqrt((self.resid_X ** 2).sum(axis=0))
+
+    @property
+    def rss(self):
+        return float(self.resid_y @ self.resid_y)
+
+    @property
+    def df_resid(self):
+        return self.n - len(self.included) - 1
+
+    def information_criterion(self, rss, k, criterion):
+        # statsmodelsのOLS.aic / bic と同じ定義（kは定数項を含むパラメータ数）
+        llf = -self.n / 2 * (np.log(2 * np.pi) + np.log(rss / self.n) + 1)
+        penalty = 2 * k if criterion == "aic" else k * np.log(self.n)
+        return -2 * llf + penalty
+
+    def add_scores(self):
+        """
+        未選択の各変数を1つ追加したときの p値 と RSS（FWL定理により残差同士の回帰で求める）
+        """
+        idx = [i for i, col in enumerate(self.columns) if col not in self.included]
+        names = [self.columns[i] for i in idx]
+        if not idx:
+            return pd.DataFrame(columns=["pvalue", "rss"], dtype=float)
+        ss = np.einsum("ij,ij->j", self.resid_X, self.resid_X)[idx]
+        cross = (self.resid_y @ self.resid_X)[idx]
+        # 選択中の変数と完全に共線な候補は追加できないものとして扱う
+        valid = ss > 1e-10 * np.maximum(self._scale[idx] ** 2, 1e-300)
+        ss_safe = np.where(valid, ss, 1.0)
+        rss = np.where(valid, self.rss - cross ** 2 / ss_safe, self.rss)
+        df = self.df_resid - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (cross / ss_safe) / np.sqrt(rss / df / ss_safe)
+        pvalue = np.where(valid, 2 * stats.t.sf(np.abs(t), df), np.nan)
+        return pd.DataFrame({"pvalue": pvalue, "rss": rss}, index=names)
+
+    def drop_scores(self):
+        """
+        選択中の各変数の p値（現在のモデルのt検定）と、その変数を除いたときの RSS
+        """
+        if not self.included:
+            return pd.DataFrame(columns=["pvalue", "rss"], dtype=float)
+        R_inv = solve_triangular(self.R, np.eye(len(self.R)))
+        beta = R_inv @ self.c_y
+        # (Z^T Z)^-1 の対角 = R^-1 の行ノルムの2乗
+        diag = (R_inv ** 2).sum(axis=1)
+        rss = self.rss
+        sigma2 = rss / self.df_resid
+        t = beta / np.sqrt(sigma2 * diag)
+        pvalue = 2 * stats.t.sf(np.abs(t), self.df_resid)
+        rss_drop = rss + beta ** 2 / diag
+        return pd.DataFrame({"pvalue": pvalue[1:], "rss": rss_drop[1:]}, index=list(self.included))
+
+    def add(self, name):
+        # 候補の残差を正規化して新しい直交基底にする（直交性を保つため再直交化を1回行う）
+        j = self.columns.index(name)
+        r = self.resid_X[:, j].copy()
+        correction = self.Q.T @ r
+        r -= self.Q @ correction
+        rho = np.sqrt(r @ r)
+        q = r / rho
+
+        self.R = np.block([
+            [self.R, (self.C[:, j] + correction)[:, None]],
+            [np.zeros((1, len(self.R))), np.array([[rho]])],
+        ])
+        self.Q = np.column_stack([self.Q, q])
+        # 全候補・目的変数の残差から新しい基底の成分を取り除く
+        row = q @ self.resid_X
+        self.resid_X -= np.outer(q, row)
+        self.C = np.vstack([self.C, row])
+        coef_y = q @ self.resid_y
+        self.resid_y = self.resid_y - q * coef_y
+        self.c_y = np.append(self.c_y, coef_y)
+        self.included.append(name)
+
+    def remove(self, name):
+        # Rから列を削除してできるヘッセンベルグ行列をGivens回転で上三角に戻す
+        k = self.included.index(name) + 1
+        R = np.delete(self.R, k, axis=1)
+        Q, C, c_y = self.Q.copy(), self.C.copy(), self.c_y.copy()
+        for j in range(k, R.shape[1]):
+            a, b = R[j, j], R[j + 1, j]
+            h = np.hypot(a, b)
+            c, s = a / h, b / h
+            G = np.array([[c, s], [-s, c]])
+            R[[j, j + 1], j:] = G @ R[[j, j + 1], j:]
+            C[[j, j + 1]] = G @ C[[j, j + 1]]
+            c_y[[j, j + 1]] = G @ c_y[[j, j + 1]]
+            Q[:, [j, j + 1]] = Q[:, [j, j + 1]] @ G.T
+        # 最後の基底は削除した変数の方向なので、その成分を残差に戻す
+        u = Q[:, -1]
+        self.resid_X += np.outer(u, C[-1])
+        self.resid_y = self.resid_y + u * c_y[-1]
+        self.Q, self.R, self.C, self.c_y = Q[:, :-1], R[:-1], C[:-1], c_y[:-1]
+        self.included.remove(name)
+
+
+def stepwise_selection(X, y,
+                       initial_list=(),
+                       criterion="pvalue",
+                       threshold_in=0.01,
+                       threshold_out=0.05,
+                       verbose=True):
+    """
+    前進・後退ステップワイズ選択
+    criterion="pvalue": p値が threshold_in 未満の変数を追加し、threshold_out を超えた変数を削除する
+    criterion="aic" / "bic": 情報量基準が最も小さくなる変数を、現在のモデルより小さくなる場合に追加・削除する
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterionは {CRITERIA} のいずれかを指定してください: {criterion}")
+    model = IncrementalOLS(X, y)
+    for var in initial_list:
+        model.add(var)
+
+    def score(rss, n_vars):
+        return model.information_criterion(rss, n_vars + 1, criterion)
+
+    while True:
+        changed = False
+        # 追加ステップ
+        candidates = model.add_scores()
+        if criterion == "pvalue":
+            pvalues = candidates["pvalue"].dropna()
+            if not pvalues.empty and pvalues.min() < threshold_in:
+                best_var = pvalues.idxmin()
+                model.add(best_var)
+                changed = True
+                if verbose:
+                    print(f"追加: {best_var:>10s} (p={pvalues.min():.4f})")
+        else:
+            candidates = candidates[candidates["pvalue"].notna()]
+            if not candidates.empty:
+                current = score(model.rss, len(model.included))
+                values = score(candidates["rss"], len(model.included) + 1)
+                if values.min() < current:
+                    best_var = values.idxmin()
+                    model.add(best_var)
+                    changed = True
+                    if verbose:
+                        print(f"追加: {best_var:>10s} ({criterion.upper()}={values.min():.2f})")
+
+        # 削除ステップ
+        drops = model.drop_scores()
+        if criterion == "pvalue":
+            if not drops.empty and drops["pvalue"].max() > threshold_out:
+                worst_var = drops["pvalue"].idxmax()
+                model.remove(worst_var)
+                changed = True
+                if verbose:
+                    print(f"削除: {worst_var:>10s} (p={drops['pvalue'].max():.4f})")
+        elif not drops.empty:
+            current = score(model.rss, len(model.included))
+            values = score(drops["rss"], len(model.included) - 1)
+            if values.min() < current:
+                worst_var = values.idxmin()
+                model.remove(worst_var)
+                changed = True
+                if verbose:
+                    print(f"削除: {worst_var:>10s} ({criterion.upper()}={values.min():.2f})")
+
+        if not changed:
+            break
+
+    return list(model.included)
@@ -0,0 +1,249 @@
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# PARQUET_DIR: Parquetデータセットの保存先（データセット名ごとのディレクトリ）, CSV_DIR: 移行前のCSV
+from utils.paths import PARQUET_DIR, CSV_DIR
+from utils.schema import apply_schema, to_storage
+
+# 八村塁のPLAYER_ID（PLAYER_ID列を持たない旧CSVの補完用）
+RUI_HACHIMURA_ID = 1629060
+
+STRING = pa.string()
+INT = pa.int64()
+FLOAT = pa.float64()
+
+
+def _schema(*groups):
+    # (型, 列名リスト) の組からpyarrowのスキーマを作る
+    return pa.schema([(name, dtype) for dtype, names in groups for name in names])
+
+
+# データセット定義
+# schema: 列と型, partitioning: パーティション列, legacy_csv: 旧CSVと補完する定数列
+DATASETS = {
+    # 選手×試合のスタンダードスタッツ
+    "standard_stats": {
+        "schema": _schema(
+            (INT, ["PLAYER_ID"]),
+            (STRING, ["SEASON", "GAME_ID", "GAME_DATE", "MATCHUP", "WL"]),
+            (FLOAT, ["MIN"]),
+            (INT, ["PTS", "FGM", "FGA"]),
+            (FLOAT, ["FG_PCT"]),
+            (INT, ["FG3M", "FG3A"]),
+            (FLOAT, ["FG3_PCT"]),
+            (INT, ["FTM", "FTA"]),
+            (FLOAT, ["FT_PCT"]),
+            (INT, ["OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PLUS_MINUS"]),
+        ),
+        "partitioning": ["SEASON", "PLAYER_ID"],
+        "legacy_csv": ("rui_hachimura_standard_stats_2019_2025.csv", {"PLAYER_ID": RUI_HACHIMURA_ID}),
+    },
+    # 選手×試合のアドバンスドスタッツ
+    "advanced_stats": {
+        "schema": _schema(
+            (INT, ["PLAYER_ID"]),
+            (STRING, ["SEASON", "GAME_ID", "GAME_DATE", "MATCHUP", "WL", "MIN"]),
+            (FLOAT, ["OFF_RATING", "DEF_RATING", "NET_RATING", "AST_PCT", "AST_RATIO",
+                     "OREB_PCT", "DREB_PCT", "REB_PCT", "TO_RATIO", "EFG_PCT", "TS_PCT",
+                     "USG_PCT", "PACE", "PIE"]),
+        ),
+        "partitioning": ["SEASON", "PLAYER_ID"],
+        "legacy_csv": ("rui_hachimura_advanced_stats_2019_2025.csv", {"PLAYER_ID": RUI_HACHIMURA_ID}),
+    },
+    # シーズン単位のリーグ全選手スタッツ（Traditional）
+    "league_traditional": {
+        "schema": _schema(
+            (STRING, ["SEASON"]),
+            (INT, ["PLAYER_ID"]),
+            (STRING, ["PLAYER_NAME", "TEAM_ABBREVIATION"]),
+            (FLOAT, ["AGE"]),
+            (INT, ["GP"]),
+            (FLOAT, ["MIN", "PTS", "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT",
+                     "FTM", "FTA", "FT_PCT", "OREB", "DREB", "REB", "AST", "STL", "BLK",
+                     "TOV", "PF", "PLUS_MINUS"]),
+        ),
+        "partitioning": ["SEASON"],
+        "legacy_csv": ("nba_players_2024_2025_30games_clustering.csv", {"SEASON": "2024-25"}),
+    },
+    # シーズン単位のリーグ全選手スタッツ（Advanced）
+    "league_advanced": {
+        "schema": _schema(
+            (STRING, ["SEASON"]),
+            (INT, ["PLAYER_ID"]),
+            (STRING, ["PLAYER_NAME", "TEAM_ABBREVIATION"]),
+            (INT, ["GP"]),
+            (FLOAT, ["MIN", "OFF_RATING", "DEF_RATING", "NET_RATING", "AST_PCT", "AST_RATIO",
+                     "OREB_PCT", "DREB_PCT", "REB_PCT", "TM_TOV_PCT", "EFG_PCT", "TS_PCT",
+                     "USG_PCT", "PACE", "PIE"]),
+        ),
+        "partitioning": ["SEASON"],
+        "legacy_csv": ("nba_players_advanced_2024_2025_30games_clustering.csv", {}),
+    },
+    # シーズン単位のリーグ全選手スタッツ（measure type × per modeを横持ちにした表）
+    # 列はmeasure type・per modeの組み合わせで変わるため、スキーマは書き込むDataFrameから作る
+    "league_wide": {
+        "schema": None,
+        "partitioning": ["SEASON"],
+        "partition_types": {"SEASON": STRING},
+        "legacy_csv": None,
+    },
+    # リーグ全選手の表から作るロールアップ（utils.aggregates）。シーズン・チーム・リーグ単位の統計量
+    "league_rollups": {
+        "schema": None,
+        "partitioning": ["SEASON"],
+        "partition_types": {"SEASON": STRING},
+        "legacy_csv": None,
+    },
+    # 同じく選手×指標の値とシーズン内のパーセンタイル
+    "player_rollups": {
+        "schema": None,
+        "partitioning": ["SEASON"],
+        "partition_types": {"SEASON": STRING},
+        "legacy_csv": None,
+    },
+}
+
+
+def _partition_path(root, partitioning, values):
+    # Hive形式のパーティションディレクトリ（例: SEASON=2024-25/PLAYER_ID=1629060）
+    return root.joinpath(*[f"{col}={value}" for col, value in zip(partitioning, values)])
+
+
+def dataset_exists(name, root=PARQUET_DIR):
+    return (Path(root) / name).exists()
+
+
+def write_dataset(df, name, root=PARQUET_DIR):
+    """
+    DataFrameをスキーマに合わせてパーティション分割したParquetに保存する
+    書き込むのはdfに含まれるパーティションだけで、各パーティションは丸ごと置き換える
+    一時ファイルに書いてからos.replaceするため、途中で失敗しても既存のパーティションは壊れない
+    """
+    spec = DATASETS[name]
+    schema = spec["schema"]
+    partitioning = spec["partitioning"]
+    root = Path(root) / name
+
+    # カテゴリ・日付の列は保存用の文字列に戻す（数値はスキーマの型に変換される）
+    df = to_storage(df)
+    if schema is None:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+    df = df.reindex(columns=schema.names)
+    for (values, part) in df.groupby(partitioning, sort=False, observed=True):
+        values = values if isinstance(values, tuple) else (values,)
+        table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+        # パーティション列はディレクトリ名で表現するのでファイルには含めない
+        table = table.drop_columns(partitioning)
+        path = _partition_path(root, partitioning, values)
+        path.mkdir(parents=True, exist_ok=True)
+        tmp_path = path / f".part-0.parquet.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path / "part-0.parquet")
+
+
+def _filter_expression(filters):
+    # {"SEASON": ["2023-24", "2024-25"], "PLAYER_ID": 1629060} → pyarrowのフィルタ式
+    expr = None
+    for col, value in filters.items():
+        if isinstance(value, (list, tuple, set, pd.Series, pd.Index)):
+            cond = ds.field(col).isin(list(value))
+        else:
+            cond = ds.field(col) == value
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def _read_legacy_csv(name, columns, filters):
+    # Parquet未作成の場合は旧CSVをスキーマの型で読む
+    spec = DATASETS[name]
+    if spec["legacy_csv"] is None:
+        raise FileNotFoundError(f"データセットがまだ作成されていません: {name}")
+    filename, constants = spec["legacy_csv"]
+    dtypes = {
+        field.name: str if pa.types.is_string(field.type) else field.type.to_pandas_dtype()
+        for field in spec["schema"]
+    }
+    header = pd.read_csv(CSV_DIR / filename, nrows=0).columns
+    df = pd.read_csv(CSV_DIR / filename, dtype={col: dtypes[col] for col in header if col in dtypes})
+    for col, value in constants.items():
+        df[col] = value
+    for col, value in filters.items():
+        if isinstance(value, (list, tuple, set, pd.Series, pd.Index)):
+            df = df[df[col].isin(list(value))]
+        else:
+            df = df[df[col] == value]
+    df = df.reindex(columns=spec["schema"].names)
+    return apply_schema((df[columns] if columns else df).reset_index(drop=True))
+
+
+def read_dataset(name, columns=None, filters=None, root=PARQUET_DIR):
+    """
+    Parquetデータセットを読み込む
+    columnsで読み込む列を絞り（列射影）、filtersの条件はパーティション単位で評価されるため
+    対象外のシーズン・選手のファイルは読み込まれない（述語プッシュダウン）
+    読み込んだ表はutils.schemaの正規の型（カテゴリ・int16/float32・パース済みのGAME_DATE）にそろえる
+    """
+    spec = DATASETS[name]
+    filters = filters or {}
+    path = Path(root) / name
+    if not path.exists():
+        return _read_legacy_csv(name, columns, filters)
+
+    schema = spec["schema"]
+    if schema is None:
+        schema, partitioning = _inferred_schema(path, spec)
+    else:
+        partitioning = ds.partitioning(
+            pa.schema([schema.field(col) for col in spec["partitioning"]]), flavor="hive"
+        )
+    dataset = ds.dataset(path, schema=schema, format="parquet", partitioning=partitioning)
+    table = dataset.to_table(columns=columns or schema.names, filter=_filter_expression(filters))
+    return apply_schema(table.to_pandas())
+
+
+def _inferred_schema(path, spec):
+    # スキーマ未定義のデータセットは全パーティションのファイルのスキーマを統合して読む
+    # （古いシーズンに無い列は欠損になる）
+    partition_schema = pa.schema([(col, spec["partition_types"][col]) for col in spec["partitioning"]])
+    partitioning = ds.partitioning(partition_schema, flavor="hive")
+    fragments = ds.dataset(path, format="parquet", partitioning=partitioning).get_fragments()
+    file_schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments])
+    return pa.unify_schemas([partition_schema, file_schema]), partitioning
+
+
+def migrate_legacy_csv(name, root=PARQUET_DIR):
+    # 旧CSVをスキーマの型で読み込み、Parquetデータセットとして書き出す
+    df = _read_legacy_csv(name, None, {})
+    write_dataset(df, name, root=root)
+    return len(df)
+
+
+def dataset_paths(name, root=PARQUET_DIR):
+    # データセットの実体（Parquetが無ければ旧CSV）のパス。変更検知の入力に使う
+    path = Path(root) / name
+    if path.exists() or DATASETS[name]["legacy_csv"] is None:
+        return [path]
+    return [CSV_DIR / DATASETS[name]["legacy_csv"][0]]
+
+
+def partition_mtimes(name, root=PARQUET_DIR):
+    """
+    最上位のパーティション（例: SEASON=2024-25）ごとのファイルの最終更新時刻 {パーティションの値: 時刻}
+    別のデータセットから作った表が古くなっていないかの判定に使う。パーティション分割していない旧CSVは {None: 時刻}
+    """
+    mtimes = {}
+    for path in dataset_paths(name, root):
+        if path.is_dir():
+            for f in path.rglob("*.parquet"):
+                top = f.relative_to(path).parts[0]
+                value = top.split("=", 1)[1] if "=" in top else None
+                mtimes[value] = max(mtimes.get(value, 0), f.stat().st_mtime)
+        elif path.exists():
+            mtimes[None] = path.stat().st_mtime
+    return mtimes
@@ -0,0 +1,242 @@
+import json
+import pickle
+import queue
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import instrumentation
+from utils.features import COUNTING_STATS, add_derived_features, safe_divide
+from utils.paths import CACHE_DIR, OUTPUT_DIR
+from utils.percentile import PercentileIndex
+from utils.rolling import solve_sufficient, sufficient_stats
+from utils.schema import apply_schema, parse_dates
+
+# 新しい試合ログを置く受け口と、処理済みファイルの移動先
+INBOX_DIR = OUTPUT_DIR / "inbox"
+PROCESSED_DIR = INBOX_DIR / "processed"
+# 選手ごとの出力（集計・パーセンタイル・モデル係数）の保存先
+STREAM_OUTPUT_DIR = OUTPUT_DIR / "streaming"
+# 状態（集計・パーセンタイル・十分統計量・選手ごとの取り込み済みの最新試合日）の保存先
+STATE_PATH = CACHE_DIR / "streaming" / "state.pkl"
+
+# 合計を持っておく列（1試合平均とパーセンタイルに使う）
+TOTAL_COLUMNS = ["MIN"] + COUNTING_STATS
+# 合計から求める成功率
+PCT_COLUMNS = {"FG_PCT": ("FGM", "FGA"), "FG3_PCT": ("FG3M", "FG3A"), "FT_PCT": ("FTM", "FTA")}
+
+
+class DropFolderSource:
+    """
+    受け口のディレクトリに置かれたCSV・Parquetを新しい試合ログとして読む
+    処理が終わったファイルはack()でprocessed/に移すので、途中で失敗しても次回また読まれる
+    """
+
+    def __init__(self, inbox=INBOX_DIR, processed=PROCESSED_DIR):
+        self.inbox = Path(inbox)
+        self.processed = Path(processed)
+
+    def poll(self):
+        # 置かれた順（更新時刻順）に (ファイル, DataFrame) を返す
+        if not self.inbox.exists():
+            return []
+        paths = sorted((p for p in self.inbox.iterdir() if p.suffix in (".csv", ".parquet")),
+                       key=lambda p: p.stat().st_mtime)
+        return [(path, apply_schema(pd.read_parquet(path) if path.suffix == ".parquet"
+                                    else pd.read_csv(path, dtype={"SEASON": str, "GAME_ID": str})))
+                for path in paths]
+
+    def ack(self, path):
+        self.processed.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), self.processed / path.name)
+
+
+class QueueSource:
+    """キュー（queue.Queue）に入れられたDataFrameを新しい試合ログとして読む（メッセージキューの代わり）"""
+
+    def __init__(self, q=None):
+        self.queue = q or queue.Queue()
+
+    def put(self, df):
+        self.queue.put(df)
+
+    def poll(self):
+        batches = []
+        while True:
+            try:
+                batches.append((len(batches), self.queue.get_nowait()))
+            except queue.Empty:
+                return batches
+
+    def ack(self, _):
+        self.queue.task_done()
+
+
+class StreamingState:
+    """
+    試合ログを1バッチずつ取り込み、影響を受けた選手の分だけ更新する状態
+    totals: 選手×シーズンの試合数と合計
+    indexes: シーズンごとの1試合平均のPercentileIndex（更新した選手の値だけ差し替える）
+    sufficient: モデル×選手ごとのOLSの十分統計量（Σz zᵀ, Σz y, Σy²）と試合数
+    latest: 選手ごとの取り込み済みの最新GAME_DATE（sync.new_gamesと同じく、それより前の試合は取り込まない）
+    更新の計算量は新しい試合数（と更新した選手の数）に比例し、過去の試合数には依存しない
+    他の選手のパーセンタイルは、その選手の出力が次に出し直されるときに最新のインデックスで求め直される
+    """
+
+    def __init__(self, models):
+        # models: {モデル名: (目的変数, 特徴量のリスト)}
+        self.models = {name: (target, list(features)) for name, (target, features) in models.items()}
+        self.totals = {}
+        self.indexes = {}
+        self.sufficient = {}
+        self.latest = {}
+
+    def new_rows(self, df):
+        """
+        各選手の取り込み済みの最新GAME_DATEより後の試合だけを残し（バッチ内の重複も除く）、最新日を進める
+        試合単位の記録を持たないので、状態の大きさは選手数にしか比例しない
+        """
+        dates = parse_dates(df["GAME_DATE"])
+        latest = pd.to_datetime(df["PLAYER_ID"].map(self.latest))
+        keep = (latest.isna() | (dates > latest)).to_numpy()
+        keep &= ~df.assign(_date=dates).duplicated(["PLAYER_ID", "_date"]).to_numpy()
+        rows = df[keep]
+        self.latest.update(dates[keep].groupby(rows["PLAYER_ID"]).max().to_dict())
+        return rows
+
+    def _update_totals(self, df):
+        sums = df.groupby(["PLAYER_ID", "SEASON"], observed=True)[TOTAL_COLUMNS].sum()
+        games = df.groupby(["PLAYER_ID", "SEASON"], observed=True).size()
+        for key, row in zip(sums.index, sums.to_numpy(dtype=float)):
+            totals = self.totals.get(key)
+            self.totals[key] = np.r_[games[key], row] if totals is None else totals + np.r_[games[key], row]
+        return list(sums.index)
+
+    def per_game(self, player_id, season):
+        # 選手×シーズンの1試合平均と成功率
+        totals = self.totals[(player_id, season)]
+        games, values = totals[0], dict(zip(TOTAL_COLUMNS, totals[1:]))
+        row = {"GP": games, **{col: value / games for col, value in values.items()}}
+        for col, (made, attempted) in PCT_COLUMNS.items():
+            row[col] = float(safe_divide(values[made], values[attempted]))
+        return row
+
+    def _update_indexes(self, affected):
+        for season in sorted({season for _, season in affected}):
+            rows = pd.DataFrame([{"PLAYER_ID": player_id, **self.per_game(player_id, s)}
+                                 for player_id, s in affected if s == season])
+            if season in self.indexes:
+                self.indexes[season].update(rows)
+            else:
+                self.indexes[season] = PercentileIndex(rows, [col for col in rows.columns if col != "PLAYER_ID"])
+
+    def _update_models(self, df):
+        for name, (target, features) in self.models.items():
+            data = df.dropna(subset=[target]).fillna({col: 0 for col in features})
+            X = data[features].to_numpy(dtype=float)
+            Z = np.column_stack([np.ones(len(X)), X])
+            stats = pd.DataFrame(sufficient_stats(Z, data[target].to_numpy(dtype=float)), index=data["PLAYER_ID"])
+            grouped = stats.groupby(level=0)
+            totals = grouped.sum()
+            for player_id, sums, games in zip(totals.index, totals.to_numpy(), grouped.size()):
+                current = self.sufficient.get((name, player_id))
+                self.sufficient[(name, player_id)] = (sums, games) if current is None \
+                    else (current[0] + sums, current[1] + games)
+
+    def apply(self, df):
+        """
+        new_rowsで絞り込んだ試合ログを取り込み、影響を受けた (PLAYER_ID, SEASON) のリストを返す
+        """
+        instrumentation.count("stream_games", len(df))
+        if df.empty:
+            return []
+        df = add_derived_features(df)
+        affected = self._update_totals(df)
+        self._update_indexes(affected)
+        self._update_models(df)
+        return affected
+
+    def update(self, df):
+        return self.apply(self.new_rows(df))
+
+    def coefficients(self, name, player_id, standardize=True):
+        # 選手の全試合で当てはめたモデルの係数（試合数が変数の数以下ならNone）
+        target, features = self.models[name]
+        state = self.sufficient.get((name, player_id))
+        p = len(features) + 1
+        if state is None or state[1] <= p:
+            return None
+        beta, r2 = solve_sufficient(state[0][None], [state[1]], p, standardize)
+        return {"N": int(state[1]), **dict(zip(["const"] + features, beta[0])), "R2": float(r2[0])}
+
+    def player_output(self, player_id, season):
+        per_game = self.per_game(player_id, season)
+        index = self.indexes[season]
+        percentiles = index.lookup([player_id]).iloc[0]
+        return {
+            "PLAYER_ID": int(player_id),
+            "SEASON": season,
+            "per_game": per_game,
+            "percentiles": {col: float(value) for col, value in percentiles.items()},
+            "models": {name: self.coefficients(name, player_id) for name in self.models},
+        }
+
+
+def emit(state, affected, out_dir=STREAM_OUTPUT_DIR):
+    # 影響を受けた選手×シーズンの出力だけを書き直す
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for player_id, season in affected:
+        path = out_dir / f"player_{player_id}_{season}.json"
+        path.write_text(json.dumps(state.player_output(player_id, season), indent=2, ensure_ascii=False,
+                                   default=float))
+        paths.append(path)
+    instrumentation.count("stream_outputs", len(paths))
+    return paths
+
+
+def load_state(models, path=STATE_PATH):
+    # 保存済みの状態を読み込む（無ければ空の状態）
+    path = Path(path)
+    if path.exists():
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.models == {name: (target, list(features)) for name, (target, features) in models.items()}:
+            return state
+        print("モデルの定義が変わったため、状態を作り直します")
+    return StreamingState(models)
+
+
+def save_state(state, path=STATE_PATH):
+    # 一時ファイルに書いてから置き換える（途中で失敗しても前回の状態は壊れない）
+    # 小さな配列が選手数だけあるので、joblibではなくCの実装のpickleで保存する（バッチごとに呼ぶため）
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(path)
+
+
+def process(state, source, out_dir=STREAM_OUTPUT_DIR, on_batch=None, state_path=STATE_PATH):
+    """
+    sourceの新しいバッチを順に取り込み、影響を受けた選手の出力を書き直す
+    on_batch(rows, affected): 取り込んだ後に呼ぶ処理（データセットへの追記など）
+    バッチごとに状態を保存してからackするので、途中で失敗しても取り込んだ分と状態がずれない
+    戻り値: 出力を書き直した (PLAYER_ID, SEASON) のリスト
+    """
+    updated = []
+    for batch_id, df in source.poll():
+        rows = state.new_rows(df)
+        affected = state.apply(rows)
+        if on_batch is not None and affected:
+            on_batch(rows, affected)
+        emit(state, affected, out_dir)
+        if state_path is not None:
+            save_state(state, state_path)
+        source.ack(batch_id)
+        updated.extend(affected)
+    return updated
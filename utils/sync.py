@@ -0,0 +1,79 @@
+import pandas as pd
+
+from utils.cache import current_season
+from utils.schema import apply_schema, parse_dates
+from utils.storage import read_dataset, write_dataset, dataset_exists, DATASETS
+
+
+def read_existing(name, player_ids):
+    # 対象選手の保存済みデータを読み込む
+    return read_dataset(name, filters={"PLAYER_ID": list(player_ids)})
+
+
+def _group_keys(df):
+    return [col for col in ("PLAYER_ID", "SEASON") if col in df.columns]
+
+
+def latest_games(existing_df):
+    """
+    選手・シーズンごとに保存済みの最新試合（GAME_DATEとGAME_ID）を返す
+    """
+    if existing_df.empty:
+        return pd.DataFrame()
+    df = existing_df.assign(_date=parse_dates(existing_df["GAME_DATE"]))
+    keys = _group_keys(df)
+    latest = df.loc[df.groupby(keys, observed=True)["_date"].idxmax()]
+    columns = keys + ["GAME_DATE"] + (["GAME_ID"] if "GAME_ID" in df.columns else [])
+    return latest[columns].reset_index(drop=True)
+
+
+def seasons_to_sync(existing_df, seasons):
+    # 保存済みの終了シーズンは再取得しない。進行中シーズンと未取得シーズンのみ対象
+    stored = set(existing_df["SEASON"]) if "SEASON" in existing_df.columns else set()
+    current = current_season()
+    return [season for season in seasons if season not in stored or season >= current]
+
+
+def new_games(log_df, existing_df):
+    """
+    取得したゲームログのうち、保存済みデータに無い試合だけを返す
+    GAME_IDが両方にあればIDで、無ければ選手・シーズンごとの最新GAME_DATEより後の試合で判定する
+    """
+    if existing_df.empty or log_df.empty:
+        return log_df
+    log_id = "GAME_ID" if "GAME_ID" in log_df.columns else "Game_ID"
+    # 旧CSV由来のデータはGAME_IDを持たないことがある
+    if "GAME_ID" in existing_df.columns and existing_df["GAME_ID"].notna().all() and log_id in log_df.columns:
+        return log_df[~log_df[log_id].astype(str).isin(existing_df["GAME_ID"])]
+
+    latest = latest_games(existing_df)
+    keys = [key for key in _group_keys(latest) if key in log_df.columns]
+    latest = latest.assign(_latest=parse_dates(latest["GAME_DATE"]))
+    merged = log_df.merge(latest[keys + ["_latest"]], on=keys, how="left")
+    log_dates = parse_dates(merged["GAME_DATE"])
+    is_new = merged["_latest"].isna() | (log_dates > merged["_latest"])
+    return log_df[is_new.to_numpy()]
+
+
+def append_atomic(new_df, existing_df, name):
+    """
+    既存データに新しい行を追加してデータセットに保存する
+    書き換えるのは新しい試合を含むパーティション（シーズン×選手）だけで、
+    各パーティションは一時ファイル経由で置き換えるため、途中で失敗しても既存データは壊れない
+    並び順はフル取得時と同じ（シーズン昇順・各シーズン内は新しい試合が先）
+    """
+    # APIの表も保存済みの表と同じ型にそろえてから結合する
+    combined = pd.concat([apply_schema(existing_df), apply_schema(new_df)], ignore_index=True)
+    dates = parse_dates(combined["GAME_DATE"])
+    order = combined.assign(_date=dates).sort_values(["SEASON", "_date"], ascending=[True, False], kind="stable").index
+    combined = combined.loc[order].reset_index(drop=True)
+
+    # 旧CSVから移行する初回は全パーティションを書き出す
+    if dataset_exists(name):
+        partitioning = DATASETS[name]["partitioning"]
+        touched = new_df[partitioning].drop_duplicates()
+        to_write = combined.merge(touched, on=partitioning, how="inner")
+    else:
+        to_write = combined
+    write_dataset(to_write, name)
+    return combined
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# 相関行列の固有値がこの値×最大固有値以下なら0（完全な共線性）とみなす
+EIGEN_TOL = 1e-10
+
+
+def vif_from_corr(corr, tol=EIGEN_TOL):
+    """
+    相関行列（..., k, k）から各変数のVIF（..., k）を求める
+    VIF_j = (R^-1)_jj。特異な場合は擬似逆行列の対角を使い、
+    完全に共線な変数（ゼロ固有値の固有ベクトルに成分を持つ変数）は inf にする
+    先頭の次元はバッチとしてまとめて計算する
+    """
+    corr = np.asarray(corr, dtype=float)
+    eigvals, eigvecs = np.linalg.eigh(corr)
+    cutoff = tol * np.maximum(eigvals.max(axis=-1, keepdims=True), tol)
+    nonzero = eigvals > cutoff
+    weight = np.where(nonzero, 1 / np.where(nonzero, eigvals, 1), 0)
+    squared = eigvecs ** 2
+    # 擬似逆行列の対角 = Σ_i V_ji^2 / λ_i（λ_i > 0のみ）
+    vif = np.einsum("...ji,...i->...j", squared, weight)
+    # ゼロ固有値方向への成分があれば、他の変数で完全に説明できる
+    null_loading = np.einsum("...ji,...i->...j", squared, (~nonzero).astype(float))
+    return np.where(null_loading > 1e-8, np.inf, vif)
+
+
+def _corr_from_cov(cov, mean):
+    # 共分散行列から相関行列を作る（分散0の変数は相関0として扱う）
+    var = np.clip(np.diagonal(cov, axis1=-2, axis2=-1), 0, None)
+    scale = np.sqrt(var)
+    constant = scale <= 1e-12 * np.maximum(np.abs(mean), 1)
+    scale = np.where(constant, 1, scale)
+    corr = cov / scale[..., :, None] / scale[..., None, :]
+    corr = np.where(constant[..., :, None] | constant[..., None, :], 0, corr)
+    return corr, constant
+
+
+def vif(X, tol=EIGEN_TOL):
+    """
+    全変数のVIFを相関行列の逆行列から一度に求める
+    statsmodelsのvariance_inflation_factor（定数項付きの補助回帰）と同じ値になる
+    分散0の変数は NaN
+    """
+    values = X.to_numpy(dtype=float)
+    mean = values.mean(axis=0)
+    centered = values - mean
+    corr, constant = _corr_from_cov(centered.T @ centered / len(values), mean)
+    result = np.where(constant, np.nan, vif_from_corr(corr, tol))
+    return pd.Series(result, index=X.columns, name="VIF")
+
+
+def vif_by_group(df, features, by="PLAYER_ID", tol=EIGEN_TOL):
+    """
+    グループ（選手など）ごとのVIFをまとめて計算する
+    グループごとに中心化した積和をreduceatで集計し、相関行列のスタックを1回の固有値分解で処理する
+    戻り値: 行がグループ、列が変数のDataFrame
+    """
+    data = df[[by] + list(features)].sort_values(by, kind="stable")
+    values = data[features].to_numpy(dtype=float)
+    keys, starts, counts = np.unique(data[by].to_numpy(), return_index=True, return_counts=True)
+
+    mean = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+    centered = values - np.repeat(mean, counts, axis=0)
+    cross = np.add.reduceat(centered[:, :, None] * centered[:, None, :], starts, axis=0)
+    corr, constant = _corr_from_cov(cross / counts[:, None, None], mean)
+    result = np.where(constant, np.nan, vif_from_corr(corr, tol))
+    return pd.DataFrame(result, index=pd.Index(keys, name=by), columns=list(features))